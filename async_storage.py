@@ -0,0 +1,227 @@
+"""
+AsyncIStorage Interface, the asyncio counterpart of IStorage,
+exposing the 4 CRUD commands as coroutines.
+
+AsyncStorageAdapter implements it on top of any IStorage object,
+running the blocking file I/O in a bounded thread pool.
+"""
+import asyncio
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+from istorage import IStorage
+
+
+class AsyncIStorage(ABC):
+    """
+    AsyncIStorage Interface,
+    an abstract class with the IStorage commands as coroutines.
+    """
+
+    @abstractmethod
+    async def list_movies(self) -> dict:
+        """
+        Returns a dictionary of dictionaries that
+        contains the movies information in the database.
+        :return: movies (dict)
+        """
+
+    @abstractmethod
+    async def add_movie(self,
+                        title: str,
+                        rating: float,
+                        year: int,
+                        poster: str,
+                        website: str,
+                        country: str) -> str:
+        """
+        Adds a movie to the movies database.
+        :param title: str
+        :param rating: float
+        :param year: int
+        :param poster: str
+        :param website: str
+        :param country: str
+        :returns: add message (str)
+        """
+
+    @abstractmethod
+    async def delete_movie(self, title: str) -> str:
+        """
+        Deletes a movie from the movies database.
+        :param title: str
+        :return: delete message (str)
+        """
+
+    @abstractmethod
+    async def update_movie(self, title: str, notes: str) -> str:
+        """
+        Updates a movie from the movies database.
+        :param title: str
+        :param notes: str
+        :return: update message (str)
+        """
+
+    @abstractmethod
+    async def update_fields(self, title: str, **fields) -> str:
+        """
+        Updates any subset of a movie's fields.
+        :param title: str
+        :param fields: new field values
+        :return: update message (str)
+        """
+
+
+class AsyncStorageAdapter(AsyncIStorage):
+    """
+    AsyncIStorage wrapping an IStorage object.
+    The blocking calls run in a bounded thread pool.
+    Reads run concurrently, the writes one at a time, each waiting
+    for the running reads and holding back the new ones, as a file
+    being written can't be parsed.
+    Concurrent reads of the same file version share one parse.
+    """
+
+    def __init__(self, storage: IStorage, max_workers: int = 4,
+                 executor: ThreadPoolExecutor = None):
+        self._storage = storage
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers)
+        self._write_lock = asyncio.Lock()
+        # number of running reads and whether a write runs or waits for them
+        self._state = asyncio.Condition()
+        self._reading = 0
+        self._writing = False
+        # (version, task) of the last parse
+        self._read = None
+
+    async def _run(self, func, *args):
+        """
+        Run a blocking storage call in the thread pool.
+        :param func: storage method
+        :return: call result
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def _run_read(self, func, *args):
+        """
+        Run a blocking storage read, concurrently with the other reads.
+        :param func: storage method
+        :return: call result
+        """
+        async with self._state:
+            await self._state.wait_for(lambda: not self._writing)
+            self._reading += 1
+        try:
+            return await self._run(func, *args)
+        finally:
+            async with self._state:
+                self._reading -= 1
+                self._state.notify_all()
+
+    async def _run_write(self, func, *args):
+        """
+        Run a blocking storage write, alone.
+        :param func: storage method
+        :return: call result
+        """
+        async with self._write_lock:
+            async with self._state:
+                self._writing = True
+                await self._state.wait_for(lambda: not self._reading)
+            try:
+                return await self._run(func, *args)
+            finally:
+                async with self._state:
+                    self._writing = False
+                    self._state.notify_all()
+
+    async def list_movies(self) -> dict:
+        """
+        Returns the movies, parsing the file once per version.
+        Every caller gets its own copy of the movies.
+        :return: movies (dict)
+        """
+        # a file stat, kept off the event loop too
+        version = await self._run(self._storage.get_version)
+        read = self._read
+
+        if read is None or version is None or read[0] != version or \
+                (read[1].done() and read[1].exception()):
+            read = (version,
+                    asyncio.ensure_future(self._run_read(self._storage.list_movies)))
+            self._read = read
+
+        movies = await asyncio.shield(read[1])
+        return {title: dict(info) for title, info in movies.items()}
+
+    async def _write(self, func, *args) -> str:
+        """
+        Run a storage command that changes the movies.
+        :param func: storage method
+        :return: command message (str)
+        """
+        try:
+            return await self._run_write(func, *args)
+        finally:
+            self._read = None
+
+    async def add_movie(self,
+                        title: str,
+                        rating: float,
+                        year: int,
+                        poster: str,
+                        website: str,
+                        country: str) -> str:
+        """
+        Adds a movie to the movies database.
+        :param title: str
+        :param rating: float
+        :param year: int
+        :param poster: str
+        :param website: str
+        :param country: str
+        :returns: add message (str)
+        """
+        return await self._write(self._storage.add_movie,
+                                 title, rating, year, poster, website, country)
+
+    async def delete_movie(self, title: str) -> str:
+        """
+        Deletes a movie from the movies database.
+        :param title: str
+        :return: delete message (str)
+        """
+        return await self._write(self._storage.delete_movie, title)
+
+    async def update_movie(self, title: str, notes: str) -> str:
+        """
+        Updates a movie from the movies database.
+        :param title: str
+        :param notes: str
+        :return: update message (str)
+        """
+        return await self._write(self._storage.update_movie, title, notes)
+
+    async def update_fields(self, title: str, **fields) -> str:
+        """
+        Updates any subset of a movie's fields.
+        :param title: str
+        :param fields: new field values
+        :return: update message (str)
+        """
+        return await self._write(lambda: self._storage.update_fields(title, **fields))
+
+    def close(self):
+        """
+        Shut down the thread pool if the adapter created it.
+        """
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,365 @@
+"""
+Non-interactive batch commands
+running on a IStorage object with JSON output.
+
+Run a single command:
+python3 main.py movies.json stats
+python3 main.py movies.json search "godfther"
+
+Run a batch of commands, one per line, read from stdin:
+printf 'stats\\nsort --limit 5\\n' | python3 main.py movies.json batch
+"""
+import argparse
+import json
+import shlex
+import sys
+
+from country_index import CountryIndexCache
+from dedup import duplicate_warning, find_duplicates, merge_duplicates
+from instrumentation import instrumentation
+from istorage import IStorage
+from utils import strip_colors
+
+
+def add_command_parsers(subparsers):
+    """
+    Add the batch commands parsers.
+    :param subparsers: argparse subparsers action
+    """
+    subparsers.add_parser('list', help='List movies')
+
+    add_parser = subparsers.add_parser(
+        'add', help='Add a movie, fetched from OMDb unless --rating is given')
+    add_parser.add_argument('title')
+    add_parser.add_argument('--rating', type=float)
+    add_parser.add_argument('--year', type=int, default=0)
+    add_parser.add_argument('--poster', default='')
+    add_parser.add_argument('--website', default='')
+    add_parser.add_argument('--country', default='')
+    add_parser.add_argument('--force', action='store_true',
+                            help='Add the movie even if it looks like a duplicate')
+
+    delete_parser = subparsers.add_parser('delete', help='Delete a movie')
+    delete_parser.add_argument('title')
+
+    update_parser = subparsers.add_parser('update', help="Update a movie's notes")
+    update_parser.add_argument('title')
+    update_parser.add_argument('notes')
+
+    stats_parser = subparsers.add_parser('stats', help='Movies statistics')
+    stats_parser.add_argument('--streaming', action='store_true',
+                              help='One pass with bounded memory, approximate quantiles')
+
+    sort_parser = subparsers.add_parser('sort', help='Movies sorted by rating')
+    sort_parser.add_argument('--limit', type=int)
+
+    search_parser = subparsers.add_parser('search', help='Search movies')
+    search_parser.add_argument('name')
+
+    histogram_parser = subparsers.add_parser('histogram',
+                                             help='Create rating histogram')
+    histogram_parser.add_argument('file_name', help='.png file name')
+
+    subparsers.add_parser('generate', help='Generate movies website')
+
+    countries_parser = subparsers.add_parser(
+        'countries', help='Movies from all the --all countries and any --any country')
+    countries_parser.add_argument('--all', nargs='+', default=[], metavar='COUNTRY')
+    countries_parser.add_argument('--any', nargs='+', default=[], metavar='COUNTRY')
+
+    dedup_parser = subparsers.add_parser(
+        'dedup', help='Clusters of near-duplicate titles, merged with --merge')
+    dedup_parser.add_argument('--threshold', type=float, default=0.6,
+                              help='Minimum title similarity, from 0 to 1')
+    dedup_parser.add_argument('--max-year-gap', type=int, default=1)
+    dedup_parser.add_argument('--merge', action='store_true',
+                              help='Merge every cluster into one movie')
+
+    refresh_parser = subparsers.add_parser(
+        'refresh', help='Refresh ratings, posters and countries from OMDb')
+    refresh_parser.add_argument('--workers', type=int, default=8)
+    refresh_parser.add_argument('--cache', metavar='FILE',
+                                help='ETag / Last-Modified cache file')
+    refresh_parser.add_argument('--checkpoint', metavar='FILE',
+                                help='Checkpoint file to resume an interrupted refresh')
+
+    ingest_parser = subparsers.add_parser(
+        'ingest', help='Add the movies of IMDb title.basics and title.ratings dumps')
+    ingest_parser.add_argument('basics', help='title.basics TSV file, e.g. title.basics.tsv.gz')
+    ingest_parser.add_argument('ratings', help='title.ratings TSV file, e.g. title.ratings.tsv.gz')
+    types_group = ingest_parser.add_mutually_exclusive_group()
+    types_group.add_argument('--types', nargs='+', default=['movie'],
+                             help='Title types to keep')
+    types_group.add_argument('--all-types', action='store_true',
+                             help='Keep every title type')
+    ingest_parser.add_argument('--min-year', type=int)
+    ingest_parser.add_argument('--max-year', type=int)
+    ingest_parser.add_argument('--min-votes', type=int, default=0)
+    ingest_parser.add_argument('--batch-size', type=int, default=10000)
+    ingest_parser.add_argument('--workers', type=int,
+                               help='Processes parsing title.basics')
+
+
+def build_command_parser() -> argparse.ArgumentParser:
+    """
+    Build the parser for one batch command line.
+    :return: parser (argparse.ArgumentParser)
+    """
+    parser = argparse.ArgumentParser(prog='batch', add_help=False)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    add_command_parsers(subparsers)
+    return parser
+
+
+class BatchRunner:
+    """
+    Runs batch commands on a single IStorage object.
+    The movies are parsed once and reused
+    until a command changes them.
+    """
+
+    def __init__(self, storage: IStorage, duplicates_index_path: str = None):
+        self._storage = storage
+        self._movies = None
+        self._countries = CountryIndexCache(storage)
+        # app of the add command, created by the first add
+        self._app = None
+        self._duplicates_index_path = duplicates_index_path
+        # built once, every line is parsed with it
+        self._parser = build_command_parser()
+
+    def close(self):
+        """
+        Save the duplicate titles index of the add command.
+        """
+        if self._app is not None:
+            self._app.close()
+
+    def _movie_app(self):
+        """
+        Get the app of the add command.
+        :return: app (MovieApp)
+        """
+        if self._app is None:
+            from movie_app import MovieApp
+            self._app = MovieApp(self._storage,
+                                 duplicates_index_path=self._duplicates_index_path)
+        return self._app
+
+    def _list_movies(self) -> dict:
+        """
+        Get the movies, parsing the file only
+        if it was not parsed since the last change.
+        :return: movies (dict)
+        """
+        if self._movies is None:
+            self._movies = self._storage.list_movies()
+        return self._movies
+
+    def _analytics(self):
+        """
+        Get the movies analytics.
+        :return: analytics (MovieAnalytics)
+        """
+        from movies_analytics import MovieAnalytics
+        return MovieAnalytics(self._list_movies())
+
+    def _mutate(self, func, *args) -> str:
+        """
+        Run a storage command that changes the movies.
+        :param func: storage command
+        :return: plain message (str)
+        """
+        self._movies = None
+        return strip_colors(func(*args))
+
+    def _command_list(self, _args) -> dict:
+        """
+        List all the movies.
+        :return: movies count and movies (dict)
+        """
+        movies = self._list_movies()
+        return {'count': len(movies), 'movies': movies}
+
+    def _command_add(self, args) -> dict:
+        """
+        Add a movie, fetched from OMDb unless the rating is given.
+        :return: add message (dict)
+        """
+        if args.rating is None:
+            confirm = (lambda _warning: True) if args.force else None
+            return {'message': self._mutate(self._movie_app().add_movie,
+                                            args.title, confirm)}
+        if not args.force:
+            duplicates = self._movie_app().likely_duplicates(args.title, args.year)
+            if duplicates:
+                return {'message': strip_colors(duplicate_warning(args.title, duplicates)),
+                        'duplicates': [title for title, _ in duplicates]}
+        return {'message': self._mutate(self._storage.add_movie,
+                                        args.title, args.rating, args.year,
+                                        args.poster, args.website, args.country)}
+
+    def _command_delete(self, args) -> dict:
+        """
+        Delete a movie based on title.
+        :return: delete message (dict)
+        """
+        return {'message': self._mutate(self._storage.delete_movie, args.title)}
+
+    def _command_update(self, args) -> dict:
+        """
+        Update a movie's notes based on title.
+        :return: update message (dict)
+        """
+        return {'message': self._mutate(self._storage.update_movie,
+                                        args.title, args.notes)}
+
+    def _command_stats(self, args) -> dict:
+        """
+        Get movie statistics,
+        streamed from the storage with --streaming.
+        :return: movie statistics (dict)
+        """
+        if args.streaming:
+            from streaming_stats import StreamingStats
+            return StreamingStats().update(self._storage.iter_movies()).get_stats()
+        return self._analytics().get_stats()
+
+    def _command_sort(self, args) -> dict:
+        """
+        Sort movies by rating, highest to the lowest rating.
+        :return: sorted movies (dict)
+        """
+        movies = self._analytics().sort_movies_by_rating_desc_tuple()
+        if args.limit is not None:
+            movies = movies[:args.limit]
+        return {'movies': [{'title': title,
+                            'rating': info['rating'],
+                            'year': info['year']}
+                           for title, info in movies]}
+
+    def _command_search(self, args) -> dict:
+        """
+        Search the movies by name.
+        :return: exact match and recommended matches (dict)
+        """
+        result = self._analytics().search(args.name)
+        return {'exact': result['exact'],
+                'matches': [{'title': title, 'score': score}
+                            for title, score in result['matches']]}
+
+    def _command_histogram(self, args) -> dict:
+        """
+        Create a rating histogram .png file.
+        :return: histogram creation message (dict)
+        """
+        # the analytics would prompt for another name, there is no user to answer
+        if not args.file_name.endswith('.png'):
+            raise ValueError("File name must end with '.png'.")
+        return {'message': strip_colors(
+            self._analytics().create_rating_histogram(args.file_name)).strip()}
+
+    def _command_generate(self, _args) -> dict:
+        """
+        Generate the movies website.
+        :return: website generation message (dict)
+        """
+        from movies_website_generation import WebsiteGeneration
+        website = WebsiteGeneration(
+            self._analytics().sort_movies_by_rating_desc_tuple())
+        return {'message': website.generate_website()}
+
+    def _command_countries(self, args) -> dict:
+        """
+        Get the movies from all the --all countries
+        and from at least one --any country.
+        :return: matching titles (dict)
+        """
+        index = self._countries.get()
+        titles = index.titles(index.select(args.all, args.any))
+        return {'count': len(titles), 'titles': titles}
+
+    def _command_dedup(self, args) -> dict:
+        """
+        Get the clusters of near-duplicate titles,
+        merging every cluster into one movie with --merge.
+        :return: clusters, and the merged titles with --merge (dict)
+        """
+        clusters = find_duplicates(self._storage, threshold=args.threshold,
+                                   max_year_gap=args.max_year_gap)
+        result = {'count': len(clusters), 'clusters': clusters}
+        if args.merge:
+            self._movies = None
+            result.update(merge_duplicates(self._storage, clusters))
+        return result
+
+    def _command_refresh(self, args) -> dict:
+        """
+        Refresh the movies metadata from OMDb.
+        :return: refresh summary (dict)
+        """
+        from metadata_refresh import MetadataRefreshJob
+        self._movies = None
+        job = MetadataRefreshJob(self._storage,
+                                 max_workers=args.workers,
+                                 cache_path=args.cache,
+                                 checkpoint_path=args.checkpoint)
+        return job.run()
+
+    def _command_ingest(self, args) -> dict:
+        """
+        Add the movies of IMDb dataset dumps.
+        :return: ingest summary (dict)
+        """
+        from imdb_ingest import ingest
+        self._movies = None
+        return ingest(self._storage, args.basics, args.ratings,
+                      title_types=None if args.all_types else args.types,
+                      min_year=args.min_year,
+                      max_year=args.max_year,
+                      min_votes=args.min_votes,
+                      batch_size=args.batch_size,
+                      max_workers=args.workers,
+                      progress=sys.stderr)
+
+    def run(self, args: argparse.Namespace) -> dict:
+        """
+        Run one parsed command.
+        :param args: parsed command (argparse.Namespace)
+        :return: command result (dict)
+        """
+        command = getattr(self, f'_command_{args.command}')
+        try:
+            with instrumentation.command(args.command):
+                return {'command': args.command, **command(args)}
+        except (TypeError, ValueError, FileNotFoundError) as err:
+            return {'command': args.command, 'error': str(err)}
+
+    def run_line(self, line: str) -> dict:
+        """
+        Parse and run one command line.
+        :param line: str
+        :return: command result (dict)
+        """
+        try:
+            args = self._parser.parse_args(shlex.split(line))
+        except SystemExit:
+            return {'line': line, 'error': 'Invalid command.'}
+        except ValueError as err:
+            return {'line': line, 'error': str(err)}
+        return self.run(args)
+
+    def run_batch(self, lines, output):
+        """
+        Run a batch of command lines,
+        writing one JSON result per line.
+        Blank lines and lines starting with '#' are skipped.
+        :param lines: iterable of command lines
+        :param output: text stream
+        """
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            output.write(json.dumps(self.run_line(line)) + '\n')
+            output.flush()
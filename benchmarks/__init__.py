@@ -0,0 +1,6 @@
+"""
+Benchmarks for the movie app.
+
+Run from the repository root, e.g.:
+python3 -m benchmarks.bench_suite --sizes 1000 100000 --output results.json
+"""
@@ -0,0 +1,73 @@
+"""
+File size versus load time of the JSON and CSV storages
+per compression codec.
+
+Run from the repository root:
+python3 -m benchmarks.bench_codecs --sizes 1000 100000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+from benchmarks.common import measure, progress, result, write_results
+from benchmarks.synthetic import generate_movies, write_csv_catalog, write_json_catalog
+from file_codecs import open_file
+from storage_csv import StorageCsv
+from storage_json import StorageJson
+
+BACKENDS = {'json': (StorageJson, write_json_catalog),
+            'csv': (StorageCsv, write_csv_catalog)}
+
+SUFFIXES = ('', '.gz', '.bz2', '.xz')
+
+
+def compress_file(file_path: str, suffix: str) -> str:
+    """
+    Write a compressed copy of a file, streaming.
+    :param file_path: str
+    :param suffix: compression extension (str)
+    :return: compressed file path (str)
+    """
+    if not suffix:
+        return file_path
+    with open(file_path, 'rb') as source, \
+            open_file(file_path + suffix, 'wb') as target:
+        shutil.copyfileobj(source, target)
+    return file_path + suffix
+
+
+def main():
+    """
+    Run the codecs benchmark and emit the JSON results.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000],
+                        help='Catalog sizes')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Repetitions per benchmark')
+    parser.add_argument('--output', help='JSON output file, stdout if omitted')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size in args.sizes:
+            movies = generate_movies(size)
+            for backend, (storage_class, write_catalog) in BACKENDS.items():
+                file_path = os.path.join(work_dir, f'movies-{size}.{backend}')
+                write_catalog(file_path, movies)
+
+                for suffix in SUFFIXES:
+                    progress(f'{backend}{suffix} {size}')
+                    compressed_path = compress_file(file_path, suffix)
+                    results.append(result(
+                        'codecs.list_movies',
+                        measure(storage_class(compressed_path).list_movies, args.repeat),
+                        backend=backend, codec=suffix.lstrip('.') or 'none', size=size,
+                        file_bytes=os.path.getsize(compressed_path)))
+
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
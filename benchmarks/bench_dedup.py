@@ -0,0 +1,117 @@
+"""
+Near-duplicate titles detection time against the catalog size:
+MinHash / LSH index build, saved index load, clusters of
+the whole catalog and the add path check.
+A share of the movies gets a near-duplicate title
+("The X", "X, The", "X (1999)", a typo) to measure the recall.
+
+Run from the repository root:
+python3 -m benchmarks.bench_dedup --sizes 100000 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+
+from benchmarks.common import measure, progress, result, write_results
+from benchmarks.synthetic import generate_movies, write_json_catalog
+from dedup import DuplicateIndex
+from storage_json import StorageJson
+
+
+def duplicate_title(title: str, year: int, rng: random.Random) -> str:
+    """
+    Get a near-duplicate of a title.
+    :param title: str
+    :param year: int
+    :param rng: random.Random
+    :return: str
+    """
+    variant = rng.randrange(4)
+    if variant == 0:
+        return f'The {title}'
+    if variant == 1:
+        return f'{title}, The'
+    if variant == 2:
+        return f'{title} ({year})'
+    # drop a letter of the words, keeping the number
+    words, number = title.rsplit(' ', 1)
+    position = rng.randrange(1, len(words))
+    return f'{words[:position]}{words[position + 1:]} {number}'
+
+
+def add_duplicates(movies: dict, share: float, seed: int) -> int:
+    """
+    Add near-duplicates of a share of the movies.
+    :param movies: dict
+    :param share: share of the movies duplicated (float)
+    :param seed: random seed (int)
+    :return: number of duplicated movies (int)
+    """
+    rng = random.Random(seed)
+    originals = rng.sample(list(movies), int(len(movies) * share))
+    for title in originals:
+        movies[duplicate_title(title, movies[title]['year'], rng)] = dict(movies[title])
+    return len(originals)
+
+
+def main():
+    """
+    Run the duplicates benchmark and emit the JSON results.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000],
+                        help='Catalog sizes')
+    parser.add_argument('--share', type=float, default=0.01,
+                        help='Share of the movies with a near-duplicate')
+    parser.add_argument('--queries', type=int, default=100,
+                        help='Add path checks per catalog')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Repetitions per benchmark')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='JSON output file, stdout if omitted')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in args.sizes:
+            progress(f'{size} movies')
+            movies = generate_movies(size, args.seed)
+            duplicated = add_duplicates(movies, args.share, args.seed)
+            file_path = os.path.join(temp_dir, f'movies-{size}.json')
+            write_json_catalog(file_path, movies)
+            storage = StorageJson(file_path)
+
+            index_path = f'{file_path}.dup-index'
+            index = DuplicateIndex(storage, index_path=index_path)
+            results.append(result('dedup.build', measure(index.build, args.repeat),
+                                  size=len(movies)))
+            index.save()
+
+            def load():
+                # a one-shot add command, loading the index saved by the previous one
+                loaded = DuplicateIndex(storage, index_path=index_path)
+                loaded.likely_duplicates('Unknown title')
+                loaded.close()
+
+            results.append(result('dedup.load', measure(load, args.repeat),
+                                  size=len(movies)))
+
+            clusters = []
+            timings = measure(lambda: clusters.append(index.clusters()), args.repeat)
+            results.append(result('dedup.clusters', timings, size=len(movies),
+                                  duplicated=duplicated, clusters=len(clusters[-1])))
+
+            titles = random.Random(args.seed).sample(list(movies), args.queries)
+            timings = measure(lambda: [index.likely_duplicates(title) for title in titles],
+                              args.repeat)
+            results.append(result('dedup.likely_duplicates',
+                                  [timing / len(titles) for timing in timings],
+                                  size=len(movies)))
+            index.close()
+
+    write_results(results, args.output, seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Fuzzy search throughput in queries/sec
+against the number of worker processes.
+
+Run from the repository root:
+python3 -m benchmarks.bench_fuzzy --size 100000 --queries 64 --workers 1 2 4 8
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import progress, result, write_results
+from benchmarks.synthetic import generate_movies
+from fuzzy_scoring import FuzzyScorer
+
+
+def main():
+    """
+    Run the fuzzy search benchmark and emit the JSON results.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=100000, help='Catalog size')
+    parser.add_argument('--queries', type=int, default=64,
+                        help='Queries per batch')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='Worker process counts')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Repetitions per benchmark')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='JSON output file, stdout if omitted')
+    args = parser.parse_args()
+
+    titles = list(generate_movies(args.size, args.seed))
+    queries = random.Random(args.seed).sample(titles, min(args.queries, len(titles)))
+    # misspell the queries, as a user would type them
+    queries = [query[:-2] + query[-1:] for query in queries]
+
+    results = []
+    for workers in args.workers:
+        progress(f'{workers} workers')
+        with FuzzyScorer(titles, max_workers=workers, min_parallel=0) as scorer:
+            scorer.score(queries[0])  # start the worker processes
+
+            for benchmark, run in (('fuzzy.score', lambda: [scorer.score(query)
+                                                            for query in queries]),
+                                   ('fuzzy.score_many', lambda: scorer.score_many(queries))):
+                timings = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    run()
+                    timings.append(time.perf_counter() - start)
+                entry = result(benchmark, timings, size=args.size,
+                               queries=len(queries), workers=workers)
+                entry['queries_per_sec'] = len(queries) / entry['min']
+                results.append(entry)
+
+    write_results(results, args.output, seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
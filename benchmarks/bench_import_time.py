@@ -0,0 +1,118 @@
+"""
+Import time and time-to-first-menu benchmark of main.py.
+
+Uses `python -X importtime` to report the cumulative import time
+of main and of the json/csv parsers, and whether the heavy
+dependencies (requests, matplotlib, fuzzywuzzy) were imported at startup.
+
+Run from the repository root:
+python3 -m benchmarks.bench_import_time --repeat 5 --output import_time.json
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import result, write_results
+
+HEAVY_MODULES = ('requests', 'matplotlib', 'fuzzywuzzy')
+BASELINE_MODULES = ('json', 'csv')
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Parse the `-X importtime` output.
+    :param stderr: str
+    :return: cumulative import microseconds per module (dict)
+    """
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        try:
+            microseconds = int(fields[1])
+        except ValueError:  # header line
+            continue
+        cumulative[fields[2].strip()] = microseconds
+    return cumulative
+
+
+def import_main() -> dict:
+    """
+    Import main in a fresh interpreter.
+    :return: cumulative import microseconds per module (dict)
+    """
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                               capture_output=True, text=True, check=True)
+    return parse_importtime(completed.stderr)
+
+
+def time_to_first_menu(file_name: str) -> float:
+    """
+    Start the interactive app, show the menu and exit.
+    :param file_name: movies file name in _static (str)
+    :return: elapsed seconds (float)
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, 'main.py', file_name],
+                   input='0\n', capture_output=True, text=True, check=True)
+    return time.perf_counter() - start
+
+
+def time_baseline_interpreter() -> float:
+    """
+    Start an interpreter importing only the json and csv parsers.
+    :return: elapsed seconds (float)
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'import json, csv'],
+                   capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    """
+    Run the import time benchmark and emit the JSON results.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Repetitions per benchmark')
+    parser.add_argument('--file', default='movies.json',
+                        help='Movies file name in _static')
+    parser.add_argument('--output', help='JSON output file, stdout if omitted')
+    args = parser.parse_args()
+
+    imports = [import_main() for _ in range(args.repeat)]
+
+    results = [result('import.main', [run.get('main', 0) / 1e6 for run in imports])]
+    for module in BASELINE_MODULES:
+        results.append(result(f'import.{module}',
+                              [run.get(module, 0) / 1e6 for run in imports]))
+
+    results.append(result('startup.baseline_interpreter',
+                          [time_baseline_interpreter() for _ in range(args.repeat)]))
+
+    suffix = os.path.splitext(args.file)[1]
+    with tempfile.NamedTemporaryFile('w', dir='_static', suffix=suffix,
+                                     delete=False) as file:
+        with open(os.path.join('_static', args.file), 'r', encoding='utf8') as source:
+            file.write(source.read())
+    try:
+        file_name = os.path.basename(file.name)
+        results.append(result('startup.time_to_first_menu',
+                              [time_to_first_menu(file_name)
+                               for _ in range(args.repeat)]))
+    finally:
+        os.remove(file.name)
+
+    heavy_imported = sorted({module for run in imports for module in run
+                             if module.split('.')[0] in HEAVY_MODULES})
+
+    write_results(results, args.output, heavy_modules_imported=heavy_imported)
+
+
+if __name__ == '__main__':
+    main()
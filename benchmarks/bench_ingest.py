@@ -0,0 +1,58 @@
+"""
+IMDb dumps ingest throughput in rows/sec
+against the number of worker processes.
+
+Run from the repository root:
+python3 -m benchmarks.bench_ingest --size 1000000 --workers 1 2 4
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks.common import measure, progress, result, write_results
+from benchmarks.synthetic import write_imdb_dumps
+from imdb_ingest import ingest
+from storage_ndjson import StorageNdjson
+
+
+def main():
+    """
+    Run the ingest benchmark and emit the JSON results.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=1000000,
+                        help='Number of title.basics rows')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4],
+                        help='Worker process counts')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Repetitions per benchmark')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='JSON output file, stdout if omitted')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        basics_path = os.path.join(work_dir, 'title.basics.tsv.gz')
+        ratings_path = os.path.join(work_dir, 'title.ratings.tsv.gz')
+        target_path = os.path.join(work_dir, 'movies.ndjson')
+        progress(f'writing {args.size} rows')
+        write_imdb_dumps(basics_path, ratings_path, args.size, args.seed)
+
+        def clear_target():
+            with open(target_path, 'w', encoding='utf8'):
+                pass
+
+        for workers in args.workers:
+            progress(f'{workers} workers')
+            timings = measure(
+                lambda: ingest(StorageNdjson(target_path), basics_path, ratings_path,
+                               max_workers=workers),
+                args.repeat, setup=clear_target)
+            results.append(result('ingest.imdb', timings, workers=workers, size=args.size,
+                                  rows_per_second=round(args.size / min(timings))))
+
+    write_results(results, args.output, seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Cold versus warm load times of the JSON and CSV storages
+with the parsed files cache.
+
+cold: list_movies without a cache,
+first: list_movies parsing and writing the cache,
+warm: list_movies from the cache of the unchanged file.
+
+Run from the repository root:
+python3 -m benchmarks.bench_parse_cache --sizes 1000 100000 1000000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+from benchmarks.common import measure, progress, result, write_results
+from benchmarks.synthetic import generate_movies, write_csv_catalog, write_json_catalog
+from storage_csv import StorageCsv
+from storage_json import StorageJson
+
+BACKENDS = {'json': (StorageJson, write_json_catalog),
+            'csv': (StorageCsv, write_csv_catalog)}
+
+
+def clear_cache(cache_dir: str):
+    """
+    Empty the cache directory.
+    :param cache_dir: str
+    """
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.makedirs(cache_dir)
+
+
+def main():
+    """
+    Run the parse cache benchmark and emit the JSON results.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000],
+                        help='Catalog sizes')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Repetitions per benchmark')
+    parser.add_argument('--output', help='JSON output file, stdout if omitted')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        cache_dir = os.path.join(work_dir, 'cache')
+
+        for size in args.sizes:
+            movies = generate_movies(size)
+            for backend, (storage_class, write_catalog) in BACKENDS.items():
+                progress(f'{backend} {size}')
+                file_path = os.path.join(work_dir, f'movies.{backend}')
+                write_catalog(file_path, movies)
+                # an old file, trusted by its size and modification time
+                os.utime(file_path, ns=(0, 0))
+
+                params = {'backend': backend, 'size': size}
+                results.append(result(
+                    'parse_cache.cold',
+                    measure(storage_class(file_path).list_movies, args.repeat),
+                    **params))
+
+                cached = storage_class(file_path, cache_dir=cache_dir)
+                results.append(result(
+                    'parse_cache.first',
+                    measure(cached.list_movies, args.repeat,
+                            setup=lambda: clear_cache(cache_dir)),
+                    **params))
+                results.append(result(
+                    'parse_cache.warm',
+                    measure(cached.list_movies, args.repeat), **params))
+
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
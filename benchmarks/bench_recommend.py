@@ -0,0 +1,60 @@
+"""
+Similar movies latency against the catalog size:
+feature matrix build time, nearest movies query time and
+the menu command time, formatting the results from the features.
+
+Run from the repository root:
+python3 -m benchmarks.bench_recommend --sizes 100000 1000000
+"""
+import argparse
+import random
+
+from benchmarks.common import measure, progress, result, write_results
+from benchmarks.synthetic import generate_movies
+from movie_features import MovieFeatures, format_similar_movies
+
+
+def main():
+    """
+    Run the recommendations benchmark and emit the JSON results.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000],
+                        help='Catalog sizes')
+    parser.add_argument('--queries', type=int, default=20,
+                        help='Queries per catalog')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Repetitions per benchmark')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='JSON output file, stdout if omitted')
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        movies = generate_movies(size, args.seed)
+        for use_notes in (False, True):
+            progress(f'{size} movies, notes: {use_notes}')
+            features = []
+            results.append(result(
+                'recommend.build',
+                measure(lambda: features.append(
+                    MovieFeatures.from_movies(movies, use_notes=use_notes)), args.repeat),
+                size=size, use_notes=use_notes))
+
+            titles = random.Random(args.seed).sample(list(movies), args.queries)
+            timings = measure(lambda: [features[-1].similar(title, 10) for title in titles],
+                              args.repeat)
+            results.append(result('recommend.query',
+                                  [timing / len(titles) for timing in timings],
+                                  size=size, use_notes=use_notes, k=10))
+            timings = measure(lambda: [format_similar_movies(features[-1], title, 10)
+                                       for title in titles], args.repeat)
+            results.append(result('recommend.command',
+                                  [timing / len(titles) for timing in timings],
+                                  size=size, use_notes=use_notes, k=10))
+
+    write_results(results, args.output, seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Concurrent read benchmark of the storages
+with and without the SnapshotManager, at 1, 8 and 32 reader threads.
+
+Run from the repository root:
+python3 -m benchmarks.bench_snapshot --size 100000 --threads 1 8 32
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import progress, result, write_results
+from benchmarks.synthetic import generate_movies, write_csv_catalog, write_json_catalog
+from snapshot import SnapshotManager
+from storage_csv import StorageCsv
+from storage_json import StorageJson
+
+BACKENDS = {'json': (StorageJson, write_json_catalog),
+            'csv': (StorageCsv, write_csv_catalog)}
+
+
+def concurrent_reads(read, threads: int, reads: int) -> float:
+    """
+    Run reads spread over a thread pool.
+    :param read: callable reading the movies
+    :param threads: number of reader threads (int)
+    :param reads: total number of reads (int)
+    :return: elapsed seconds (float)
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for _ in executor.map(lambda _: read(), range(reads)):
+            pass
+    return time.perf_counter() - start
+
+
+def main():
+    """
+    Run the snapshot benchmark and emit the JSON results.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=100000, help='Catalog size')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32],
+                        help='Reader thread counts')
+    parser.add_argument('--reads', type=int, default=64,
+                        help='Total reads per run')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Repetitions per benchmark')
+    parser.add_argument('--output', help='JSON output file, stdout if omitted')
+    args = parser.parse_args()
+
+    movies = generate_movies(args.size)
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for backend, (storage_class, write_catalog) in BACKENDS.items():
+            file_path = os.path.join(work_dir, f'movies.{backend}')
+            write_catalog(file_path, movies)
+            storage = storage_class(file_path)
+
+            for threads in args.threads:
+                progress(f'{backend} {threads} threads')
+                params = {'backend': backend, 'size': args.size,
+                          'threads': threads, 'reads': args.reads}
+                results.append(result(
+                    'snapshot.list_movies',
+                    [concurrent_reads(storage.list_movies, threads, args.reads)
+                     for _ in range(args.repeat)], **params))
+
+                timings = []
+                for _ in range(args.repeat):
+                    # a fresh manager, so the first parse is included
+                    manager = SnapshotManager(storage)
+                    timings.append(concurrent_reads(manager.get_snapshot,
+                                                    threads, args.reads))
+                results.append(result('snapshot.get_snapshot', timings, **params))
+
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
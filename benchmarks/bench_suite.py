@@ -0,0 +1,159 @@
+"""
+Benchmark suite covering storage, analytics and website generation
+on synthetic catalogs.
+
+Run from the repository root:
+python3 -m benchmarks.bench_suite --sizes 1000 100000 1000000 --output results.json
+
+Compare two runs:
+python3 -m benchmarks.compare baseline.json results.json
+"""
+import argparse
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from benchmarks.common import measure, progress, result, write_results
+from benchmarks.synthetic import generate_countries, generate_movies, \
+    write_csv_catalog, write_json_catalog
+from storage_csv import StorageCsv
+from storage_json import StorageJson
+
+BACKENDS = {'json': (StorageJson, write_json_catalog),
+            'csv': (StorageCsv, write_csv_catalog)}
+
+
+def bench_storage(backend: str, size: int, movies: dict,
+                  work_dir: str, repeat: int) -> list:
+    """
+    Benchmark the 4 CRUD commands of a storage backend.
+    :param backend: 'json' or 'csv' (str)
+    :param size: catalog size (int)
+    :param movies: synthetic catalog (dict)
+    :param work_dir: temporary directory (str)
+    :param repeat: repetitions per benchmark (int)
+    :return: result entries (list)
+    """
+    storage_class, write_catalog = BACKENDS[backend]
+    file_path = os.path.join(work_dir, f'movies_{size}.{backend}')
+    write_catalog(file_path, movies)
+    storage = storage_class(file_path)
+    params = {'backend': backend, 'size': size}
+
+    results = [result('storage.list_movies',
+                      measure(storage.list_movies, repeat), **params)]
+
+    title = 'Benchmark Added Movie'
+    add_timings, update_timings, delete_timings = [], [], []
+    for _ in range(repeat):
+        add_timings += measure(lambda: storage.add_movie(
+            title, 7.5, 2020, 'poster', 'https://example.com', 'France'), 1)
+        update_timings += measure(lambda: storage.update_movie(
+            title, 'benchmark notes'), 1)
+        delete_timings += measure(lambda: storage.delete_movie(title), 1)
+
+    results.append(result('storage.add_movie', add_timings, **params))
+    results.append(result('storage.update_movie', update_timings, **params))
+    results.append(result('storage.delete_movie', delete_timings, **params))
+    return results
+
+
+def bench_analytics(size: int, movies: dict, repeat: int) -> list:
+    """
+    Benchmark the MovieAnalytics stats, sort and fuzzy search.
+    :param size: catalog size (int)
+    :param movies: synthetic catalog (dict)
+    :param repeat: repetitions per benchmark (int)
+    :return: result entries (list)
+    """
+    from movies_analytics import MovieAnalytics
+
+    analytics = MovieAnalytics(movies)
+    params = {'size': size}
+
+    results = [
+        result('analytics.get_movie_stats',
+               measure(analytics.get_movie_stats, repeat), **params),
+        result('analytics.sort_movies_by_rating_desc',
+               measure(analytics.sort_movies_by_rating_desc, repeat), **params)]
+
+    results.append(result('analytics.fuzzy_search',
+                          measure(lambda: analytics.fuzzy_search('Drem Storm'),
+                                  repeat), **params))
+    return results
+
+
+def bench_website(size: int, movies: dict, work_dir: str, repeat: int) -> list:
+    """
+    Benchmark the website generation with the country API stubbed.
+    :param size: catalog size (int)
+    :param movies: synthetic catalog (dict)
+    :param work_dir: temporary directory (str)
+    :param repeat: repetitions per benchmark (int)
+    :return: result entries (list)
+    """
+    import country
+    from movies_website_generation import WebsiteGeneration
+
+    # stub the countries API call
+    country.get_countries = generate_countries
+    country.load_flags.cache_clear()
+
+    template_path = os.path.join(work_dir, 'index_template.html')
+    shutil.copy(WebsiteGeneration._TEMPLATE_FILE_PATH, template_path)
+
+    sorted_movies = sorted(movies.items(),
+                           key=lambda x: x[1]['rating'], reverse=True)
+    website = WebsiteGeneration(sorted_movies)
+
+    with mock.patch.object(WebsiteGeneration, '_TEMPLATE_FILE_PATH', template_path), \
+            mock.patch.object(WebsiteGeneration, '_HTML_FILE_PATH',
+                              os.path.join(work_dir, 'index.html')):
+        timings = measure(website.generate_website, repeat)
+
+    return [result('website.generate_website', timings, size=size)]
+
+
+def main():
+    """
+    Run the benchmark suite and emit the JSON results.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 100000, 1000000],
+                        help='Catalog sizes')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Repetitions per benchmark')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Synthetic catalog seed')
+    parser.add_argument('--only', nargs='+',
+                        choices=['storage', 'analytics', 'website'],
+                        default=['storage', 'analytics', 'website'],
+                        help='Benchmark groups to run')
+    parser.add_argument('--output', help='JSON output file, stdout if omitted')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size in args.sizes:
+            progress(f'Generating {size} movies')
+            movies = generate_movies(size, args.seed)
+
+            if 'storage' in args.only:
+                for backend in BACKENDS:
+                    progress(f'storage {backend} {size}')
+                    results += bench_storage(backend, size, movies,
+                                             work_dir, args.repeat)
+            if 'analytics' in args.only:
+                progress(f'analytics {size}')
+                results += bench_analytics(size, movies, args.repeat)
+            if 'website' in args.only:
+                progress(f'website {size}')
+                results += bench_website(size, movies, work_dir, args.repeat)
+
+    write_results(results, args.output, seed=args.seed, repeat=args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Shared helpers for timing benchmarks
+and emitting machine-readable results.
+"""
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+
+def measure(func, repeat: int = 3, setup=None) -> list:
+    """
+    Time a function call several times.
+    :param func: callable timed on every repetition
+    :param repeat: number of repetitions (int)
+    :param setup: callable run untimed before every repetition
+    :return: elapsed seconds per repetition (list)
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def result(benchmark: str, timings: list, **params) -> dict:
+    """
+    Build one result entry.
+    :param benchmark: benchmark name (str)
+    :param timings: elapsed seconds per repetition (list)
+    :param params: benchmark parameters, e.g. backend and size
+    :return: result entry (dict)
+    """
+    return {'benchmark': benchmark,
+            **params,
+            'seconds': timings,
+            'min': min(timings),
+            'median': statistics.median(timings)}
+
+
+def write_results(results: list, output: str = None, **meta):
+    """
+    Emit the results as JSON to a file or stdout.
+    :param results: result entries (list)
+    :param output: output file path, stdout if None (str | None)
+    :param meta: extra metadata, e.g. the seed
+    """
+    document = {'meta': {'python': sys.version.split()[0],
+                         'platform': platform.platform(),
+                         'timestamp': datetime.now(timezone.utc).isoformat(),
+                         **meta},
+                'results': results}
+
+    if output:
+        with open(output, 'w', encoding='utf8') as file:
+            json.dump(document, file, indent=2)
+    else:
+        print(json.dumps(document, indent=2))
+
+
+def progress(message: str):
+    """
+    Report benchmark progress on stderr,
+    keeping stdout for the JSON results.
+    :param message: str
+    """
+    print(message, file=sys.stderr, flush=True)
@@ -0,0 +1,79 @@
+"""
+Compare two benchmark JSON result files
+and report regressions.
+
+python3 -m benchmarks.compare baseline.json results.json --threshold 0.1
+"""
+import argparse
+import json
+import sys
+
+PARAM_KEYS = ('seconds', 'min', 'median')
+
+
+def _key(entry: dict) -> tuple:
+    """
+    Identify a result entry by benchmark name and parameters.
+    :param entry: dict
+    :return: key (tuple)
+    """
+    return tuple(sorted((name, str(value)) for name, value in entry.items()
+                        if name not in PARAM_KEYS))
+
+
+def load_results(file_path: str) -> dict:
+    """
+    Load a benchmark JSON result file.
+    :param file_path: str
+    :return: result entries by key (dict)
+    """
+    with open(file_path, 'r', encoding='utf8') as file:
+        return {_key(entry): entry for entry in json.load(file)['results']}
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """
+    Compare the min timings of matching entries.
+    :param baseline: result entries by key (dict)
+    :param current: result entries by key (dict)
+    :param threshold: relative slowdown reported as regression (float)
+    :return: rows of (key, baseline min, current min, ratio, regressed) (list)
+    """
+    rows = []
+    for key, entry in current.items():
+        if key not in baseline:
+            continue
+        before = baseline[key]['min']
+        after = entry['min']
+        ratio = after / before if before else float('inf')
+        rows.append((key, before, after, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main():
+    """
+    Print the comparison and exit with status 1 on regression.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('baseline', help='Baseline JSON results')
+    parser.add_argument('current', help='Current JSON results')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Relative slowdown reported as regression')
+    args = parser.parse_args()
+
+    rows = compare(load_results(args.baseline),
+                   load_results(args.current),
+                   args.threshold)
+
+    regressed = False
+    for key, before, after, ratio, is_regression in rows:
+        name = ' '.join(f'{param}={value}' for param, value in key)
+        flag = 'REGRESSION' if is_regression else ''
+        print(f'{name:<70}{before:>12.6f}{after:>12.6f}{ratio:>8.2f}x {flag}')
+        regressed = regressed or is_regression
+
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == '__main__':
+    main()
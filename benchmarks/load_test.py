@@ -0,0 +1,157 @@
+"""
+Load test of the movies HTTP service.
+Every client thread keeps one connection alive
+and reports requests/sec and latency percentiles as JSON.
+
+Against a running service:
+python3 -m benchmarks.load_test --url http://127.0.0.1:8000 --clients 8 --duration 10
+
+Against a service started in process on a synthetic catalog:
+python3 -m benchmarks.load_test --size 100000 --clients 8 --duration 10
+"""
+import argparse
+import http.client
+import os
+import statistics
+import tempfile
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+from benchmarks.common import progress, write_results
+from benchmarks.synthetic import generate_movies, write_json_catalog
+
+DEFAULT_PATHS = ['/stats', '/top?k=10', '/movies/{title}', '/search?q=Dark%20Storm']
+
+
+def percentile(latencies: list, fraction: float) -> float:
+    """
+    Get a percentile of sorted latencies.
+    :param latencies: sorted latencies (list)
+    :param fraction: e.g. 0.99 (float)
+    :return: latency (float)
+    """
+    if not latencies:
+        return 0.0
+    return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+
+def run_client(host: str, port: int, paths: list,
+               deadline: float, latencies: list, errors: list):
+    """
+    Send requests on one keep-alive connection until the deadline.
+    :param host: str
+    :param port: int
+    :param paths: request paths, sent round robin (list)
+    :param deadline: perf_counter deadline (float)
+    :param latencies: list collecting the latencies
+    :param errors: list collecting the failed status codes and exceptions
+    """
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    index = 0
+    while time.perf_counter() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError) as err:
+            errors.append(type(err).__name__)
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+        if response.status >= 400:
+            errors.append(response.status)
+    connection.close()
+
+
+def load_test(url: str, paths: list, clients: int, duration: float) -> dict:
+    """
+    Run the client threads and aggregate their latencies.
+    :param url: service base url (str)
+    :param paths: request paths (list)
+    :param clients: number of concurrent connections (int)
+    :param duration: seconds (float)
+    :return: load test result (dict)
+    """
+    address = urlsplit(url)
+    deadline = time.perf_counter() + duration
+    per_client = [[] for _ in range(clients)]
+    errors = []
+    threads = [threading.Thread(target=run_client,
+                                args=(address.hostname, address.port, paths,
+                                      deadline, latencies, errors))
+               for latencies in per_client]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for client in per_client for latency in client)
+    return {'benchmark': 'http.load_test',
+            'clients': clients,
+            'requests': len(latencies),
+            'errors': len(errors),
+            'seconds': elapsed,
+            'requests_per_second': len(latencies) / elapsed,
+            'latency_mean': statistics.fmean(latencies) if latencies else 0.0,
+            'latency_p50': percentile(latencies, 0.50),
+            'latency_p99': percentile(latencies, 0.99)}
+
+
+def main():
+    """
+    Run the load test and emit the JSON results.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', help='Service url, started in process if omitted')
+    parser.add_argument('--size', type=int, default=10000,
+                        help='Synthetic catalog size when started in process')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32],
+                        help='Concurrent keep-alive connections')
+    parser.add_argument('--duration', type=float, default=5.0,
+                        help='Seconds per run')
+    parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS,
+                        help="Request paths, '{title}' is a catalog title")
+    parser.add_argument('--output', help='JSON output file, stdout if omitted')
+    args = parser.parse_args()
+
+    server = None
+    with tempfile.TemporaryDirectory() as work_dir:
+        url = args.url
+        title = 'Titanic'
+        if url is None:
+            from http_service import create_server
+            from storage_json import StorageJson
+
+            movies = generate_movies(args.size)
+            title = next(iter(movies))
+            file_path = os.path.join(work_dir, 'movies.json')
+            write_json_catalog(file_path, movies)
+            server = create_server(StorageJson(file_path), port=0)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = f'http://127.0.0.1:{server.server_address[1]}'
+
+        paths = [path.replace('{title}', quote(title)) for path in args.paths]
+        results = []
+        try:
+            for clients in args.clients:
+                progress(f'load test {clients} clients')
+                results.append(load_test(url, paths, clients, args.duration))
+        finally:
+            if server:
+                server.shutdown()
+                server.server_close()
+
+    write_results(results, args.output, url=args.url, size=args.size,
+                  paths=args.paths)
+
+
+if __name__ == '__main__':
+    main()
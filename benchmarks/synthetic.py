@@ -0,0 +1,101 @@
+"""
+Reproducible synthetic movie catalogs for benchmarks.
+"""
+import csv
+import json
+import random
+
+from file_codecs import open_file
+
+WORDS = ['Star', 'Night', 'Return', 'Dark', 'Love', 'City', 'Last', 'King',
+         'Dream', 'Storm', 'Shadow', 'River', 'Ghost', 'Empire', 'Summer',
+         'Winter', 'Secret', 'Lost', 'Wild', 'Golden']
+
+COUNTRIES = ['United States', 'United Kingdom', 'France', 'Germany', 'Japan',
+             'Canada', 'Italy', 'Spain', 'India', 'Mexico', 'South Korea',
+             'Australia', 'Brazil', 'China', 'Sweden', 'Denmark']
+
+
+def generate_movies(size: int, seed: int = 42) -> dict:
+    """
+    Generate a synthetic catalog of movies
+    in the same shape as list_movies() returns.
+    :param size: number of movies (int)
+    :param seed: random seed (int)
+    :return: movies (dict)
+    """
+    rng = random.Random(seed)
+    movies = {}
+    for i in range(size):
+        title = f'{rng.choice(WORDS)} {rng.choice(WORDS)} {i}'
+        movies[title] = {'rating': round(rng.uniform(1, 10), 1),
+                         'year': rng.randint(1920, 2024),
+                         'notes': rng.choice(['', '', '', 'Watch again']),
+                         'poster': f'https://example.com/posters/{i}.jpg',
+                         'website': f'https://www.imdb.com/title/tt{i:07d}',
+                         'country': ', '.join(rng.sample(COUNTRIES,
+                                                         rng.randint(1, 3)))}
+    return movies
+
+
+def write_json_catalog(file_path: str, movies: dict):
+    """
+    Write a catalog in the StorageJson format.
+    :param file_path: str
+    :param movies: dict
+    """
+    with open(file_path, 'w', encoding='utf8') as file:
+        json.dump(movies, file)
+
+
+def write_csv_catalog(file_path: str, movies: dict):
+    """
+    Write a catalog in the StorageCsv format.
+    :param file_path: str
+    :param movies: dict
+    """
+    with open(file_path, 'w', newline='', encoding='utf8') as file:
+        writer = csv.writer(file, lineterminator='\n')
+        writer.writerow(['title', 'rating', 'year', 'notes',
+                         'poster', 'website', 'country'])
+        for title, info in movies.items():
+            writer.writerow([title, info['rating'], info['year'], info['notes'],
+                             info['poster'], info['website'], info['country']])
+
+
+def generate_countries() -> list:
+    """
+    Generate a country list in the Geography API format,
+    used to stub the network call of the website generation.
+    :return: countries (list)
+    """
+    return [{'name': {'common': name, 'official': name},
+             'flags': {'png': f'https://flagcdn.com/w320/{name[:2].lower()}.png',
+                       'svg': f'https://flagcdn.com/{name[:2].lower()}.svg'}}
+            for name in COUNTRIES]
+
+
+def write_imdb_dumps(basics_path: str, ratings_path: str, size: int, seed: int = 42):
+    """
+    Write IMDb style title.basics and title.ratings TSV dumps,
+    sorted by title id, gzip compressed if the paths end with .gz.
+    :param basics_path: str
+    :param ratings_path: str
+    :param size: number of titles (int)
+    :param seed: random seed (int)
+    """
+    rng = random.Random(seed)
+    title_types = ['movie', 'movie', 'short', 'tvSeries', 'tvEpisode']
+    with open_file(basics_path, 'w', encoding='utf8') as basics, \
+            open_file(ratings_path, 'w', encoding='utf8') as ratings:
+        basics.write('tconst\ttitleType\tprimaryTitle\toriginalTitle\tisAdult\t'
+                     'startYear\tendYear\truntimeMinutes\tgenres\n')
+        ratings.write('tconst\taverageRating\tnumVotes\n')
+        for i in range(1, size + 1):
+            title = f'{rng.choice(WORDS)} {rng.choice(WORDS)} {i}'
+            year = rng.choice([str(rng.randint(1920, 2024))] * 9 + ['\\N'])
+            basics.write(f'tt{i:07d}\t{rng.choice(title_types)}\t{title}\t{title}\t0\t'
+                         f'{year}\t\\N\t{rng.randint(60, 180)}\tDrama\n')
+            if rng.random() < 0.8:
+                ratings.write(f'tt{i:07d}\t{round(rng.uniform(1, 10), 1)}\t'
+                              f'{rng.randint(5, 100000)}\n')
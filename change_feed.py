@@ -0,0 +1,141 @@
+"""
+Change-data-capture of the storage commands.
+Every successful add, delete and update publishes a ChangeEvent
+to the subscribers and optionally appends it to a JSON-lines changelog,
+so consumers can resume from a sequence number.
+"""
+import json
+import os
+import threading
+import time
+from typing import NamedTuple
+
+
+class ChangeEvent(NamedTuple):
+    """
+    One change of the movies database.
+    """
+    sequence: int
+    op: str
+    title: str
+    old: dict | None
+    new: dict | None
+    timestamp: float
+
+
+def read_changelog(changelog_path: str, after_sequence: int = 0):
+    """
+    Read the events of a changelog,
+    skipping the events up to a sequence number.
+    :param changelog_path: str
+    :param after_sequence: last sequence number already processed (int)
+    :return: events (generator of ChangeEvent)
+    """
+    if not os.path.isfile(changelog_path):
+        return
+
+    with open(changelog_path, 'r', encoding='utf8') as file:
+        for line in file:
+            if not line.strip():
+                continue
+            event = ChangeEvent(**json.loads(line))
+            if event.sequence > after_sequence:
+                yield event
+
+
+def _read_last_sequence(changelog_path: str) -> int:
+    """
+    Get the sequence number of the last event in a changelog,
+    reading only the end of the file.
+    :param changelog_path: str
+    :return: sequence number, 0 if there is no event (int)
+    """
+    if not os.path.isfile(changelog_path):
+        return 0
+
+    with open(changelog_path, 'rb') as file:
+        end = file.seek(0, os.SEEK_END)
+        chunk_size = 4096
+        while True:
+            start = max(0, end - chunk_size)
+            file.seek(start)
+            lines = file.read(end - start).splitlines()
+            # the first line may be cut, unless the chunk starts the file
+            complete = lines if start == 0 else lines[1:]
+            for line in reversed(complete):
+                if line.strip():
+                    return json.loads(line)['sequence']
+            if start == 0:
+                return 0
+            chunk_size *= 2
+
+
+class ChangeFeed:
+    """
+    Publishes the changes of a storage to the subscribers,
+    numbering them with an increasing sequence number.
+    """
+
+    def __init__(self, changelog_path: str = None):
+        self._changelog_path = changelog_path
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._sequence = _read_last_sequence(changelog_path) if changelog_path else 0
+
+    @property
+    def sequence(self) -> int:
+        """
+        Sequence number of the last published event.
+        :return: int
+        """
+        return self._sequence
+
+    def subscribe(self, callback):
+        """
+        Register a callback called with every ChangeEvent.
+        :param callback: callable taking a ChangeEvent
+        :return: the callback
+        """
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """
+        Unregister a callback.
+        :param callback: callable
+        """
+        self._subscribers.remove(callback)
+
+    def publish(self, op: str, title: str,
+                old: dict = None, new: dict = None) -> ChangeEvent:
+        """
+        Publish a change to the changelog and the subscribers.
+        :param op: 'add', 'delete' or 'update' (str)
+        :param title: str
+        :param old: movie info before the change (dict | None)
+        :param new: movie info after the change (dict | None)
+        :return: event (ChangeEvent)
+        """
+        with self._lock:
+            self._sequence += 1
+            event = ChangeEvent(self._sequence, op, title,
+                                dict(old) if old is not None else None,
+                                dict(new) if new is not None else None,
+                                time.time())
+            if self._changelog_path:
+                with open(self._changelog_path, 'a', encoding='utf8') as file:
+                    file.write(json.dumps(event._asdict()) + '\n')
+
+        for callback in list(self._subscribers):
+            callback(event)
+        return event
+
+    def replay(self, after_sequence: int = 0):
+        """
+        Read the changelog events after a sequence number.
+        :param after_sequence: int
+        :return: events (generator of ChangeEvent)
+        """
+        if not self._changelog_path:
+            return iter(())
+        return read_changelog(self._changelog_path, after_sequence)
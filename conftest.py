@@ -0,0 +1,47 @@
+"""
+Test data shared by the test modules
+"""
+import json
+
+import pytest
+
+from storage_json import StorageJson
+
+
+def movie(rating: float = 7.9, year: int = 1997, notes: str = '', poster: str = 'poster',
+          website: str = 'website', country: str = 'United States') -> dict:
+    """
+    Movie fields, the TestTitanic ones unless given
+    """
+    return {'rating': rating, 'year': year, 'notes': notes, 'poster': poster,
+            'website': website, 'country': country}
+
+
+class CountingStorageJson(StorageJson):
+    """
+    StorageJson counting the file parses.
+    """
+
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+        self.parses = 0
+
+    def list_movies(self) -> dict:
+        self.parses += 1
+        return super().list_movies()
+
+
+@pytest.fixture(name='json_storage')
+def fixture_json_storage(tmp_path):
+    """
+    Factory of JSON storages with test movies,
+    TestTitanic unless movies are given
+    """
+    def create(movies: dict = None, storage_class=StorageJson):
+        file_path = tmp_path / 'movies.json'
+        if movies is None:
+            movies = {'TestTitanic': movie()}
+        file_path.write_text(json.dumps(movies), encoding='utf8')
+        return storage_class(str(file_path))
+
+    return create
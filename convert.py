@@ -0,0 +1,220 @@
+"""
+Streaming conversion of the movies from any IStorage object to another.
+
+The source movies are streamed with iter_movies and written to the target
+in batches with add_movies, so only one batch is held in memory.
+The conversion is verified by comparing the row count and
+an order independent checksum of the source and the target movies.
+An interrupted conversion resumes from its checkpoint file.
+"""
+import hashlib
+import json
+import os
+import time
+
+from csv_codec import COLUMNS
+from file_codecs import open_file, strip_compression
+from istorage import IStorage
+from storage_sharded import StorageSharded
+from utils import movie_fields
+
+CHECKSUM_MODULO = 2 ** 64
+
+# the content of an empty movies file by extension
+EMPTY_CONTENT = {'json': '{}',
+                 'csv': ','.join(COLUMNS) + '\n',
+                 'ndjson': '',
+                 'jsonl': ''}
+
+
+def movie_checksum(title: str, info: dict) -> int:
+    """
+    Get the checksum of a movie, independent of its fields order.
+    :param title: str
+    :param info: movie fields (dict)
+    :return: checksum (int)
+    """
+    content = json.dumps([title, info], sort_keys=True, ensure_ascii=False)
+    digest = hashlib.blake2b(content.encode('utf8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def storage_checksum(movies) -> tuple[int, int]:
+    """
+    Get the row count and the checksum of streamed movies,
+    independent of their order.
+    :param movies: iterable of (title, info)
+    :return: count and checksum (tuple[int, int])
+    """
+    count = checksum = 0
+    for title, info in movies:
+        count += 1
+        checksum = (checksum + movie_checksum(title, info)) % CHECKSUM_MODULO
+    return count, checksum
+
+
+def create_empty_file(file_path: str, num_shards: int = 8):
+    """
+    Create an empty movies file, optionally compressed,
+    or an empty shard directory, unless it already exists.
+    :param file_path: str
+    :param num_shards: number of shards of a .shards directory (int)
+    """
+    if os.path.exists(file_path):
+        return
+
+    file_extension = strip_compression(file_path).split('.')[-1]
+    if file_extension == 'shards':
+        StorageSharded.create(file_path, num_shards)
+        return
+    if file_extension not in EMPTY_CONTENT:
+        raise ValueError(f'The {file_path} file format is not supported.')
+
+    with open_file(file_path, 'w', encoding='utf8', newline='') as file:
+        file.write(EMPTY_CONTENT[file_extension])
+
+
+def coerce_movie_fields(info: dict) -> dict:
+    """
+    Convert the movie fields to their types where possible,
+    e.g. a rating of 8 in a JSON file to 8.0,
+    the other values left for the validation to reject.
+    :param info: movie fields (dict)
+    :return: movie fields (dict)
+    """
+    coerced = dict(info)
+    for name, value in info.items():
+        field_type = movie_fields.get(name)
+        if field_type is None or isinstance(value, field_type) or \
+                isinstance(value, bool):
+            continue
+        try:
+            coerced[name] = field_type(value)
+        except (TypeError, ValueError):
+            pass
+    return coerced
+
+
+def _json_value(value):
+    """
+    Get a value as read back from JSON, e.g. a tuple as a list.
+    :param value: JSON serializable value
+    :return: value
+    """
+    return json.loads(json.dumps(value))
+
+
+def _load_checkpoint(checkpoint_path: str | None, source_version,
+                     target_path: str | None) -> dict:
+    """
+    Load the checkpoint of an interrupted conversion,
+    refusing it if the source changed since or the target differs,
+    as the converted movies are skipped by position.
+    :param checkpoint_path: str | None
+    :param source_version: version of the source storage
+    :param target_path: target file path (str | None)
+    :return: checkpoint (dict)
+    """
+    if not checkpoint_path or not os.path.isfile(checkpoint_path):
+        return {'done': 0, 'checksum': 0}
+    with open(checkpoint_path, 'r', encoding='utf8') as file:
+        checkpoint = json.load(file)
+
+    if checkpoint.get('source_version') != _json_value(source_version):
+        raise ValueError(f'The source changed since the {checkpoint_path} checkpoint, '
+                         'remove it and the target to convert again.')
+    if checkpoint.get('target_path') != target_path:
+        raise ValueError(f"The {checkpoint_path} checkpoint is for the "
+                         f"{checkpoint.get('target_path')} target, not {target_path}.")
+    return checkpoint
+
+
+def _save_checkpoint(checkpoint_path: str, checkpoint: dict):
+    """
+    Save the checkpoint atomically, so an interruption
+    never leaves a partial file.
+    :param checkpoint_path: str
+    :param checkpoint: converted source movies count and checksum,
+        source version and target path (dict)
+    """
+    temp_path = f'{checkpoint_path}.tmp'
+    with open(temp_path, 'w', encoding='utf8') as file:
+        json.dump(checkpoint, file)
+    os.replace(temp_path, checkpoint_path)
+
+
+def convert(source: IStorage,
+            target: IStorage,
+            batch_size: int = 1000,
+            checkpoint_path: str = None,
+            progress=None,
+            target_path: str = None) -> dict:
+    """
+    Copy the movies of a source storage to an empty target storage,
+    their fields converted to the movie field types.
+    A batch written again after an interruption is skipped
+    by add_movies, as its titles already exist.
+    :param source: IStorage
+    :param target: IStorage, empty before the conversion
+    :param batch_size: number of movies per write (int)
+    :param checkpoint_path: file to resume an interrupted conversion (str | None)
+    :param progress: stream to report the progress to, e.g. sys.stderr
+    :param target_path: target file path, checked on resuming (str | None)
+    :return: summary (dict)
+    """
+    if not isinstance(batch_size, int):
+        raise TypeError('Batch size must be int.')
+    if batch_size < 1:
+        raise ValueError('Batch size must be at least 1.')
+
+    # the source must not change until the conversion ends
+    source_version = source.get_version()
+    checkpoint = _load_checkpoint(checkpoint_path, source_version, target_path)
+    resumed = done = checkpoint['done']
+    checksum = checkpoint['checksum']
+    added = 0
+    start = time.perf_counter()
+
+    def write_batch(batch: list):
+        nonlocal added, done, checksum
+        added += target.add_movies(batch)
+        done += len(batch)
+        for title, info in batch:
+            checksum = (checksum + movie_checksum(title, info)) % CHECKSUM_MODULO
+        if checkpoint_path:
+            _save_checkpoint(checkpoint_path, {'done': done,
+                                               'checksum': checksum,
+                                               'source_version': source_version,
+                                               'target_path': target_path})
+        if progress is not None:
+            elapsed = time.perf_counter() - start
+            rate = (done - resumed) / elapsed if elapsed else 0.0
+            print(f'{done} movies converted, {rate:.0f} movies/s',
+                  file=progress, flush=True)
+
+    batch = []
+    for position, (title, info) in enumerate(source.iter_movies()):
+        # already converted before the interruption
+        if position < resumed:
+            continue
+        batch.append((title, coerce_movie_fields(info)))
+        if len(batch) == batch_size:
+            write_batch(batch)
+            batch = []
+    if batch:
+        write_batch(batch)
+
+    elapsed = time.perf_counter() - start
+    target_count, target_checksum = storage_checksum(target.iter_movies())
+    verified = target_count == done and target_checksum == checksum
+
+    if verified and checkpoint_path and os.path.isfile(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    return {'converted': done,
+            'added': added,
+            'resumed_from': resumed,
+            'seconds': round(elapsed, 3),
+            'movies_per_second': round((done - resumed) / elapsed) if elapsed else None,
+            'target_count': target_count,
+            'verified': verified}
@@ -14,8 +14,12 @@ Get summarized or detailed view of Countries.
     },
 
 """
+import functools
+
 import requests
 
+from country_index import split_countries
+from instrumentation import instrumentation
 from utils import colors
 
 API_KEY = "YOUR_API_KEY"
@@ -35,7 +39,8 @@ def get_countries() -> dict:
     :return: countries information (dict)
     """
     try:
-        return requests.get(URL, headers=HEADERS, timeout=5).json()
+        with instrumentation.measure('network'):
+            return requests.get(URL, headers=HEADERS, timeout=5).json()
     except (requests.exceptions.Timeout,
             requests.exceptions.HTTPError,
             requests.exceptions.ConnectionError,
@@ -45,18 +50,33 @@ def get_countries() -> dict:
             colors.get('default')
 
 
-countries = get_countries()
+@functools.lru_cache(maxsize=None)
+def load_flags() -> dict:
+    """
+    Get the flag url of every country name, calling the API only once.
+    An API error is raised instead of cached, so the next call retries.
+    :return: flag url by country name (dict)
+    """
+    countries = get_countries()
+    # an API error message instead of the countries
+    if not isinstance(countries, list):
+        raise ValueError(countries)
+    flags = {}
+    for country in countries:
+        flags.setdefault(country['name']['common'], country['flags']['png'])
+    return flags
 
 
-def get_country_flags(countries_name: str) -> list:
+def get_country_flags(countries_name: str, flags: dict = None) -> list:
     """
     Get country's flags based on countries name.
     :param countries_name: str
+    :param flags: flag url by country name, loaded from the API if None (dict | None)
     :return: urls of country flags (list)
     """
-    urls = []
-    for country_name in countries_name.split(', '):
-        urls.append("".join([country['flags']['png']
-                             for country in countries
-                             if country['name']['common'] == country_name]))
-    return urls
+    if flags is None:
+        try:
+            flags = load_flags()
+        except ValueError:
+            flags = {}
+    return [flags.get(country_name, '') for country_name in split_countries(countries_name)]
@@ -0,0 +1,199 @@
+"""
+Dictionary-encoded country column with a bitmap index per country.
+
+Every distinct country string of the catalog, e.g. "United States, Canada",
+is stored once and every movie keeps only its small integer code.
+Every country gets an id and a bitmap, a Python int with the bit of each
+movie row from that country set, so "movies from France and Germany"
+is a bitmap intersection instead of a substring scan of every movie.
+"""
+from array import array
+
+from istorage import IStorage
+
+
+def split_countries(countries: str) -> list:
+    """
+    Split a comma-separated country field.
+    :param countries: e.g. 'United States, Canada' (str)
+    :return: country names (list[str])
+    """
+    return [country.strip() for country in countries.split(',') if country.strip()]
+
+
+class CountryIndex:
+    """
+    Country column of the movies, dictionary-encoded,
+    with a bitmap of the movie rows per country.
+    """
+
+    def __init__(self, titles: list, countries: list):
+        self._titles = list(titles)
+        # distinct country fields, the code of a movie is their index
+        self._values = []
+        self._codes = array('i')
+        # country names, the id of a country is its index
+        self.names = []
+        self._ids = {}
+        # country ids by code
+        self._value_ids = []
+
+        codes = {}
+        for value in countries:
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(self._values)
+                self._values.append(value)
+                self._value_ids.append(tuple(self._country_id(name)
+                                             for name in dict.fromkeys(split_countries(value))))
+            self._codes.append(code)
+        self._bitmaps = self._build_bitmaps()
+
+    @classmethod
+    def from_storage(cls, storage: IStorage):
+        """
+        Build the index of the movies of a storage.
+        :param storage: IStorage
+        :return: index (CountryIndex)
+        """
+        columns = storage.read_columns(['title', 'country'])
+        return cls(columns['title'], columns['country'])
+
+    def _country_id(self, name: str) -> int:
+        """
+        Get the id of a country, adding it if new.
+        :param name: str
+        :return: id (int)
+        """
+        country_id = self._ids.get(name)
+        if country_id is None:
+            country_id = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return country_id
+
+    def _build_bitmaps(self) -> list:
+        """
+        Build the bitmap of every country from the movie codes,
+        setting all the bits of a country at once.
+        :return: bitmaps by country id (list[int])
+        """
+        import numpy as np  # deferred, slow to import
+
+        codes = np.frombuffer(self._codes, dtype=np.int32) if self._codes \
+            else np.empty(0, dtype=np.int32)
+        # whether each distinct country field has the country, by country id
+        has_country = np.zeros((len(self.names), len(self._values)), dtype=np.uint8)
+        for code, country_ids in enumerate(self._value_ids):
+            has_country[list(country_ids), code] = 1
+
+        bitmaps = []
+        for code_flags in has_country:
+            bits = code_flags[codes]
+            bitmaps.append(int.from_bytes(np.packbits(bits, bitorder='little').tobytes(),
+                                          'little'))
+        return bitmaps
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def country(self, row: int) -> str:
+        """
+        Get the country field of a movie row.
+        :param row: int
+        :return: str
+        """
+        return self._values[self._codes[row]]
+
+    def countries(self, row: int) -> list:
+        """
+        Get the country names of a movie row.
+        :param row: int
+        :return: list[str]
+        """
+        return [self.names[country_id] for country_id in self._value_ids[self._codes[row]]]
+
+    def bitmap(self, name: str) -> int:
+        """
+        Get the bitmap of the movie rows from a country.
+        :param name: str
+        :return: bitmap (int)
+        """
+        if not isinstance(name, str):
+            raise TypeError('Country must be string.')
+        country_id = self._ids.get(name.strip())
+        return self._bitmaps[country_id] if country_id is not None else 0
+
+    def select(self, all_of=(), any_of=()) -> int:
+        """
+        Get the bitmap of the movie rows from all the countries of all_of,
+        and from at least one country of any_of.
+        :param all_of: iterable of country names
+        :param any_of: iterable of country names
+        :return: bitmap (int)
+        """
+        all_of = list(all_of)
+        any_of = list(any_of)
+        if not all_of and not any_of:
+            raise ValueError('At least one country is required.')
+
+        selected = (1 << len(self)) - 1
+        for name in all_of:
+            selected &= self.bitmap(name)
+        if any_of:
+            matches = 0
+            for name in any_of:
+                matches |= self.bitmap(name)
+            selected &= matches
+        return selected
+
+    def rows(self, bitmap: int) -> list:
+        """
+        Get the movie rows of a bitmap.
+        :param bitmap: int
+        :return: rows in increasing order (list[int])
+        """
+        import numpy as np  # deferred, slow to import
+
+        if not bitmap:
+            return []
+        bits = np.unpackbits(np.frombuffer(bitmap.to_bytes((len(self) + 7) // 8, 'little'),
+                                           dtype=np.uint8),
+                             bitorder='little')
+        return np.flatnonzero(bits).tolist()
+
+    def titles(self, bitmap: int) -> list:
+        """
+        Get the movie titles of a bitmap.
+        :param bitmap: int
+        :return: titles in the storage order (list[str])
+        """
+        return [self._titles[row] for row in self.rows(bitmap)]
+
+    def counts(self) -> dict:
+        """
+        Get the number of movies per country.
+        :return: count by country name (dict)
+        """
+        return {name: bitmap.bit_count() for name, bitmap in zip(self.names, self._bitmaps)}
+
+
+class CountryIndexCache:
+    """
+    Country index of a IStorage object,
+    built again only when the storage version changes.
+    """
+
+    def __init__(self, storage: IStorage):
+        self._storage = storage
+        # (version, index) of the last build
+        self._cached = None
+
+    def get(self) -> CountryIndex:
+        """
+        Get the country index of the movies.
+        :return: index (CountryIndex)
+        """
+        version = self._storage.get_version()
+        if self._cached is None or version is None or self._cached[0] != version:
+            self._cached = (version, CountryIndex.from_storage(self._storage))
+        return self._cached[1]
@@ -0,0 +1,139 @@
+"""
+Schema-driven CSV codec of the movies.
+
+The columns are mapped by the file header, so their order may change,
+the values are quoted when needed on write, and decoded column by column
+to their movie_fields types on read.
+Rows of the legacy unquoted format, with the country split over
+the last columns, are still read when country is the last column.
+"""
+import csv
+import io
+
+from utils import movie_fields
+
+# the columns of a new CSV file
+COLUMNS = ['title', *movie_fields]
+
+
+def _default(name: str):
+    """
+    Get the value of a column missing from the file.
+    :param name: column name (str)
+    :return: default value of the column type
+    """
+    return movie_fields[name]()
+
+
+class CsvCodec:
+    """
+    Encodes and decodes the movies rows of a CSV file
+    with the columns order of its header.
+    """
+
+    def __init__(self, header: list = None):
+        self.header = list(header) if header else list(COLUMNS)
+        self._index = {name: index for index, name in enumerate(self.header)}
+        if 'title' not in self._index:
+            raise ValueError('CSV header must have a title column.')
+        # legacy rows: the country may be split over the last columns
+        self._country_tail = self.header[-1] == 'country'
+
+    def _column(self, rows: list, name: str) -> list:
+        """
+        Get the raw values of a column.
+        :param rows: list of rows
+        :param name: column name (str)
+        :return: values (list)
+        """
+        index = self._index.get(name)
+        if index is None:
+            return [_default(name)] * len(rows)
+        if name == 'country' and self._country_tail:
+            return [row[index] if len(row) == index + 1 else ",".join(row[index:])
+                    for row in rows]
+        return [row[index] if index < len(row) else '' for row in rows]
+
+    def decode_columns(self, rows: list, names) -> dict:
+        """
+        Decode some columns of rows, each column in bulk.
+        :param rows: list of rows, without the header
+        :param names: column names, title or movie_fields names
+        :return: values by column name (dict[str, list])
+        """
+        columns = {}
+        for name in names:
+            if name != 'title' and name not in movie_fields:
+                raise ValueError(f"Unknown field '{name}'.")
+            values = self._column(rows, name)
+            field_type = movie_fields.get(name, str)
+            if field_type is not str and self._index.get(name) is not None:
+                values = list(map(field_type, values))
+            elif name == 'country':
+                # the countries repeat across the movies, keep one string each
+                shared = {}
+                values = [shared.setdefault(value, value) for value in values]
+            columns[name] = values
+        return columns
+
+    def decode_movies(self, rows: list) -> dict:
+        """
+        Decode rows to movies.
+        :param rows: list of rows, without the header
+        :return: movies (dict)
+        """
+        columns = self.decode_columns(rows, COLUMNS)
+        titles = columns.pop('title')
+        names = list(columns)
+        return {title: dict(zip(names, values))
+                for title, *values in zip(titles, *columns.values())}
+
+    def decode_row(self, row: list) -> tuple[str, dict]:
+        """
+        Decode one row to a movie.
+        :param row: list
+        :return: title and info (tuple[str, dict])
+        """
+        columns = self.decode_columns([row], COLUMNS)
+        title = columns.pop('title')[0]
+        return title, {name: values[0] for name, values in columns.items()}
+
+    def title(self, row: list) -> str:
+        """
+        Get the title of a row.
+        :param row: list
+        :return: title (str)
+        """
+        return row[self._index['title']]
+
+    def encode_row(self, title: str, info: dict, row: list = None) -> list:
+        """
+        Encode a movie to a row in the header order.
+        :param title: str
+        :param info: movie fields (dict)
+        :param row: previous row, to keep its unknown columns (list | None)
+        :return: row (list[str])
+        """
+        cells = list(row[:len(self.header)]) if row else []
+        cells += [''] * (len(self.header) - len(cells))
+        for name, index in self._index.items():
+            if name == 'title':
+                cells[index] = title
+            elif name in info:
+                cells[index] = str(info[name])
+        return cells
+
+    def encode_line(self, title: str, info: dict, row: list = None,
+                    line_end: str = '\n') -> str:
+        """
+        Encode a movie to a CSV line, quoted as needed.
+        :param title: str
+        :param info: movie fields (dict)
+        :param row: previous row, to keep its unknown columns (list | None)
+        :param line_end: str
+        :return: line (str)
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator=line_end).writerow(
+            self.encode_row(title, info, row))
+        return buffer.getvalue()
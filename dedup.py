@@ -0,0 +1,603 @@
+"""
+Near-duplicate movie titles, e.g. "The Godfather", "Godfather, The"
+and "The Godfather (1972)".
+
+Titles are normalized first, which makes these three the same title.
+Other near-duplicates, e.g. typos, are found with MinHash: every title is
+cut into character shingles and gets a signature, the minimum of several
+hash functions over its shingles. Two signatures agree on a hash function
+as often as the shingle sets overlap (their Jaccard similarity), and
+locality-sensitive hashing splits the signatures into bands, the titles
+sharing a whole band being candidate pairs. Only the candidates are
+compared, instead of all the pairs of titles, and each candidate pair is
+verified with its exact shingle similarity, the numbers in the titles
+("Rocky II" isn't "Rocky III") and the movie years.
+
+The index follows the storage changes through its change feed, and is
+saved to a file next to the storage with the storage version, to be
+loaded instead of rebuilt while the storage is unchanged.
+"""
+import gc
+import itertools
+import os
+import pickle
+import random
+import re
+import unicodedata
+
+from istorage import IStorage
+from utils import colors, movie_fields
+
+# bump when the saved index changes format
+INDEX_FORMAT = 1
+
+ARTICLES = {'the', 'a', 'an'}
+
+# shingles per signatures batch, bounding its memory
+BATCH_SHINGLES = 1 << 17
+
+# texts added since the band tables were built before building them again
+COMPACT_MIN_ADDED = 1000
+
+_YEAR_SUFFIX = re.compile(r'\s*[(\[]\s*\d{4}\s*[)\]]\s*$')
+_ARTICLE_SUFFIX = re.compile(r',\s*(the|a|an)\s*$')
+_NON_WORD = re.compile(r'[\W_]+')
+_NUMBER = re.compile(r'\b(?:\d+|[ivx]+)\b')
+_ROMAN = re.compile(r'x{0,3}(ix|iv|v?i{0,3})')
+_ROMAN_VALUES = {'i': 1, 'v': 5, 'x': 10}
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalize a title: accents, case, punctuation, a year suffix
+    and a leading or trailing article don't matter.
+    :param title: e.g. 'Godfather, The (1972)' (str)
+    :return: e.g. 'godfather' (str)
+    """
+    if title.isascii():
+        text = title.lower()
+    else:
+        text = unicodedata.normalize('NFKD', title)
+        text = ''.join(char for char in text if not unicodedata.combining(char)).casefold()
+    if text.rstrip().endswith((')', ']')):
+        text = _YEAR_SUFFIX.sub('', text)
+    match = _ARTICLE_SUFFIX.search(text) if ',' in text else None
+    if match:
+        text = f'{match.group(1)} {text[:match.start()]}'
+    words = _NON_WORD.sub(' ', text.replace('&', ' and ')).split()
+    if len(words) > 1 and words[0] in ARTICLES:
+        words = words[1:]
+    return ' '.join(words)
+
+
+def title_numbers(text: str) -> tuple:
+    """
+    Get the numbers of a normalized title, in digits or roman numerals.
+    :param text: e.g. 'rocky ii' (str)
+    :return: e.g. (2,) (tuple[int])
+    """
+    numbers = []
+    for word in _NUMBER.findall(text):
+        if word.isdigit():
+            numbers.append(int(word))
+        elif _ROMAN.fullmatch(word):
+            values = [_ROMAN_VALUES[char] for char in word]
+            numbers.append(sum(-value if value < following else value
+                               for value, following in zip(values, values[1:] + [0])))
+    return tuple(numbers)
+
+
+def shingles(text: str, size: int = 3) -> set:
+    """
+    Cut a normalized title into character shingles,
+    the title padded so its first and last letters count as much.
+    :param text: str
+    :param size: shingle length (int)
+    :return: set[str]
+    """
+    padded = f' {text} '
+    if len(padded) <= size:
+        return {padded}
+    return {padded[i:i + size] for i in range(len(padded) - size + 1)}
+
+
+def jaccard(first: set, second: set) -> float:
+    """
+    Get the Jaccard similarity of two sets.
+    :param first: set
+    :param second: set
+    :return: size of the intersection over size of the union (float)
+    """
+    if not first and not second:
+        return 1.0
+    common = len(first & second)
+    return common / (len(first) + len(second) - common)
+
+
+class DuplicateIndex:
+    """
+    MinHash / LSH index of the movie titles of a storage,
+    kept up to date with the storage changes.
+    """
+
+    def __init__(self, storage: IStorage, threshold: float = 0.6, num_perm: int = 64,
+                 bands: int = 16, max_year_gap: int = 1, seed: int = 1,
+                 index_path: str = None):
+        import numpy as np  # deferred, slow to import
+
+        if not isinstance(threshold, float):
+            raise TypeError('Threshold must be float.')
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError('Threshold must be between 0 and 1.')
+        if not isinstance(num_perm, int) or not isinstance(bands, int):
+            raise TypeError('Number of hash functions and bands must be int.')
+        if bands <= 0 or num_perm % bands:
+            raise ValueError('Number of hash functions must be a multiple of the bands.')
+
+        self._storage = storage
+        self._index_path = index_path
+        self._threshold = threshold
+        self._bands = bands
+        self._max_year_gap = max_year_gap
+        # the saved band keys are only valid for the same hash functions
+        self._hashing = (num_perm, bands, seed)
+        # hash function i of a shingle x is the high 32 bits of
+        # (a[i] * x + b[i]) % 2**64, a[i] odd (multiply-shift hashing)
+        rng = random.Random(seed)
+        self._a = np.array([[rng.getrandbits(64) | 1] for _ in range(num_perm)],
+                           dtype=np.uint64)
+        self._b = np.array([[rng.getrandbits(64)] for _ in range(num_perm)],
+                           dtype=np.uint64)
+        # storage version the index matches, None until built
+        self._version = None
+        # storage version of the saved index, not saved again while unchanged
+        self._saved_version = None
+        self._clear()
+        storage.change_feed.subscribe(self._on_change)
+
+    def _clear(self):
+        """
+        Empty the index.
+        """
+        # (text id, year) by title
+        self._movies = {}
+        # by text id: normalized title, its numbers and the titles normalized to it
+        self._texts = []
+        self._numbers = []
+        self._text_titles = []
+        self._text_ids = {}
+        # band keys sorted per band, with their text ids, for the first texts
+        self._keys = None
+        self._key_texts = None
+        # text ids by band key per band, for the texts added after them
+        self._recent = [{} for _ in range(self._bands)]
+
+    def _state(self) -> tuple:
+        """
+        Get the index data, as saved.
+        :return: tuple
+        """
+        return (self._movies, self._texts, self._numbers, self._text_titles,
+                self._text_ids, self._keys, self._key_texts, self._recent)
+
+    def _band_keys(self, texts: list, numbers: list):
+        """
+        Get the band keys of texts, their MinHash signatures computed
+        for batches of texts at once over the 3-byte shingles of the
+        padded UTF-8 texts. The numbers of a text are hashed in its keys,
+        as titles with other numbers are never duplicates.
+        :param texts: normalized titles (list[str])
+        :param numbers: numbers of each text (list[tuple])
+        :return: keys, a row per band and a column per text (numpy.ndarray)
+        """
+        import numpy as np  # deferred, slow to import
+
+        encoded = [f' {text} '.encode('utf8').ljust(3) for text in texts]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.int64)
+        # every 3 bytes as an integer, without the ones spanning two texts
+        shingle_values = data[:-2] << 16 | data[1:-1] << 8 | data[2:]
+        ends = np.cumsum(lengths)
+        valid = np.ones(len(shingle_values), dtype=bool)
+        valid[(ends - 2)[:-1]] = False
+        valid[(ends - 1)[:-1]] = False
+        shingle_values = shingle_values[valid]
+        counts = lengths - 2
+        offsets = np.cumsum(counts) - counts
+
+        # every distinct shingle hashed once, as the titles share most of them
+        if len(shingle_values) > BATCH_SHINGLES:
+            # a flag per 3-byte value, faster than sorting many shingles
+            present = np.zeros(1 << 24, dtype=bool)
+            present[shingle_values] = True
+            vocabulary = np.flatnonzero(present)
+            shingle_ids = (np.cumsum(present, dtype=np.int32) - 1)[shingle_values]
+        else:
+            vocabulary, shingle_ids = np.unique(shingle_values, return_inverse=True)
+        hashes = ((self._a * vocabulary.astype(np.uint64) + self._b) >> np.uint64(32)) \
+            .astype(np.uint32)
+
+        keys = np.array([hash(text_numbers) for text_numbers in numbers],
+                        dtype=np.int64).view(np.uint64)
+        keys = np.tile(keys, (self._bands, 1))
+        # batches of texts with about BATCH_SHINGLES shingles
+        splits = np.searchsorted(offsets, np.arange(BATCH_SHINGLES, len(shingle_values),
+                                                    BATCH_SHINGLES)).tolist()
+        for start, end in zip([0, *splits], [*splits, len(texts)]):
+            if start == end:
+                continue
+            first = offsets[start]
+            last = offsets[end] if end < len(texts) else len(shingle_values)
+            # a row per hash function, the minimum over the shingles of each text
+            signatures = np.minimum.reduceat(np.take(hashes, shingle_ids[first:last], axis=1),
+                                             offsets[start:end] - first, axis=1)
+            signatures = signatures.reshape(self._bands, -1, end - start)
+            for row in range(signatures.shape[1]):
+                # FNV style mixing, wrapping around 2**64
+                keys[:, start:end] = keys[:, start:end] * np.uint64(0x100000001B3) ^ \
+                    signatures[:, row, :]
+        return keys
+
+    def _index_texts(self):
+        """
+        Build the band tables of all the texts.
+        """
+        import numpy as np  # deferred, slow to import
+
+        keys = self._band_keys(self._texts, self._numbers)
+        order = np.argsort(keys, axis=1)
+        self._keys = np.take_along_axis(keys, order, axis=1)
+        self._key_texts = order.astype(np.int32)
+        self._recent = [{} for _ in range(self._bands)]
+
+    def _text_id(self, title: str) -> int:
+        """
+        Get the text id of a title, adding its text if new.
+        :param title: str
+        :return: text id (int)
+        """
+        text = normalize_title(title)
+        text_id = self._text_ids.get(text)
+        if text_id is None:
+            text_id = self._text_ids[text] = len(self._texts)
+            self._texts.append(text)
+            self._numbers.append(title_numbers(text))
+            self._text_titles.append([])
+            if self._keys is not None:
+                keys = self._band_keys([text], [self._numbers[text_id]])[:, 0]
+                for band, key in enumerate(keys.tolist()):
+                    self._recent[band].setdefault(key, []).append(text_id)
+        return text_id
+
+    def _add(self, title: str, year: int):
+        """
+        Index a movie.
+        :param title: str
+        :param year: int
+        """
+        self._remove(title)
+        text_id = self._text_id(title)
+        self._movies[title] = (text_id, year)
+        self._text_titles[text_id].append(title)
+
+    def _remove(self, title: str):
+        """
+        Remove a movie, its text staying in the band tables.
+        :param title: str
+        """
+        movie = self._movies.pop(title, None)
+        if movie is not None:
+            self._text_titles[movie[0]].remove(title)
+
+    def _on_change(self, event):
+        """
+        Apply a storage change to the index.
+        :param event: ChangeEvent
+        """
+        if self._version is None:
+            return
+        if event.op == 'delete':
+            self._remove(event.title)
+        else:
+            self._add(event.title, event.new.get('year'))
+
+        indexed = self._keys.shape[1]
+        if len(self._texts) - indexed > max(indexed, COMPACT_MIN_ADDED):
+            self._index_texts()
+        self._version = self._storage.get_version()
+
+    def build(self):
+        """
+        Index all the movies of the storage.
+        """
+        self._clear()
+        self._version = self._storage.get_version()
+        columns = self._storage.read_columns(['title', 'year'])
+        for title, year in zip(columns['title'], columns['year']):
+            self._add(title, year)
+        self._index_texts()
+
+    def _load(self, version) -> bool:
+        """
+        Load the saved index if it matches the storage version.
+        :param version: storage version
+        :return: True if loaded (bool)
+        """
+        if version is None or not self._index_path or not os.path.isfile(self._index_path):
+            return False
+        # millions of small lists and tuples, the collector would
+        # scan them again and again while they are loaded
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self._index_path, 'rb') as file:
+                saved = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return False
+        finally:
+            if collecting:
+                gc.enable()
+        if not isinstance(saved, dict) or saved.get('format') != INDEX_FORMAT or \
+                saved.get('version') != version or \
+                saved.get('hashing') != self._hashing or \
+                len(saved.get('index', ())) != len(self._state()):
+            return False
+
+        (self._movies, self._texts, self._numbers, self._text_titles,
+         self._text_ids, self._keys, self._key_texts, self._recent) = saved['index']
+        self._version = self._saved_version = version
+        return True
+
+    def save(self):
+        """
+        Save the index atomically, with the storage version it matches.
+        """
+        if not self._index_path or self._version is None or \
+                self._version == self._saved_version:
+            return
+        temp_path = f'{self._index_path}.tmp'
+        with open(temp_path, 'wb') as file:
+            pickle.dump({'format': INDEX_FORMAT,
+                         'version': self._version,
+                         'hashing': self._hashing,
+                         'index': self._state()},
+                        file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self._index_path)
+        self._saved_version = self._version
+
+    def close(self):
+        """
+        Save the index and stop following the storage changes.
+        """
+        self.save()
+        self._storage.change_feed.unsubscribe(self._on_change)
+
+    def _ensure_current(self):
+        """
+        Load or build the index again if the storage changed outside the feed.
+        """
+        version = self._storage.get_version()
+        if self._version is not None and version is not None and version == self._version:
+            return
+        if not self._load(version):
+            self.build()
+
+    def _years_match(self, first, second) -> bool:
+        """
+        Check two movie years are close enough for duplicates,
+        an unknown year matching any year.
+        :param first: int
+        :param second: int
+        :return: bool
+        """
+        return self._max_year_gap is None or not first or not second or \
+            abs(first - second) <= self._max_year_gap
+
+    def _text_similarity(self, first: int, second: int, cache: dict) -> float:
+        """
+        Get the exact similarity of two texts, 0 if their numbers differ.
+        :param first: text id (int)
+        :param second: text id (int)
+        :param cache: shingles by text id (dict)
+        :return: float
+        """
+        if self._numbers[first] != self._numbers[second]:
+            return 0.0
+        for text_id in (first, second):
+            if text_id not in cache:
+                cache[text_id] = shingles(self._texts[text_id])
+        return jaccard(cache[first], cache[second])
+
+    def _candidates(self, text: str, numbers: tuple) -> set:
+        """
+        Get the texts sharing a band with a text.
+        :param text: normalized title (str)
+        :param numbers: numbers of the text (tuple)
+        :return: text ids (set[int])
+        """
+        import numpy as np  # deferred, slow to import
+
+        candidates = set()
+        for band, key in enumerate(self._band_keys([text], [numbers])[:, 0]):
+            start = np.searchsorted(self._keys[band], key, side='left')
+            end = np.searchsorted(self._keys[band], key, side='right')
+            candidates.update(self._key_texts[band, start:end].tolist())
+            candidates.update(self._recent[band].get(int(key), ()))
+        return candidates
+
+    def likely_duplicates(self, title: str, year: int = None, limit: int = 5) -> list:
+        """
+        Get the movies a movie likely duplicates, e.g. before adding it.
+        :param title: str
+        :param year: year of the movie, any year if None (int | None)
+        :param limit: maximum number of movies (int)
+        :return: (title, similarity) pairs, most similar first (list[tuple[str, float]])
+        """
+        if not isinstance(title, str):
+            raise TypeError('Title must be string.')
+        if not isinstance(limit, int):
+            raise TypeError('Number of movies must be int.')
+        self._ensure_current()
+
+        text = normalize_title(title)
+        numbers = title_numbers(text)
+        text_shingles = shingles(text)
+        duplicates = []
+        for text_id in self._candidates(text, numbers):
+            if self._texts[text_id] == text:
+                similarity = 1.0
+            elif self._numbers[text_id] != numbers:
+                continue
+            else:
+                similarity = jaccard(text_shingles, shingles(self._texts[text_id]))
+                if similarity < self._threshold:
+                    continue
+            duplicates.extend((other, round(similarity, 4))
+                              for other in self._text_titles[text_id]
+                              if other != title and
+                              self._years_match(year, self._movies[other][1]))
+
+        duplicates.sort(key=lambda duplicate: (-duplicate[1], duplicate[0]))
+        return duplicates[:limit]
+
+    def _candidate_pairs(self) -> set:
+        """
+        Get the pairs of texts sharing a band.
+        :return: (text id, text id) pairs, smallest id first (set[tuple[int, int]])
+        """
+        import numpy as np  # deferred, slow to import
+
+        pairs = set()
+        for keys, key_texts in zip(self._keys, self._key_texts):
+            # runs of equal keys, i.e. the buckets of more than one text
+            same = np.flatnonzero(keys[1:] == keys[:-1])
+            if not len(same):
+                continue
+            run_starts = same[np.r_[True, same[1:] != same[:-1] + 1]]
+            run_ends = same[np.r_[same[1:] != same[:-1] + 1, True]] + 2
+            for start, end in zip(run_starts.tolist(), run_ends.tolist()):
+                bucket = sorted(key_texts[start:end].tolist())
+                pairs.update(itertools.combinations(bucket, 2))
+        return pairs
+
+    def clusters(self) -> list:
+        """
+        Get the clusters of duplicate movies,
+        the movies linked by a verified pair, directly or not.
+        :return: titles of each cluster in the storage order (list[list[str]])
+        """
+        self._ensure_current()
+        if self._keys.shape[1] != len(self._texts):
+            self._index_texts()
+
+        titles = list(self._movies)
+        rows = {title: row for row, title in enumerate(titles)}
+        parents = list(range(len(titles)))
+
+        def find(row: int) -> int:
+            while parents[row] != row:
+                parents[row] = parents[parents[row]]
+                row = parents[row]
+            return row
+
+        def union(first: str, second: str):
+            if self._years_match(self._movies[first][1], self._movies[second][1]):
+                first, second = find(rows[first]), find(rows[second])
+                if first != second:
+                    parents[max(first, second)] = min(first, second)
+
+        # the movies of the same text, then of the similar texts
+        for text_titles in self._text_titles:
+            for first, second in itertools.combinations(text_titles, 2):
+                union(first, second)
+        cache = {}
+        for first, second in self._candidate_pairs():
+            if not self._text_titles[first] or not self._text_titles[second]:
+                continue
+            if self._text_similarity(first, second, cache) >= self._threshold:
+                for first_title in self._text_titles[first]:
+                    for second_title in self._text_titles[second]:
+                        union(first_title, second_title)
+
+        clusters = {}
+        for row, title in enumerate(titles):
+            clusters.setdefault(find(row), []).append(title)
+        return [cluster for cluster in clusters.values() if len(cluster) > 1]
+
+
+def find_duplicates(storage: IStorage, **options) -> list:
+    """
+    Get the clusters of duplicate movies of a storage.
+    :param storage: IStorage
+    :param options: DuplicateIndex options
+    :return: titles of each cluster in the storage order (list[list[str]])
+    """
+    index = DuplicateIndex(storage, **options)
+    try:
+        return index.clusters()
+    finally:
+        index.close()
+
+
+def _canonical_key(title: str, info: dict, position: int) -> tuple:
+    """
+    Sort key of the movies of a cluster, the movie kept first:
+    no year or article suffix, most fields filled, stored first.
+    :param title: str
+    :param info: movie fields (dict)
+    :param position: position of the movie in the storage (int)
+    :return: tuple
+    """
+    suffixed = bool(_YEAR_SUFFIX.search(title) or _ARTICLE_SUFFIX.search(title.casefold()))
+    return suffixed, sum(not info.get(field) for field in movie_fields), position
+
+
+def merge_duplicates(storage: IStorage, clusters: list) -> dict:
+    """
+    Merge every cluster of duplicate movies into one of its movies,
+    its empty fields filled and the notes joined from the others,
+    deleting the others, all in one storage write.
+    :param storage: IStorage
+    :param clusters: titles of each cluster (list[list[str]])
+    :return: merge summary (dict)
+    """
+    movies = storage.list_movies()
+    positions = {title: position for position, title in enumerate(movies)}
+    changes = {}
+    merged = {}
+    for cluster in clusters:
+        cluster = sorted((title for title in dict.fromkeys(cluster) if title in movies),
+                         key=lambda title: _canonical_key(title, movies[title],
+                                                          positions[title]))
+        if len(cluster) < 2:
+            continue
+        kept, duplicates = cluster[0], cluster[1:]
+        fields = {}
+        for field in movie_fields:
+            if field != 'notes' and not movies[kept][field]:
+                fields[field] = next((movies[title][field] for title in duplicates
+                                      if movies[title][field]), movies[kept][field])
+        notes = '; '.join(dict.fromkeys(movies[title]['notes'] for title in cluster
+                                        if movies[title]['notes']))
+        fields['notes'] = notes
+        fields = {field: value for field, value in fields.items()
+                  if value != movies[kept][field]}
+        if fields:
+            changes[kept] = fields
+        merged.update(dict.fromkeys(duplicates, kept))
+
+    deleted = storage.delete_many(merged, changes) if merged else 0
+    return {'deleted': deleted, 'merged': merged}
+
+
+def duplicate_warning(title: str, duplicates: list) -> str:
+    """
+    Get the warning of a movie likely duplicating other movies.
+    :param title: str
+    :param duplicates: (title, similarity) pairs (list[tuple[str, float]])
+    :return: warning message (str)
+    """
+    others = ', '.join(f"'{other}'" for other, _ in duplicates)
+    return f"{colors.get('orange')}" \
+           f"Movie '{title}' looks like a duplicate of {others}." \
+           f"{colors.get('default')}"
@@ -0,0 +1,82 @@
+"""
+Transparent compression of the storage files,
+detected by the file extension, e.g. movies.json.gz.
+
+open_file streams the compression and decompression,
+so the storages read and write compressed files line by line
+or chunk by chunk, like plain files.
+"""
+import importlib
+
+# compression module by file extension
+CODECS = {'.gz': 'gzip',
+          '.bz2': 'bz2',
+          '.xz': 'lzma',
+          '.lzma': 'lzma'}
+
+
+def compression_suffix(file_path: str) -> str:
+    """
+    Get the compression extension of a file.
+    :param file_path: str
+    :return: extension, e.g. '.gz', or '' if not compressed (str)
+    """
+    for suffix in CODECS:
+        if file_path.endswith(suffix):
+            return suffix
+    return ''
+
+
+def is_compressed(file_path: str) -> bool:
+    """
+    Check if a file is compressed.
+    :param file_path: str
+    :return: bool
+    """
+    return bool(compression_suffix(file_path))
+
+
+def strip_compression(file_path: str) -> str:
+    """
+    Remove the compression extension of a file,
+    e.g. movies.json.gz -> movies.json
+    :param file_path: str
+    :return: file path (str)
+    """
+    suffix = compression_suffix(file_path)
+    return file_path[:-len(suffix)] if suffix else file_path
+
+
+def open_file(file_path: str, mode: str = 'r', encoding: str = None,
+              newline: str = None):
+    """
+    Open a file, compressed or not, like open().
+    :param file_path: str
+    :param mode: 'r', 'w' or 'a', with 'b' for binary (str)
+    :param encoding: text encoding (str | None)
+    :param newline: text newline mode (str | None)
+    :return: file object
+    """
+    suffix = compression_suffix(file_path)
+    if not suffix:
+        return open(file_path, mode,  # pylint: disable=consider-using-with
+                    encoding=encoding, newline=newline)
+
+    codec = importlib.import_module(CODECS[suffix])
+    if 'b' in mode:
+        return codec.open(file_path, mode)
+    return codec.open(file_path, mode.replace('t', '') + 't',
+                      encoding=encoding, newline=newline)
+
+
+def decompress(file_path: str, content: bytes) -> bytes:
+    """
+    Decompress the content of a file, if the file is compressed.
+    :param file_path: str
+    :param content: bytes
+    :return: decompressed content (bytes)
+    """
+    suffix = compression_suffix(file_path)
+    if not suffix:
+        return content
+    return importlib.import_module(CODECS[suffix]).decompress(content)
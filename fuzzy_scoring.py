@@ -0,0 +1,153 @@
+"""
+Fuzzy title scoring spread over a process pool.
+
+The titles are normalized once, and sent once to every worker process,
+then each query batch is scored in chunks of titles in parallel.
+Scoring many queries in one pass, e.g. to find the titles of an imported
+list already in the catalog, sends every chunk once for all the queries.
+"""
+import os
+
+# normalized titles of the worker process
+_worker_titles = []
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalize a title for scoring.
+    :param title: str
+    :return: normalized title (str)
+    """
+    return title.lower()
+
+
+def _init_worker(titles: list):
+    """
+    Keep the normalized titles in the worker process.
+    :param titles: list
+    """
+    global _worker_titles  # pylint: disable=global-statement
+    _worker_titles = titles
+
+
+def _score_titles(titles: list, queries: list) -> list:
+    """
+    Score titles against queries.
+    :param titles: normalized titles (list)
+    :param queries: normalized queries (list)
+    :return: scores per query, in the titles order (list[list[int]])
+    """
+    from fuzzywuzzy import fuzz  # deferred, only the search needs it
+
+    return [[fuzz.ratio(query, title) for title in titles] for query in queries]
+
+
+def _score_chunk(start: int, end: int, queries: list) -> list:
+    """
+    Score a chunk of the worker titles, run in a worker process.
+    :param start: first title index (int)
+    :param end: title index after the chunk (int)
+    :param queries: normalized queries (list)
+    :return: scores per query (list[list[int]])
+    """
+    return _score_titles(_worker_titles[start:end], queries)
+
+
+class FuzzyScorer:
+    """
+    Scores queries against the movie titles with fuzz.ratio,
+    in parallel for catalogs of at least min_parallel titles.
+    """
+
+    def __init__(self, titles, max_workers: int = None,
+                 min_parallel: int = 2000):
+        self._titles = list(titles)
+        self._normalized = [normalize_title(title) for title in self._titles]
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._min_parallel = min_parallel
+        self._executor = None
+
+    def _chunks(self) -> list[tuple[int, int]]:
+        """
+        Split the titles into a few chunks per worker.
+        :return: (start, end) title indexes (list[tuple[int, int]])
+        """
+        count = len(self._titles)
+        size = max(1, -(-count // (self._max_workers * 4)))
+        return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+    def _score(self, queries: list) -> list:
+        """
+        Score normalized queries against all the titles.
+        :param queries: list
+        :return: scores per query, in the titles order (list[list[int]])
+        """
+        if self._max_workers <= 1 or len(self._titles) < self._min_parallel:
+            return _score_titles(self._normalized, queries)
+
+        if self._executor is None:
+            # deferred, only large catalogs score in parallel
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers,
+                                                 initializer=_init_worker,
+                                                 initargs=(self._normalized,))
+        chunks = self._chunks()
+        futures = [self._executor.submit(_score_chunk, start, end, queries)
+                   for start, end in chunks]
+
+        scores = [[] for _ in queries]
+        for future in futures:
+            for query_scores, chunk_scores in zip(scores, future.result()):
+                query_scores.extend(chunk_scores)
+        return scores
+
+    def score(self, query: str) -> dict:
+        """
+        Score one query against all the titles.
+        :param query: str
+        :return: score by title (dict)
+        """
+        return self.score_many([query])[query]
+
+    def score_many(self, queries) -> dict:
+        """
+        Score many queries in one pass over the titles,
+        scoring the queries equal once normalized only once.
+        :param queries: iterable of str
+        :return: score by title, by query (dict)
+        """
+        queries = list(dict.fromkeys(queries))
+        normalized = list(dict.fromkeys(normalize_title(query) for query in queries))
+        scores = dict(zip(normalized, self._score(normalized)))
+
+        return {query: dict(zip(self._titles, scores[normalize_title(query)]))
+                for query in queries}
+
+    def best_matches(self, queries, min_score: int = 90) -> dict:
+        """
+        Find the best matching title of every query,
+        e.g. to skip the titles of an imported list already in the catalog.
+        :param queries: iterable of str
+        :param min_score: lowest score of a match (int)
+        :return: (title, score) or None by query (dict)
+        """
+        matches = {}
+        for query, scores in self.score_many(queries).items():
+            title, score = max(scores.items(), key=lambda item: item[1],
+                               default=(None, 0))
+            matches[query] = (title, score) if title is not None and score >= min_score else None
+        return matches
+
+    def close(self):
+        """
+        Shut down the process pool.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
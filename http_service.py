@@ -0,0 +1,357 @@
+"""
+HTTP/JSON service exposing the movies database
+of a single IStorage object.
+
+Run this file using terminal:
+python3 main.py movies.json serve --port 8000
+
+Endpoints:
+GET    /movies              list movies
+GET    /movies/<title>      get a movie
+GET    /search?q=<name>     search movies by name
+GET    /stats               movies statistics
+GET    /top?k=<k>           k best rated movies
+POST   /movies              add a movie from a JSON body
+PATCH  /movies/<title>      update a movie's fields from a JSON body
+DELETE /movies/<title>      delete a movie
+"""
+import heapq
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from istorage import IStorage
+from movies_analytics import MovieAnalytics
+from utils import strip_colors
+
+
+class ReadWriteLock:
+    """
+    Lock allowing concurrent readers and a single writer.
+    Waiting writers block new readers, so writers don't starve.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        """
+        Acquire the lock for reading.
+        """
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+
+    def release_read(self):
+        """
+        Release the lock for reading.
+        """
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        """
+        Acquire the lock for writing.
+        """
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self):
+        """
+        Release the lock for writing.
+        """
+        with self._condition:
+            self._writer = False
+            self._condition.notify_all()
+
+
+class MovieService:
+    """
+    Movies operations shared by all the HTTP requests.
+    The movies are parsed once and reused until a write changes them.
+    Readers run concurrently, writers are serialized.
+    """
+
+    def __init__(self, storage: IStorage):
+        self._storage = storage
+        self._lock = ReadWriteLock()
+        self._load_lock = threading.Lock()
+        self._movies = None
+
+    def _list_movies(self) -> dict:
+        """
+        Get the movies, parsing the file only
+        if it was not parsed since the last write.
+        Called with the read or write lock held.
+        :return: movies (dict)
+        """
+        movies = self._movies
+        if movies is None:
+            with self._load_lock:
+                if self._movies is None:
+                    self._movies = self._storage.list_movies()
+                movies = self._movies
+        return movies
+
+    def read(self, func):
+        """
+        Run a read operation on the movies.
+        :param func: callable taking the movies
+        :return: operation result
+        """
+        self._lock.acquire_read()
+        try:
+            return func(self._list_movies())
+        finally:
+            self._lock.release_read()
+
+    def write(self, func):
+        """
+        Run a write operation on the storage.
+        :param func: callable taking the storage and the movies
+        :return: operation result
+        """
+        self._lock.acquire_write()
+        try:
+            return func(self._storage, self._list_movies())
+        finally:
+            self._movies = None
+            self._lock.release_write()
+
+
+class MovieRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON request handler of the movies service.
+    HTTP/1.1 keeps the connections alive between requests,
+    Nagle's algorithm is disabled so the headers and the body
+    of a response are not delayed on a kept alive connection.
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    service: MovieService = None
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """
+        Silence the per request logging.
+        """
+
+    def _send_json(self, status: int, body):
+        """
+        Send a JSON response.
+        :param status: HTTP status (int)
+        :param body: JSON serializable body
+        """
+        content = json.dumps(body).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _read_json(self) -> dict:
+        """
+        Read the JSON request body.
+        :return: body (dict)
+        """
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if not isinstance(body, dict):
+            raise ValueError('Body must be a JSON object.')
+        return body
+
+    def _route(self) -> tuple:
+        """
+        Split the request path.
+        :return: resource, title and query parameters (tuple)
+        """
+        url = urlsplit(self.path)
+        parts = url.path.strip('/').split('/', 1)
+        title = unquote(parts[1]) if len(parts) > 1 else None
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        return parts[0], title, query
+
+    def _handle(self, method: str):
+        """
+        Dispatch a request and send the response,
+        turning the input errors into 400 responses.
+        :param method: HTTP method (str)
+        """
+        try:
+            status, body = self._dispatch(method, *self._route())
+        except (TypeError, ValueError) as err:
+            status, body = 400, {'error': str(err)}
+        except KeyError as err:
+            status, body = 400, {'error': f'Missing parameter {err}.'}
+        except FileNotFoundError as err:
+            status, body = 500, {'error': str(err)}
+        self._send_json(status, body)
+
+    def _dispatch(self, method: str, resource: str, title: str, query: dict) -> tuple:
+        """
+        Run the operation matching the request.
+        :return: HTTP status and body (tuple)
+        """
+        route = (method, resource, title is not None)
+        handlers = {('GET', 'movies', False): self._list,
+                    ('GET', 'movies', True): self._get,
+                    ('GET', 'search', False): self._search,
+                    ('GET', 'stats', False): self._stats,
+                    ('GET', 'top', False): self._top,
+                    ('POST', 'movies', False): self._add,
+                    ('PATCH', 'movies', True): self._update,
+                    ('DELETE', 'movies', True): self._delete}
+        if route not in handlers:
+            return 404, {'error': 'Not found.'}
+        return handlers[route](title, query)
+
+    def _list(self, _title, _query) -> tuple:
+        """
+        List all the movies.
+        """
+        return 200, self.service.read(lambda movies: movies)
+
+    def _get(self, title, _query) -> tuple:
+        """
+        Get a movie by title.
+        """
+        movie = self.service.read(lambda movies: movies.get(title))
+        if movie is None:
+            return 404, {'error': f"Movie '{title}' not found."}
+        return 200, {title: movie}
+
+    def _search(self, _title, query) -> tuple:
+        """
+        Search movies by name.
+        """
+        result = self.service.read(
+            lambda movies: MovieAnalytics(movies).search(query['q']))
+        return 200, {'exact': result['exact'],
+                     'matches': [{'title': title, 'score': score}
+                                 for title, score in result['matches']]}
+
+    def _stats(self, _title, _query) -> tuple:
+        """
+        Get the movies statistics.
+        """
+        return 200, self.service.read(
+            lambda movies: MovieAnalytics(movies).get_stats())
+
+    def _top(self, _title, query) -> tuple:
+        """
+        Get the k best rated movies.
+        """
+        k = int(query.get('k', 10))
+        top = self.service.read(lambda movies: heapq.nlargest(
+            k, movies.items(), key=lambda item: item[1]['rating']))
+        return 200, [{'title': title, **info} for title, info in top]
+
+    def _add(self, _title, _query) -> tuple:
+        """
+        Add a movie from the JSON body.
+        """
+        body = self._read_json()
+
+        def add(storage, movies):
+            if body.get('title') in movies:
+                return 409, {'error': f"Movie '{body['title']}' already exists."}
+            message = storage.add_movie(body.get('title'),
+                                        body.get('rating'),
+                                        body.get('year'),
+                                        body.get('poster', ''),
+                                        body.get('website', ''),
+                                        body.get('country', ''))
+            return 201, {'message': strip_colors(message)}
+
+        return self.service.write(add)
+
+    def _update(self, title, _query) -> tuple:
+        """
+        Update a movie's fields from the JSON body.
+        """
+        body = self._read_json()
+
+        def update(storage, movies):
+            if title not in movies:
+                return 404, {'error': f"Movie '{title}' not found."}
+            return 200, {'message': strip_colors(storage.update_fields(title, **body))}
+
+        return self.service.write(update)
+
+    def _delete(self, title, _query) -> tuple:
+        """
+        Delete a movie by title.
+        """
+        def delete(storage, movies):
+            if title not in movies:
+                return 404, {'error': f"Movie '{title}' not found."}
+            return 200, {'message': strip_colors(storage.delete_movie(title))}
+
+        return self.service.write(delete)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Handle GET requests.
+        """
+        self._handle('GET')
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """
+        Handle POST requests.
+        """
+        self._handle('POST')
+
+    def do_PATCH(self):  # pylint: disable=invalid-name
+        """
+        Handle PATCH requests.
+        """
+        self._handle('PATCH')
+
+    def do_DELETE(self):  # pylint: disable=invalid-name
+        """
+        Handle DELETE requests.
+        """
+        self._handle('DELETE')
+
+
+def create_server(storage: IStorage, host: str = '127.0.0.1',
+                  port: int = 8000) -> ThreadingHTTPServer:
+    """
+    Create the movies HTTP server, one thread per connection.
+    :param storage: IStorage
+    :param host: str
+    :param port: int
+    :return: server (ThreadingHTTPServer)
+    """
+    handler = type('BoundMovieRequestHandler', (MovieRequestHandler,),
+                   {'service': MovieService(storage)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(storage: IStorage, host: str = '127.0.0.1', port: int = 8000):
+    """
+    Serve the movies until interrupted.
+    :param storage: IStorage
+    :param host: str
+    :param port: int
+    """
+    server = create_server(storage, host, port)
+    print(f'Serving movies on http://{host}:{server.server_address[1]}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,251 @@
+"""
+Offline bulk ingest of movies from IMDb dataset dumps.
+
+Reads the title.basics and title.ratings TSV files, optionally gzip
+compressed, both sorted by title id (tconst) as IMDb publishes them.
+The files are read in blocks and merge-joined on the title id,
+so memory is bounded by a block and a batch whatever their size.
+The joined movies are filtered by type, year and number of votes,
+and saved with IStorage.add_movies in batches.
+The basics blocks may be parsed in a process pool.
+"""
+import functools
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+from file_codecs import open_file
+from istorage import IStorage
+from metadata_refresh import IMDB_BASE_URL
+
+# IMDb null value
+MISSING = '\\N'
+
+BASICS_COLUMNS = ('tconst', 'titleType', 'primaryTitle', 'startYear')
+RATINGS_COLUMNS = ('tconst', 'averageRating', 'numVotes')
+
+
+def _column_indexes(header: str, columns: tuple, file_path: str) -> tuple:
+    """
+    Get the indexes of the needed columns from a TSV header.
+    :param header: header line (str)
+    :param columns: column names (tuple)
+    :param file_path: str
+    :return: column indexes (tuple)
+    """
+    names = header.rstrip('\r\n').split('\t')
+    missing = [name for name in columns if name not in names]
+    if missing:
+        raise ValueError(f"The {file_path} file has no '{missing[0]}' column.")
+    return tuple(names.index(name) for name in columns)
+
+
+def _read_blocks(file, block_size: int):
+    """
+    Read a text file in blocks of whole lines.
+    :param file: text file object
+    :param block_size: characters per read (int)
+    :return: blocks (generator of str)
+    """
+    rest = ''
+    while True:
+        block = file.read(block_size)
+        if not block:
+            break
+        block = rest + block
+        end = block.rfind('\n') + 1
+        rest = block[end:]
+        if end:
+            yield block[:end]
+    if rest:
+        yield rest
+
+
+def _parse_basics(block: str, indexes: tuple, title_types: frozenset | None,
+                  min_year: int, max_year: int) -> tuple[int, list]:
+    """
+    Parse and filter a block of title.basics lines,
+    run in a worker process when parsing in parallel.
+    :param block: lines (str)
+    :param indexes: BASICS_COLUMNS indexes (tuple)
+    :param title_types: kept title types, all if None (frozenset | None)
+    :param min_year: int
+    :param max_year: int
+    :return: number of lines and (key, tconst, title, year) rows (tuple[int, list])
+    """
+    id_index, type_index, title_index, year_index = indexes
+    lines = block.splitlines()
+    rows = []
+    for line in lines:
+        cells = line.split('\t')
+        if title_types is not None and cells[type_index] not in title_types:
+            continue
+        year = cells[year_index]
+        if year == MISSING:
+            continue
+        year = int(year)
+        if min_year <= year <= max_year:
+            tconst = cells[id_index]
+            rows.append((int(tconst[2:]), tconst, cells[title_index], year))
+    return len(lines), rows
+
+
+def _parse_ratings(block: str, indexes: tuple, min_votes: int) -> list:
+    """
+    Parse and filter a block of title.ratings lines.
+    :param block: lines (str)
+    :param indexes: RATINGS_COLUMNS indexes (tuple)
+    :param min_votes: int
+    :return: (key, rating) rows, the rating not parsed yet (list)
+    """
+    id_index, rating_index, votes_index = indexes
+    rows = []
+    for line in block.splitlines():
+        cells = line.split('\t')
+        if min_votes <= 0 or int(cells[votes_index]) >= min_votes:
+            rows.append((int(cells[id_index][2:]), cells[rating_index]))
+    return rows
+
+
+def _map_blocks(parse, blocks, max_workers: int | None):
+    """
+    Parse blocks in order, in a process pool if max_workers > 1,
+    with a bounded number of blocks in flight.
+    :param parse: picklable block parser
+    :param blocks: iterable of str
+    :param max_workers: int | None
+    :return: parsed blocks (generator)
+    """
+    if not max_workers or max_workers <= 1:
+        yield from map(parse, blocks)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for block in blocks:
+            pending.append(executor.submit(parse, block))
+            if len(pending) >= max_workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def merge_join(basics, ratings):
+    """
+    Join two streams of rows sorted by title id.
+    :param basics: iterable of (key, tconst, title, year)
+    :param ratings: iterable of (key, rating as str)
+    :return: (tconst, title, year, rating) (generator)
+    """
+    ratings = iter(ratings)
+    rating = next(ratings, None)
+    previous = -1
+    for key, tconst, title, year in basics:
+        if key <= previous:
+            raise ValueError('The title.basics rows must be sorted by tconst.')
+        previous = key
+        while rating is not None and rating[0] < key:
+            rating_key = rating[0]
+            rating = next(ratings, None)
+            if rating is not None and rating[0] <= rating_key:
+                raise ValueError('The title.ratings rows must be sorted by tconst.')
+        if rating is None:
+            return
+        if rating[0] == key:
+            yield tconst, title, year, float(rating[1])
+
+
+def ingest(storage: IStorage,
+           basics_path: str,
+           ratings_path: str,
+           title_types=('movie',),
+           min_year: int = None,
+           max_year: int = None,
+           min_votes: int = 0,
+           batch_size: int = 10000,
+           max_workers: int = None,
+           block_size: int = 1024 * 1024,
+           progress=None) -> dict:
+    """
+    Add the movies of IMDb title.basics and title.ratings dumps to a storage.
+    The titles already in the storage, and the later titles
+    of a title repeated in the dumps, are skipped.
+    :param storage: IStorage
+    :param basics_path: title.basics TSV file, optionally compressed (str)
+    :param ratings_path: title.ratings TSV file, optionally compressed (str)
+    :param title_types: kept title types, all if None (iterable | None)
+    :param min_year: int | None
+    :param max_year: int | None
+    :param min_votes: int
+    :param batch_size: number of movies per write (int)
+    :param max_workers: processes parsing title.basics, in process if None (int | None)
+    :param block_size: characters per block (int)
+    :param progress: stream to report the progress to, e.g. sys.stderr
+    :return: summary (dict)
+    """
+    if not isinstance(batch_size, int):
+        raise TypeError('Batch size must be int.')
+    if batch_size < 1:
+        raise ValueError('Batch size must be at least 1.')
+
+    title_types = frozenset(title_types) if title_types is not None else None
+    lines = matched = added = 0
+    start = time.perf_counter()
+
+    def basics_rows(parsed_blocks):
+        nonlocal lines
+        for count, rows in parsed_blocks:
+            lines += count
+            yield from rows
+
+    def write_batch(batch: list):
+        nonlocal added
+        added += storage.add_movies(batch)
+        if progress is not None:
+            elapsed = time.perf_counter() - start
+            rate = lines / elapsed if elapsed else 0.0
+            print(f'{lines} rows read, {added} movies added, {rate:.0f} rows/s',
+                  file=progress, flush=True)
+
+    with open_file(basics_path, 'r', encoding='utf8') as basics_file, \
+            open_file(ratings_path, 'r', encoding='utf8') as ratings_file:
+        parse_basics = functools.partial(
+            _parse_basics,
+            indexes=_column_indexes(basics_file.readline(), BASICS_COLUMNS, basics_path),
+            title_types=title_types,
+            min_year=min_year if min_year is not None else 0,
+            max_year=max_year if max_year is not None else 9999)
+        parse_ratings = functools.partial(
+            _parse_ratings,
+            indexes=_column_indexes(ratings_file.readline(), RATINGS_COLUMNS, ratings_path),
+            min_votes=min_votes)
+
+        basics = basics_rows(_map_blocks(parse_basics,
+                                         _read_blocks(basics_file, block_size),
+                                         max_workers))
+        ratings = chain.from_iterable(map(parse_ratings,
+                                          _read_blocks(ratings_file, block_size)))
+
+        batch = []
+        for tconst, title, year, rating in merge_join(basics, ratings):
+            matched += 1
+            batch.append((title, {'rating': rating,
+                                  'year': year,
+                                  'notes': '',
+                                  'poster': '',
+                                  'website': IMDB_BASE_URL + tconst,
+                                  'country': ''}))
+            if len(batch) == batch_size:
+                write_batch(batch)
+                batch = []
+        if batch:
+            write_batch(batch)
+
+    elapsed = time.perf_counter() - start
+    return {'rows': lines,
+            'matched': matched,
+            'added': added,
+            'skipped': matched - added,
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round(lines / elapsed) if elapsed else None}
@@ -0,0 +1,198 @@
+"""
+Instrumentation layer for the movie app.
+Records per command invocation:
+wall time, storage read/write time and bytes,
+network time and peak memory.
+
+Disabled by default, in which case
+every hook is a cheap no-op.
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+
+
+class CommandRecord:
+    """
+    Measurements collected for one command invocation.
+    """
+
+    def __init__(self, sequence: int, name: str):
+        self.sequence = sequence
+        self.name = name
+        self.wall_time = 0.0
+        self.read_time = 0.0
+        self.write_time = 0.0
+        self.network_time = 0.0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.peak_memory = 0
+
+    def to_dict(self) -> dict:
+        """
+        Serialize the record to a dictionary.
+        :return: record (dict)
+        """
+        return {'sequence': self.sequence,
+                'command': self.name,
+                'wall_time': self.wall_time,
+                'read_time': self.read_time,
+                'write_time': self.write_time,
+                'network_time': self.network_time,
+                'bytes_read': self.bytes_read,
+                'bytes_written': self.bytes_written,
+                'peak_memory': self.peak_memory}
+
+
+class Instrumentation:
+    """
+    Collects a CommandRecord per command invocation,
+    optionally writing a JSON-lines trace
+    and a cProfile output file per command.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.records = []
+        self._current = None
+        self._trace_path = None
+        self._profile_dir = None
+
+    def enable(self, trace_path: str = None, profile_dir: str = None):
+        """
+        Enable the instrumentation.
+        :param trace_path: JSON-lines trace file path (str | None)
+        :param profile_dir: cProfile output directory (str | None)
+        """
+        import tracemalloc  # deferred, only needed once enabled
+
+        self.enabled = True
+        self._trace_path = trace_path
+        self._profile_dir = profile_dir
+
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        """
+        Disable the instrumentation.
+        """
+        import tracemalloc  # deferred, only needed once enabled
+
+        self.enabled = False
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def command(self, name: str):
+        """
+        Measure one command invocation.
+        :param name: command name (str)
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        import cProfile  # deferred, only needed once enabled
+        import tracemalloc
+
+        record = CommandRecord(len(self.records) + 1, name)
+        self._current = record
+
+        profiler = cProfile.Profile() if self._profile_dir else None
+
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler:
+                profiler.disable()
+            record.wall_time = time.perf_counter() - start
+            record.peak_memory = tracemalloc.get_traced_memory()[1]
+            self._current = None
+            self.records.append(record)
+
+            if profiler:
+                slug = ''.join(char if char.isalnum() else '_'
+                               for char in name.lower())
+                profiler.dump_stats(os.path.join(
+                    self._profile_dir, f'{record.sequence:04d}-{slug}.prof'))
+
+            if self._trace_path:
+                with open(self._trace_path, 'a', encoding='utf8') as file:
+                    file.write(json.dumps(record.to_dict()) + '\n')
+
+    @contextmanager
+    def measure(self, category: str, file_path: str = None, append: bool = False):
+        """
+        Measure a storage read, a storage write
+        or a network call inside the current command.
+        The bytes are taken from the file size.
+        :param category: 'read', 'write' or 'network' (str)
+        :param file_path: file read or written (str | None)
+        :param append: True if the write appends to the file (bool)
+        """
+        record = self._current
+        if record is None:
+            yield
+            return
+
+        size_before = 0
+        if append and file_path and os.path.isfile(file_path):
+            size_before = os.path.getsize(file_path)
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            size = 0
+            if file_path and os.path.isfile(file_path):
+                size = os.path.getsize(file_path)
+
+            if category == 'read':
+                record.read_time += elapsed
+                record.bytes_read += size
+            elif category == 'write':
+                record.write_time += elapsed
+                record.bytes_written += size - size_before
+            elif category == 'network':
+                record.network_time += elapsed
+
+    def summary(self) -> str:
+        """
+        Format the collected records as a summary table,
+        one row per command name.
+        :return: summary table (str)
+        """
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record.name, [0, 0.0, 0.0, 0.0, 0.0, 0, 0, 0])
+            total[0] += 1
+            total[1] += record.wall_time
+            total[2] += record.read_time
+            total[3] += record.write_time
+            total[4] += record.network_time
+            total[5] += record.bytes_read
+            total[6] += record.bytes_written
+            total[7] = max(total[7], record.peak_memory)
+
+        header = f"{'command':<28}{'calls':>6}{'wall s':>10}{'read s':>10}" \
+                 f"{'write s':>10}{'net s':>10}{'read B':>12}" \
+                 f"{'written B':>12}{'peak B':>12}"
+        rows = [header, '-' * len(header)]
+        for name, total in totals.items():
+            rows.append(f"{name:<28}{total[0]:>6}{total[1]:>10.4f}{total[2]:>10.4f}"
+                        f"{total[3]:>10.4f}{total[4]:>10.4f}{total[5]:>12}"
+                        f"{total[6]:>12}{total[7]:>12}")
+        return "\n".join(rows)
+
+
+instrumentation = Instrumentation()
@@ -1,11 +1,16 @@
 """
 IStorage Interface that exposes all the 4 CRUD commands.
-Two classed that implement these interfaces:
+Four classes that implement these interfaces:
 1. StorageJson
 2. StorageCsv
+3. StorageNdjson
+4. StorageSharded
 """
 from abc import ABC, abstractmethod
 
+from change_feed import ChangeFeed
+from utils import colors, validate_movie_fields, validate_new_movie
+
 
 class IStorage(ABC):
     """
@@ -13,7 +18,50 @@ class IStorage(ABC):
     an abstract class to be implemented by:
     1. StorageJson
     2. StorageCsv
+    3. StorageNdjson
+    4. StorageSharded
     """
+    _change_feed = None
+
+    @property
+    def change_feed(self) -> ChangeFeed:
+        """
+        The feed publishing the changes made by
+        add_movie, delete_movie and update_movie.
+        :return: feed (ChangeFeed)
+        """
+        if self._change_feed is None:
+            self.set_change_feed(ChangeFeed())
+        return self._change_feed
+
+    def set_change_feed(self, change_feed: ChangeFeed):
+        """
+        Use a feed, e.g. one persisting a changelog,
+        to publish the changes.
+        :param change_feed: ChangeFeed
+        """
+        self._change_feed = change_feed
+
+    def _emit_change(self, op: str, title: str,
+                     old: dict = None, new: dict = None):
+        """
+        Publish a change if a feed is in use.
+        :param op: 'add', 'delete' or 'update' (str)
+        :param title: str
+        :param old: movie info before the change (dict | None)
+        :param new: movie info after the change (dict | None)
+        """
+        if self._change_feed is not None:
+            self._change_feed.publish(op, title, old, new)
+
+    def get_version(self):
+        """
+        Returns a token identifying the current version
+        of the stored movies, which changes when the movies change.
+        Used to cache data computed from the movies.
+        :return: version (hashable | None if not supported)
+        """
+        return None
 
     @abstractmethod
     def list_movies(self) -> dict:
@@ -25,6 +73,27 @@ class IStorage(ABC):
         :return: movies (dict)
         """
 
+    def iter_movies(self):
+        """
+        Iterate over the movies as (title, info) pairs.
+        Backends override it to stream the movies
+        without loading them all in memory.
+        :return: movies (iterator of tuple[str, dict])
+        """
+        return iter(self.list_movies().items())
+
+    def read_columns(self, names) -> dict:
+        """
+        Returns some columns of the movies, e.g. only the ratings.
+        Backends override it to skip building the movies.
+        :param names: column names, title or movie fields
+        :return: values by column name (dict[str, list])
+        """
+        movies = self.list_movies()
+        return {name: list(movies) if name == 'title'
+                else [info[name] for info in movies.values()]
+                for name in names}
+
     @abstractmethod
     def add_movie(self,
                   title: str,
@@ -47,6 +116,27 @@ class IStorage(ABC):
         :returns: add message (str | None)
         """
 
+    def add_movies(self, movies) -> int:
+        """
+        Adds several movies, skipping the titles already in the database.
+        Backends override it to save all the movies in one write.
+        :param movies: iterable of (title, info) with all the movie fields
+        :return: number of added movies (int)
+        """
+        titles = set(self.read_columns(['title'])['title'])
+        added = 0
+        for title, info in movies:
+            validate_new_movie(title, info)
+            if title in titles:
+                continue
+            self.add_movie(title, info['rating'], info['year'],
+                           info['poster'], info['website'], info['country'])
+            if info['notes']:
+                self.update_movie(title, info['notes'])
+            titles.add(title)
+            added += 1
+        return added
+
     @abstractmethod
     def delete_movie(self, title: str) -> str:
         """
@@ -58,6 +148,27 @@ class IStorage(ABC):
         :return: delete message (str)
         """
 
+    def delete_many(self, titles, changes: dict = None) -> int:
+        """
+        Deletes several movies, and updates the fields of others,
+        e.g. the movies they are merged into.
+        Backends override it to save all the changes in one write.
+        :param titles: iterable of titles to delete
+        :param changes: new field values by title (dict | None)
+        :return: number of deleted movies (int)
+        """
+        titles = set(titles)
+        movies = self.list_movies()
+        if changes:
+            self.update_many({title: fields for title, fields in changes.items()
+                              if title not in titles})
+        deleted = 0
+        for title in titles:
+            if title in movies:
+                self.delete_movie(title)
+                deleted += 1
+        return deleted
+
     @abstractmethod
     def update_movie(self, title: str, notes: str) -> str:
         """
@@ -69,3 +180,54 @@ class IStorage(ABC):
         :param notes: str
         :return: update message (str)
         """
+
+    def update_fields(self, title: str, **fields) -> str:
+        """
+        Updates any subset of a movie's fields
+        (rating, year, notes, poster, website, country).
+        Backends override it to update the movie in one storage operation,
+        this default updates only the notes with update_movie,
+        or else deletes the movie and adds it again.
+        :param title: str
+        :param fields: new field values
+        :return: update message (str)
+        """
+        if not isinstance(title, str):
+            raise TypeError('Title must be string.')
+        if not title:
+            raise ValueError('Title must not be empty.')
+        validate_movie_fields(fields)
+
+        if set(fields) == {'notes'}:
+            return self.update_movie(title, fields['notes'])
+
+        movies = self.list_movies()
+        if title not in movies:
+            return colors.get('red') + \
+                f"Movie '{title}' not found." + \
+                colors.get('default')
+
+        info = {**movies[title], **fields}
+        self.delete_movie(title)
+        self.add_movie(title, info['rating'], info['year'],
+                       info['poster'], info['website'], info['country'])
+        if info['notes']:
+            self.update_movie(title, info['notes'])
+        return colors.get('red') + \
+            f"Movie '{title}' successfully updated." + \
+            colors.get('default')
+
+    def update_many(self, changes: dict) -> int:
+        """
+        Updates the fields of several movies.
+        Backends override it to save all the changes in one write.
+        :param changes: new field values by title (dict)
+        :return: number of updated movies (int)
+        """
+        movies = self.list_movies()
+        updated = 0
+        for title, fields in changes.items():
+            if title in movies:
+                self.update_fields(title, **fields)
+                updated += 1
+        return updated
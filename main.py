@@ -5,11 +5,87 @@ Run this file using terminal:
 python3 main.py movies.json
 or
 python3 main.py movies.csv
+or a newline-delimited JSON file, one movie per line
+python3 main.py movies.ndjson
+or a gzip, bz2 or lzma compressed file
+python3 main.py movies.json.gz
+or a shard directory created by StorageSharded.create
+python3 main.py movies.shards
+
+Add --profile to print a per command timing summary on exit,
+--trace to write a JSON-lines trace per command and
+--cprofile to write a cProfile output file per command:
+python3 main.py movies.json --profile --trace trace.jsonl --cprofile profiles
+
+Add --changelog to append every movie change to a JSON-lines changelog:
+python3 main.py movies.json --changelog movies.changelog.jsonl
+
+Add --cache-dir to load the unchanged movies file from a parsed cache:
+python3 main.py movies.json --cache-dir .movies_cache
+
+Add a command to run it without the interactive menu,
+printing the result as JSON, e.g.:
+python3 main.py movies.json stats
+python3 main.py movies.json add "Titanic" --rating 7.9 --year 1997
+or run a batch of commands, one per line, read from stdin:
+python3 main.py movies.json batch < commands.txt
+
+Serve the movies as a HTTP/JSON service:
+python3 main.py movies.json serve --port 8000
+
+Convert the movies to another file, streaming in batches:
+python3 main.py movies.json convert movies.csv.gz --checkpoint convert.ckpt
 """
 import argparse
+import json
+import os
+import sys
+
+from batch_cli import BatchRunner, add_command_parsers
+from change_feed import ChangeFeed
+from file_codecs import strip_compression
+from instrumentation import instrumentation
 from movie_app import MovieApp
 from storage_csv import StorageCsv
 from storage_json import StorageJson
+from storage_ndjson import StorageNdjson
+from storage_sharded import StorageSharded
+
+
+def open_storage(file_path: str, cache_dir: str = None):
+    """
+    Create the IStorage object of a movies file or shard directory.
+    :param file_path: str
+    :param cache_dir: parsed file cache directory (str | None)
+    :return: storage (IStorage)
+    """
+    # movies.json.gz is a compressed JSON file
+    file_extension = strip_compression(file_path).split('.')[-1]
+
+    storage_classes = {
+        'json': StorageJson,
+        'csv': StorageCsv,
+        'ndjson': StorageNdjson,
+        'jsonl': StorageNdjson
+    }
+
+    storage_class = storage_classes.get(file_extension)
+    if os.path.isdir(file_path):
+        storage_class = StorageSharded
+    if storage_class is None:
+        raise ValueError(f'The {file_path} file format is not supported.')
+
+    return storage_class(file_path, cache_dir=cache_dir)
+
+
+def close_storage(storage):
+    """
+    Shut down the process pool of a storage loading in parallel,
+    e.g. a shard directory.
+    :param storage: IStorage
+    """
+    if hasattr(storage, 'close'):
+        storage.close()
 
 
 def main():
@@ -19,21 +95,74 @@ def main():
     """
     parser = argparse.ArgumentParser()
     parser.add_argument('file_path', help='Movie file path')
-    args = parser.parse_args()
+    parser.add_argument('--profile', action='store_true',
+                        help='Print a timing summary per command on exit')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='Write a JSON-lines trace record per command')
+    parser.add_argument('--cprofile', metavar='DIR',
+                        help='Write a cProfile output file per command')
+    parser.add_argument('--changelog', metavar='FILE',
+                        help='Append every movie change to a JSON-lines changelog')
+    parser.add_argument('--cache-dir', metavar='DIR',
+                        help='Cache the parsed movies file in a directory')
 
-    file_path = f'_static/{args.file_path}'
+    subparsers = parser.add_subparsers(dest='command')
+    add_command_parsers(subparsers)
+    subparsers.add_parser('batch', help='Run commands read from stdin, one per line')
+    serve_parser = subparsers.add_parser('serve', help='Serve the movies over HTTP')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8000)
+    convert_parser = subparsers.add_parser(
+        'convert', help='Stream the movies to another file or shard directory')
+    convert_parser.add_argument('target', help='Target movie file path')
+    convert_parser.add_argument('--batch-size', type=int, default=1000)
+    convert_parser.add_argument('--shards', type=int, default=8,
+                                help='Number of shards of a new .shards target directory')
+    convert_parser.add_argument('--checkpoint', metavar='FILE',
+                                help='Checkpoint file to resume an interrupted conversion')
 
-    file_extension = file_path.split('.')[-1]
-
-    storage_classes = {
-        'json': StorageJson,
-        'csv': StorageCsv
-    }
+    args = parser.parse_args()
 
-    storage_class = storage_classes.get(file_extension)
+    if args.profile or args.trace or args.cprofile:
+        instrumentation.enable(args.trace, args.cprofile)
 
-    movie_app = MovieApp(storage_class(file_path))
-    movie_app.run()
+    file_path = f'_static/{args.file_path}'
+    storage = open_storage(file_path, args.cache_dir)
+    if args.changelog:
+        storage.set_change_feed(ChangeFeed(args.changelog))
+    # the duplicate titles index is saved for the next add commands
+    runner = BatchRunner(storage, duplicates_index_path=f'{file_path}.dup-index')
+    app = None
+    try:
+        if args.command is None:
+            app = MovieApp(storage, notes_index_path=f'{file_path}.notes-index',
+                           duplicates_index_path=f'{file_path}.dup-index')
+            app.run()
+        elif args.command == 'batch':
+            runner.run_batch(sys.stdin, sys.stdout)
+        elif args.command == 'serve':
+            from http_service import serve
+            serve(storage, args.host, args.port)
+        elif args.command == 'convert':
+            from convert import convert, create_empty_file
+            target_path = f'_static/{args.target}'
+            create_empty_file(target_path, args.shards)
+            target = open_storage(target_path)
+            try:
+                print(json.dumps(convert(storage, target, args.batch_size,
+                                         args.checkpoint, sys.stderr, target_path)))
+            finally:
+                close_storage(target)
+        else:
+            print(json.dumps(runner.run(args)))
+    finally:
+        # e.g. on Ctrl-C: stop the scorer pool and save the indexes
+        if app is not None:
+            app.close()
+        runner.close()
+        close_storage(storage)
+        if args.profile:
+            print(instrumentation.summary(), file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,212 @@
+"""
+Bulk metadata refresh job re-syncing the movies
+rating, poster and country from the OMDb API.
+
+The movies are fetched concurrently with bounded parallelism,
+the responses are cached with their ETag / Last-Modified headers
+for conditional requests, and only the changed movies are saved,
+in one batched write. An interrupted job resumes from its checkpoint file.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from istorage import IStorage
+
+API_KEY = 'YOUR_API_KEY'
+OMDB_URL = f'http://www.omdbapi.com/?apikey={API_KEY}'
+IMDB_BASE_URL = 'https://www.imdb.com/title/'
+
+
+def _load_json(file_path: str, default):
+    """
+    Load a JSON file, or a default value if it is missing or corrupted.
+    :param file_path: str | None
+    :param default: value returned without a valid file
+    :return: loaded value
+    """
+    if not file_path or not os.path.isfile(file_path):
+        return default
+    try:
+        with open(file_path, 'r', encoding='utf8') as file:
+            return json.load(file)
+    except (ValueError, OSError):
+        return default
+
+
+def _save_json(file_path: str, value):
+    """
+    Save a JSON file atomically, so an interruption
+    never leaves a partial file.
+    :param file_path: str
+    :param value: JSON serializable value
+    """
+    temp_path = f'{file_path}.tmp'
+    with open(temp_path, 'w', encoding='utf8') as file:
+        json.dump(value, file)
+    os.replace(temp_path, file_path)
+
+
+def movie_fields_from_response(response: dict) -> dict:
+    """
+    Get the refreshed movie fields from an OMDb response,
+    skipping the values OMDb doesn't know.
+    :param response: dict
+    :return: fields (dict)
+    """
+    fields = {}
+    rating = response.get('imdbRating')
+    if rating and rating != 'N/A':
+        fields['rating'] = float(rating)
+    if response.get('Poster') and response['Poster'] != 'N/A':
+        fields['poster'] = response['Poster']
+    if response.get('Country') and response['Country'] != 'N/A':
+        fields['country'] = response['Country']
+    return fields
+
+
+class MetadataRefreshJob:
+    """
+    Refreshes the rating, poster and country of all the movies
+    of a IStorage object from the OMDb API.
+    """
+
+    def __init__(self, storage: IStorage,
+                 base_url: str = OMDB_URL,
+                 max_workers: int = 8,
+                 cache_path: str = None,
+                 checkpoint_path: str = None,
+                 checkpoint_every: int = 50,
+                 timeout: float = 5):
+        self._storage = storage
+        self._base_url = base_url
+        self._max_workers = max_workers
+        self._cache_path = cache_path
+        self._checkpoint_path = checkpoint_path
+        self._checkpoint_every = checkpoint_every
+        self._timeout = timeout
+        self._cache = _load_json(cache_path, {})
+        self._lock = threading.Lock()
+        self._sessions = threading.local()
+
+    def _session(self):
+        """
+        Get the requests session of the current worker thread.
+        :return: session (requests.Session)
+        """
+        import requests  # deferred, only the refresh needs it
+
+        if not hasattr(self._sessions, 'session'):
+            self._sessions.session = requests.Session()
+        return self._sessions.session
+
+    def _request_url(self, title: str, info: dict) -> str:
+        """
+        Get the OMDb url of a movie,
+        by IMDb id when the website is known, else by title.
+        :param title: str
+        :param info: dict
+        :return: url (str)
+        """
+        website = info.get('website', '')
+        if website.startswith(IMDB_BASE_URL) and website != IMDB_BASE_URL:
+            return f"{self._base_url}&i={website[len(IMDB_BASE_URL):].strip('/')}"
+        return f'{self._base_url}&t={title}'
+
+    def fetch(self, title: str, info: dict) -> tuple:
+        """
+        Fetch a movie from OMDb, sending the cached
+        validators for a conditional request.
+        :param title: str
+        :param info: dict
+        :return: OMDb response and whether it was not modified (tuple)
+        """
+        url = self._request_url(title, info)
+        with self._lock:
+            cached = self._cache.get(url)
+
+        headers = {}
+        if cached and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+        response = self._session().get(url, headers=headers, timeout=self._timeout)
+        if response.status_code == 304 and cached:
+            return cached['body'], True
+
+        response.raise_for_status()
+        body = response.json()
+
+        if response.headers.get('ETag') or response.headers.get('Last-Modified'):
+            with self._lock:
+                self._cache[url] = {'etag': response.headers.get('ETag'),
+                                    'last_modified': response.headers.get('Last-Modified'),
+                                    'body': body}
+        return body, False
+
+    def _save_checkpoint(self, done: set, changes: dict):
+        """
+        Save the progress of the job.
+        :param done: refreshed titles (set)
+        :param changes: changed fields by title (dict)
+        """
+        if self._checkpoint_path:
+            _save_json(self._checkpoint_path, {'done': sorted(done), 'changes': changes})
+        if self._cache_path:
+            with self._lock:
+                _save_json(self._cache_path, self._cache)
+
+    def run(self) -> dict:
+        """
+        Refresh all the movies and save the changed ones.
+        :return: summary (dict)
+        """
+        import requests  # deferred, only the refresh needs it
+
+        checkpoint = _load_json(self._checkpoint_path, {})
+        done = set(checkpoint.get('done', []))
+        changes = checkpoint.get('changes', {})
+        movies = self._storage.list_movies()
+        pending = {title: info for title, info in movies.items() if title not in done}
+
+        errors = {}
+        not_modified = 0
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            futures = {executor.submit(self.fetch, title, info): title
+                       for title, info in pending.items()}
+
+            for completed, future in enumerate(as_completed(futures), start=1):
+                title = futures[future]
+                try:
+                    response, cached = future.result()
+                    # e.g. a rating that isn't a number fails this movie only
+                    fields = movie_fields_from_response(response)
+                except (requests.exceptions.RequestException, ValueError) as err:
+                    errors[title] = str(err)
+                    continue
+
+                not_modified += cached
+                fields = {name: value for name, value in fields.items()
+                          if movies[title].get(name) != value}
+                if fields:
+                    changes[title] = fields
+                done.add(title)
+
+                if completed % self._checkpoint_every == 0:
+                    self._save_checkpoint(done, changes)
+
+        self._save_checkpoint(done, changes)
+
+        # only the changed movies, in a single batched write
+        updated = self._storage.update_many(changes) if changes else 0
+
+        if not errors and self._checkpoint_path and os.path.isfile(self._checkpoint_path):
+            os.remove(self._checkpoint_path)
+
+        return {'checked': len(pending),
+                'not_modified': not_modified,
+                'updated': updated,
+                'changes': changes,
+                'errors': errors}
@@ -5,8 +5,6 @@ movies functions calling.
 """
 import json
 
-import requests
-
 from utils \
     import \
     colors, \
@@ -15,9 +13,16 @@ from utils \
     user_input_choice, \
     exit_app
 
+from dedup import DuplicateIndex, duplicate_warning
+from fuzzy_scoring import FuzzyScorer
+from instrumentation import instrumentation
 from istorage import IStorage
+from movies_aggregates import AggregatesCache, format_grouped_stats
+from movie_features import MovieFeaturesCache, format_similar_movies
 from movies_analytics import MovieAnalytics
-from movies_website_generation import WebsiteGeneration
+from notes_index import NotesIndex
+from random_picker import RandomMoviePicker
+from streaming_stats import StreamingStats
 
 
 class MovieApp:
@@ -30,8 +35,21 @@ class MovieApp:
     _BASE_URL_KEY = f'http://www.omdbapi.com/?apikey={_API_KEY}'
     _IMDB_BASE_URL = 'https://www.imdb.com/title/'
 
-    def __init__(self, storage: IStorage):
+    def __init__(self, storage: IStorage, notes_index_path: str = None,
+                 duplicates_index_path: str = None):
         self._storage = storage
+        self._aggregates = AggregatesCache(storage)
+        self._features = MovieFeaturesCache(storage, use_notes=True)
+        # (version, picker) of the random movie command
+        self._picker = None
+        # (version, scorer) of the search command
+        self._scorer = None
+        # notes search index, created by the first notes search
+        self._notes_index = None
+        self._notes_index_path = notes_index_path
+        # duplicate titles index, created by the first add
+        self._duplicates = None
+        self._duplicates_index_path = duplicates_index_path
 
     def _command_list_movies(self) -> str:
         """
@@ -65,8 +83,11 @@ class MovieApp:
         :param title: str
         :return: movie info (json)
         """
-        response = requests.get(f'{MovieApp._BASE_URL_KEY}&t={title}', timeout=5)
-        response.raise_for_status()  # check if there was an error with the request
+        import requests  # deferred, only the add command needs it
+
+        with instrumentation.measure('network'):
+            response = requests.get(f'{MovieApp._BASE_URL_KEY}&t={title}', timeout=5)
+            response.raise_for_status()  # check if there was an error with the request
 
         return response.json()
 
@@ -81,12 +102,57 @@ class MovieApp:
         while not title:
             title = input('Enter a movie title: ')
 
+        return self.add_movie(title, self._confirm_duplicate)
+
+    @staticmethod
+    def _confirm_duplicate(warning: str) -> bool:
+        """
+        Ask whether to add a movie that looks like a duplicate.
+        :param warning: duplicate warning (str)
+        :return: True to add the movie (bool)
+        """
+        answer = input(f'{warning}\nAdd it anyway? (y/n): ')
+        return answer.strip().lower() == 'y'
+
+    def likely_duplicates(self, title: str, year: int) -> list:
+        """
+        Get the stored movies a new movie likely duplicates.
+        :param title: str
+        :param year: int
+        :return: (title, similarity) pairs (list[tuple[str, float]])
+        """
+        if self._duplicates is None:
+            self._duplicates = DuplicateIndex(self._storage,
+                                              index_path=self._duplicates_index_path)
+        return self._duplicates.likely_duplicates(title, year)
+
+    def add_movie(self, title: str, confirm=None) -> str:
+        """
+        Adds a movie to the movies database
+        based on the movie info
+        from OMDBAPI and IMDB websites.
+        A movie that looks like a duplicate of a stored movie
+        is added only if confirm returns True.
+        :param title: str
+        :param confirm: function of the duplicate warning, None to never add a duplicate
+        :return: add message (str)
+        """
+        import requests  # deferred, only the add command needs it
+
         try:
             response = self._fetch_movie_api_response(title)
+            title = response.get('Title', '')
+            year = int(response.get('Year', 0))
+
+            duplicates = self.likely_duplicates(title, year) if title else []
+            if duplicates:
+                warning = duplicate_warning(title, duplicates)
+                if confirm is None or not confirm(warning):
+                    return warning
 
-            return self._storage.add_movie(response.get('Title', ''),
+            return self._storage.add_movie(title,
                                            float(response.get('imdbRating', 0)),
-                                           int(response.get('Year', 0)),
+                                           year,
                                            response.get('Poster', ''),
                                            MovieApp._IMDB_BASE_URL + response.get('imdbID', ''),
                                            response.get('Country', ''))
@@ -148,20 +214,45 @@ class MovieApp:
     def _command_movie_stats(self) -> str:
         """
         Get movie statistics,
-        average, median ratings,
+        average, approximate median ratings,
         best and worst movies.
         :return: movie statistics (str)
         """
-        return MovieAnalytics(self._storage.list_movies()) \
-            .get_movie_stats()
+        # streamed, for catalogs that don't fit in memory
+        return StreamingStats().update(self._storage.iter_movies()).get_movie_stats()
+
+    def _get_picker(self) -> RandomMoviePicker:
+        """
+        Get the random movie picker,
+        built again only when the storage version changes.
+        :return: picker (RandomMoviePicker)
+        """
+        version = self._storage.get_version()
+        if self._picker is None or version is None or self._picker[0] != version:
+            self._picker = (version, RandomMoviePicker(self._storage.list_movies()))
+        return self._picker[1]
 
     def _command_random_movie(self) -> str:
         """
         Get a random movie name and rating.
         :return: random movie (str)
         """
-        return MovieAnalytics(self._storage.list_movies()) \
-            .get_random_movie()
+        picker = self._get_picker()
+        return MovieAnalytics(picker.movies).get_random_movie(picker)
+
+    def _get_scorer(self, movies: dict) -> FuzzyScorer:
+        """
+        Get the search scorer of the movies titles,
+        built again only when the storage version changes.
+        :param movies: dict
+        :return: scorer (FuzzyScorer)
+        """
+        version = self._storage.get_version()
+        if self._scorer is None or version is None or self._scorer[0] != version:
+            if self._scorer is not None:
+                self._scorer[1].close()
+            self._scorer = (version, FuzzyScorer(movies))
+        return self._scorer[1]
 
     def _command_search_movie(self) -> str:
         """
@@ -169,7 +260,8 @@ class MovieApp:
         incorrect spelling, case-insensitive.
         :return: search message (str)
         """
-        return MovieAnalytics(self._storage.list_movies()) \
+        movies = self._storage.list_movies()
+        return MovieAnalytics(movies, self._get_scorer(movies)) \
             .fuzzy_search()
 
     def _command_sort_movie(self) -> str:
@@ -192,10 +284,99 @@ class MovieApp:
             .create_rating_histogram()
 
     def _command_generate_website(self) -> str | None:
+        """
+        Generate the movies website.
+        :return: website generation message (str | None)
+        """
+        # deferred, the website generation loads the countries from the API
+        from movies_website_generation import WebsiteGeneration
+
         analytics = MovieAnalytics(self._storage.list_movies())
-        website = WebsiteGeneration(analytics.sort_movies_by_rating_desc_tuple())
+        website = WebsiteGeneration(analytics.sort_movies_by_rating_desc_tuple(),
+                                    self._aggregates.get())
         return website.generate_website()
 
+    def _command_grouped_stats(self, group_by: str) -> str:
+        """
+        Get movie statistics by country, decade or year.
+        :param group_by: 'country', 'decade' or 'year' (str)
+        :return: grouped movie statistics (str)
+        """
+        try:
+            return format_grouped_stats(self._aggregates.get()[group_by], group_by)
+        except ValueError as err:
+            return str(err)
+        except FileNotFoundError as err:
+            return str(err)
+
+    def _command_country_stats(self) -> str:
+        """
+        Get movie statistics by country.
+        :return: movie statistics by country (str)
+        """
+        return self._command_grouped_stats('country')
+
+    def _command_decade_stats(self) -> str:
+        """
+        Get movie statistics by decade.
+        :return: movie statistics by decade (str)
+        """
+        return self._command_grouped_stats('decade')
+
+    def _command_year_stats(self) -> str:
+        """
+        Get movie statistics by year.
+        :return: movie statistics by year (str)
+        """
+        return self._command_grouped_stats('year')
+
+    def _command_search_notes(self) -> str:
+        """
+        Search the movies notes, best matches first.
+        Words are all required unless separated by OR,
+        -word excludes a word and "quoted words" match a phrase.
+        :return: search message (str)
+        """
+        query = input('Enter words to search in the notes: ')
+        while not query:
+            query = input('Enter words to search in the notes: ')
+
+        if self._notes_index is None:
+            self._notes_index = NotesIndex(self._storage, self._notes_index_path)
+        try:
+            results = self._notes_index.search(query)
+        except ValueError as err:
+            return str(err)
+        except FileNotFoundError as err:
+            return str(err)
+
+        if not results:
+            return f"{colors.get('red')}" \
+                   f"No notes match '{query}'." \
+                   f"{colors.get('default')}"
+        return "\n".join(
+            [f"{colors.get('purple')}{title}, "
+             f"{colors.get('yellow')}{score}"
+             f"{colors.get('default')}"
+             for title, score in results])
+
+    def _command_similar_movies(self) -> str:
+        """
+        Get the movies most similar to a movie,
+        by rating, year, countries and notes.
+        :return: similar movies (str)
+        """
+        title = input('Enter a movie title: ')
+        while not title:
+            title = input('Enter a movie title: ')
+
+        try:
+            return format_similar_movies(self._features.get(), title)
+        except ValueError as err:
+            return str(err)
+        except FileNotFoundError as err:
+            return str(err)
+
     def _get_function_name(self) -> dict:
         """
         Get function name based on user input command.
@@ -210,9 +391,29 @@ class MovieApp:
                 '7': self._command_search_movie,
                 '8': self._command_sort_movie,
                 '9': self._command_movie_histogram,
-                '10': self._command_generate_website
+                '10': self._command_generate_website,
+                '11': self._command_country_stats,
+                '12': self._command_decade_stats,
+                '13': self._command_year_stats,
+                '14': self._command_search_notes,
+                '15': self._command_similar_movies
                 }
 
+    def close(self):
+        """
+        Stop the search scorer and save the indexes,
+        on any exit of the app, more than once if need be.
+        """
+        if self._scorer is not None:
+            self._scorer[1].close()
+            self._scorer = None
+        if self._notes_index is not None:
+            self._notes_index.close()
+            self._notes_index = None
+        if self._duplicates is not None:
+            self._duplicates.close()
+            self._duplicates = None
+
     def run(self):
         """
         To display menu, user input and functions calling.
@@ -221,23 +422,28 @@ class MovieApp:
               f"********** My Movies Database **********"
               f"{colors.get('default')}")
 
+        commands = self._get_function_name()
+
         while True:
             print(menu())
             choice = user_input_choice()
 
-            if choice in self._get_function_name():
+            if choice in commands:
                 # Display subtitle
                 print(f"\n--------- {choices.get(choice)} ---------")
 
-                function_name = self._get_function_name().get(choice)
+                function_name = commands.get(choice)
 
                 if choice == '0':
+                    self.close()
                     print(function_name())
                     break
 
-                print(function_name())
+                with instrumentation.command(choices.get(choice)):
+                    result = function_name()
+                print(result)
             else:
-                # if user input other than 0-10, continue request input
+                # if user input other than 0-15, continue request input
                 continue
 
             print("__________________________________\n")
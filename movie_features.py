@@ -0,0 +1,213 @@
+"""
+Feature matrix of the movies for "more like this" recommendations.
+
+Every movie is a row of standardized rating and year, its countries
+one-hot encoded (hashed when there are more countries than columns)
+and optionally its hashed note tokens, each block scaled by a weight.
+The similar movies of a movie are the nearest rows by euclidean distance,
+computed for all the rows at once with one matrix-vector product.
+"""
+import functools
+import zlib
+
+from country_index import split_countries
+from istorage import IStorage
+from notes_index import tokenize
+from utils import colors
+
+FEATURE_COLUMNS = ['title', 'rating', 'year', 'country', 'notes']
+
+DEFAULT_WEIGHTS = {'rating': 1.0, 'year': 1.0, 'country': 1.0, 'notes': 1.0}
+
+
+def _hashed_column(token: str, dims: int) -> int:
+    """
+    Get the column of a token, stable across processes unlike hash().
+    :param token: str
+    :param dims: number of columns (int)
+    :return: column (int)
+    """
+    return zlib.crc32(token.encode('utf8')) % dims
+
+
+def _encode_block(values: list, split, columns, dims: int):
+    """
+    Encode a text column to a block of unit length rows,
+    encoding each distinct value once.
+    :param values: text per movie (list[str])
+    :param split: text to tokens function
+    :param columns: token to column function
+    :param dims: number of columns (int)
+    :return: block (numpy.ndarray)
+    """
+    import numpy as np  # deferred, slow to import
+
+    codes = {}
+    value_codes = np.fromiter((codes.setdefault(value, len(codes)) for value in values),
+                              dtype=np.int64, count=len(values))
+    encoded = np.zeros((len(codes), dims), dtype=np.float32)
+    for value, code in codes.items():
+        for token in split(value):
+            encoded[code, columns(token)] += 1.0
+    norms = np.linalg.norm(encoded, axis=1, keepdims=True)
+    np.divide(encoded, norms, out=encoded, where=norms > 0)
+    return encoded[value_codes]
+
+
+def _standardize(values: list):
+    """
+    Standardize a numeric column to zero mean and unit variance.
+    :param values: list
+    :return: column (numpy.ndarray)
+    """
+    import numpy as np  # deferred, slow to import
+
+    column = np.asarray(values, dtype=np.float64)
+    if not len(column):
+        return column.astype(np.float32)
+    std = column.std()
+    column = column - column.mean()
+    if std > 0:
+        column /= std
+    return column.astype(np.float32)
+
+
+class MovieFeatures:
+    """
+    Normalized feature matrix of the movies,
+    to find the movies most similar to a movie.
+    """
+
+    def __init__(self, columns: dict, use_notes: bool = False,
+                 country_dims: int = 32, note_dims: int = 64, weights: dict = None):
+        import numpy as np  # deferred, slow to import
+
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.titles = list(columns['title'])
+        self._rows = {title: row for row, title in enumerate(self.titles)}
+        # to show the similar movies without loading the catalog
+        self.ratings = list(columns['rating'])
+        self.years = list(columns['year'])
+
+        # one column per country when they fit, else hashed columns
+        countries = list(dict.fromkeys(name for value in set(columns['country'])
+                                       for name in split_countries(value)))
+        if len(countries) <= country_dims:
+            country_columns = {name: column for column, name in enumerate(countries)}.get
+        else:
+            country_columns = functools.partial(_hashed_column, dims=country_dims)
+
+        blocks = [weights['rating'] * _standardize(columns['rating'])[:, None],
+                  weights['year'] * _standardize(columns['year'])[:, None],
+                  weights['country'] * _encode_block(columns['country'], split_countries,
+                                                     country_columns, country_dims)]
+        if use_notes:
+            blocks.append(weights['notes'] * _encode_block(
+                columns['notes'], tokenize,
+                functools.partial(_hashed_column, dims=note_dims), note_dims))
+
+        self.matrix = np.ascontiguousarray(np.hstack(blocks), dtype=np.float32)
+        self._squared_norms = np.einsum('ij,ij->i', self.matrix, self.matrix)
+
+    @classmethod
+    def from_movies(cls, movies: dict, **options):
+        """
+        Build the features of movies.
+        :param movies: dict
+        :param options: MovieFeatures options
+        :return: features (MovieFeatures)
+        """
+        return cls({'title': list(movies),
+                    **{name: [info[name] for info in movies.values()]
+                       for name in FEATURE_COLUMNS[1:]}},
+                   **options)
+
+    def row(self, title: str) -> int:
+        """
+        Get the row of a movie.
+        :param title: str
+        :return: row (int)
+        """
+        row = self._rows.get(title)
+        if row is None:
+            raise ValueError(f"Movie '{title}' does not exist.")
+        return row
+
+    def similar(self, title: str, k: int = 5) -> list:
+        """
+        Get the k movies nearest to a movie.
+        :param title: str
+        :param k: number of movies (int)
+        :return: (title, distance) pairs, nearest first (list[tuple[str, float]])
+        """
+        import numpy as np  # deferred, slow to import
+
+        if not isinstance(title, str):
+            raise TypeError('Title must be string.')
+        if not isinstance(k, int):
+            raise TypeError('Number of movies must be int.')
+        row = self.row(title)
+
+        k = min(k, len(self.titles) - 1)
+        if k <= 0:
+            return []
+
+        # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b, for all the rows at once
+        distances = self._squared_norms - 2 * (self.matrix @ self.matrix[row])
+        distances += self._squared_norms[row]
+        distances[row] = np.inf
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+        return [(self.titles[index], round(float(np.sqrt(max(distances[index], 0.0))), 4))
+                for index in nearest]
+
+
+def format_similar_movies(features: MovieFeatures, title: str, k: int = 5) -> str:
+    """
+    Format the movies most similar to a movie, with their rating and year.
+    :param features: feature matrix of the movies (MovieFeatures)
+    :param title: str
+    :param k: number of movies (int)
+    :return: similar movies (str)
+    """
+    try:
+        similar = features.similar(title, k)
+    except ValueError:
+        return f"{colors.get('red')}" \
+               f"Movie '{title}' does not exist." \
+               f"{colors.get('default')}"
+
+    if not similar:
+        return f"{colors.get('red')}" \
+               f"There are no other movies in the file." \
+               f"{colors.get('default')}"
+    rows = [features.row(similar_title) for similar_title, _ in similar]
+    return "\n".join(
+        [f"{colors.get('purple')}{features.titles[row]}, "
+         f"{colors.get('yellow')}{features.ratings[row]}-{features.years[row]}"
+         f"{colors.get('default')}"
+         for row in rows])
+
+
+class MovieFeaturesCache:
+    """
+    Feature matrix of a IStorage object,
+    built again only when the storage version changes.
+    """
+
+    def __init__(self, storage: IStorage, **options):
+        self._storage = storage
+        self._options = options
+        # (version, features) of the last build
+        self._cached = None
+
+    def get(self) -> MovieFeatures:
+        """
+        Get the feature matrix of the movies.
+        :return: features (MovieFeatures)
+        """
+        version = self._storage.get_version()
+        if self._cached is None or version is None or self._cached[0] != version:
+            columns = self._storage.read_columns(FEATURE_COLUMNS)
+            self._cached = (version, MovieFeatures(columns, **self._options))
+        return self._cached[1]
@@ -0,0 +1,141 @@
+"""
+Grouped movies statistics by country, decade and year:
+count, average and median rating, best and worst movie.
+
+All the groups are computed in one vectorized pass over the movies,
+and cached by storage version by AggregatesCache.
+"""
+from country_index import split_countries
+from istorage import IStorage
+from utils import colors
+
+
+def _to_python(value):
+    """
+    Convert a numpy scalar to the python value.
+    :param value: numpy scalar or python object
+    :return: python value
+    """
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _group_stats(keys, ratings, titles) -> dict:
+    """
+    Aggregate the ratings of each group key.
+    :param keys: group key per movie (numpy.ndarray)
+    :param ratings: rating per movie (numpy.ndarray)
+    :param titles: title per movie (numpy.ndarray)
+    :return: statistics by group key (dict)
+    """
+    import numpy as np  # deferred, slow to import
+
+    if not len(keys):
+        return {}
+
+    # sort by group, then rating, so each group is a sorted run
+    groups, codes = np.unique(keys, return_inverse=True)
+    order = np.lexsort((ratings, codes))
+    codes, ratings, titles = codes[order], ratings[order], titles[order]
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], len(codes)]
+    counts = ends - starts
+    averages = np.add.reduceat(ratings, starts) / counts
+    medians = (ratings[starts + (counts - 1) // 2] + ratings[starts + counts // 2]) / 2
+
+    return {_to_python(groups[code]): {'count': int(count),
+                                       'average': float(average),
+                                       'median': float(median),
+                                       'best': str(titles[end - 1]),
+                                       'worst': str(titles[start])}
+            for code, start, end, count, average, median
+            in zip(codes[starts], starts, ends, counts, averages, medians)}
+
+
+def get_grouped_stats(movies: dict) -> dict:
+    """
+    Get the movies statistics by country, decade and year.
+    A movie of several countries counts in each of them.
+    :param movies: dict
+    :return: statistics by group key, by group (dict)
+    """
+    return get_grouped_stats_from_columns(
+        {'title': list(movies),
+         'rating': [info['rating'] for info in movies.values()],
+         'year': [info['year'] for info in movies.values()],
+         'country': [info['country'] for info in movies.values()]})
+
+
+def get_grouped_stats_from_columns(columns: dict) -> dict:
+    """
+    Get the movies statistics by country, decade and year
+    from the title, rating, year and country columns.
+    :param columns: values by column name (dict[str, list])
+    :return: statistics by group key, by group (dict)
+    """
+    import numpy as np  # deferred, slow to import
+
+    titles = np.array(columns['title'], dtype=object)
+    ratings = np.array(columns['rating'], dtype=float)
+    years = np.array(columns['year'], dtype=int)
+
+    country_index = []
+    countries = []
+    # the country fields repeat across the movies, split each once
+    split = {}
+    for index, movie_countries in enumerate(columns['country']):
+        names = split.get(movie_countries)
+        if names is None:
+            names = split[movie_countries] = split_countries(movie_countries)
+        country_index.extend([index] * len(names))
+        countries.extend(names)
+    country_index = np.array(country_index, dtype=int)
+
+    return {'country': _group_stats(np.array(countries, dtype=object),
+                                    ratings[country_index], titles[country_index]),
+            'decade': _group_stats(years // 10 * 10, ratings, titles),
+            'year': _group_stats(years, ratings, titles)}
+
+
+def format_grouped_stats(stats: dict, group_by: str) -> str:
+    """
+    Format the statistics of one grouping.
+    :param stats: statistics by group key (dict)
+    :param group_by: 'country', 'decade' or 'year' (str)
+    :return: formatted statistics (str)
+    """
+    if not stats:
+        return f"{colors.get('red')}There are no movies in the file." \
+               f"{colors.get('default')}"
+
+    suffix = 's' if group_by == 'decade' else ''
+    return "\n".join(
+        f"{colors.get('green')}{key}{suffix}: "
+        f"{colors.get('yellow')}{group['count']} movie(s), "
+        f"average {group['average']:.2f}, median {group['median']:.2f}, "
+        f"{colors.get('purple')}best {group['best']}, worst {group['worst']}"
+        f"{colors.get('default')}"
+        for key, group in sorted(stats.items()))
+
+
+class AggregatesCache:
+    """
+    Grouped statistics of a IStorage object,
+    computed again only when the storage version changes.
+    """
+
+    def __init__(self, storage: IStorage):
+        self._storage = storage
+        # (version, grouped statistics) of the last computation
+        self._cached = None
+
+    def get(self) -> dict:
+        """
+        Get the movies statistics by country, decade and year.
+        :return: statistics by group key, by group (dict)
+        """
+        version = self._storage.get_version()
+        if self._cached is None or version is None or self._cached[0] != version:
+            columns = self._storage.read_columns(['title', 'rating', 'year', 'country'])
+            self._cached = (version, get_grouped_stats_from_columns(columns))
+        return self._cached[1]
@@ -4,11 +4,8 @@ search, sorting and
 movies statistics on
 average, median, best, and worst movie
 """
-import random
-from fuzzywuzzy import fuzz
-
-from matplotlib import pyplot as plt
-
+from fuzzy_scoring import FuzzyScorer
+from random_picker import RandomMoviePicker
 from utils import colors
 
 
@@ -38,6 +35,27 @@ def get_median_scores(scores: dict) -> float:
     return get_median(ratings)
 
 
+def format_movie_stats(average: float, median: float, best: list, worst: list) -> str:
+    """
+    Format the movie statistics of the menu.
+    :param average: average rating (float)
+    :param median: median rating (float)
+    :param best: (title, rating, year) of the best movies (list[tuple])
+    :param worst: (title, rating, year) of the worst movies (list[tuple])
+    :return: movie statistics (str)
+    """
+    lines = [f"{colors.get('green')}Average rating: {colors.get('yellow')}"
+             f"{average:.2f}{colors.get('default')}",
+             f"{colors.get('green')}Median rating: {colors.get('yellow')}"
+             f"{median:.2f}{colors.get('default')}"]
+    for word, movies in (('Best', best), ('Worst', worst)):
+        titles = ', '.join(f"{colors.get('purple')}{title}-{colors.get('yellow')}"
+                           f"{rating}-{year}{colors.get('default')}"
+                           for title, rating, year in movies)
+        lines.append(f"{colors.get('green')}{word} movie(s): {titles}")
+    return '\n'.join(lines)
+
+
 class MovieAnalytics:
     """
     Movies analytics class:
@@ -46,8 +64,13 @@ class MovieAnalytics:
     average, median, best, and worst movie
     """
 
-    def __init__(self, movies: dict):
+    def __init__(self, movies: dict, scorer: FuzzyScorer = None, features_cache=None):
         self._movies = movies
+        self._scorer = scorer
+        # MovieFeaturesCache of the movies storage, if any,
+        # else the features are built once from the movies
+        self._features_cache = features_cache
+        self._features = None
 
     def _get_median_rating(self) -> float:
         """
@@ -61,10 +84,16 @@ class MovieAnalytics:
 
     def _get_search_scores(self, movie_name):
         """
-        Dictionary to store similarity scores for each movie name
+        Dictionary to store similarity scores for each movie name,
+        scored by the FuzzyScorer if given, e.g. in parallel.
         :param name: str
         :return: scores (dict)
         """
+        if self._scorer is not None:
+            return self._scorer.score(movie_name)
+
+        from fuzzywuzzy import fuzz  # deferred, only the search needs it
+
         scores = {}
         for key in list(self._movies.keys()):
             ratio = fuzz.ratio(movie_name.lower(), key.lower())
@@ -127,27 +156,49 @@ class MovieAnalytics:
                f"Movie '{name}' does not exist." \
                f"{colors.get('default')}"
 
-    def fuzzy_search(self) -> str:
+    def search(self, name: str) -> dict:
+        """
+        Search the movies by part of the movie name,
+        incorrect spelling, case-insensitive.
+        :param name: str
+        :return: exact match title or None and
+                 recommended (title, score) matches (dict)
+        """
+        exact = [title for title in self._movies
+                 if title.lower() == name.lower()]
+        if exact:
+            return {'exact': exact[0], 'matches': []}
+
+        scores = self._get_search_scores(name)
+        if not scores or get_median_scores(scores) == 0:
+            return {'exact': None, 'matches': []}
+
+        return {'exact': None,
+                'matches': self._get_top_search_scores(scores)}
+
+    def fuzzy_search(self, name: str = None) -> str:
         """
         Search all the movies by part of the movie name,
         incorrect spelling, case-insensitive.
+        :param name: movie title, asked from the user if None (str | None)
         :return: search message (str)
         """
-        name = input('Enter a movie title: ')
-        # Dictionary to store similarity scores for each movie name
-        scores = self._get_search_scores(name)
+        if name is None:
+            name = input('Enter a movie title: ')
+
+        result = self.search(name)
 
-        # if score is 100 means movie name entered has the exact match in the movies dict.
-        if 100 in scores.values():
+        # exact match in the movies dict.
+        if result['exact']:
             return self._get_exact_matched_result(name)
 
         # no exact match, need recommendations
         not_found_message = self._not_found_message(name)
 
-        if get_median_scores(scores) == 0:
+        if not result['matches']:
             return f"\n{not_found_message}"
 
-        matches_result = self._get_matches_result(self._get_top_search_scores(scores))
+        matches_result = self._get_matches_result(result['matches'])
 
         return f"\n{not_found_message}\n" \
                f"{colors.get('red')}Did you mean:" \
@@ -173,33 +224,35 @@ class MovieAnalytics:
                       key=lambda x: x[1]['rating'],
                       reverse=True)
 
-    def _get_best_movie(self, best: bool = True) -> str:
+    def _get_best_movies(self, best: bool = True) -> list[tuple[str, dict]]:
         """
-        Get the best or worst movie by rating.
+        Get the best or worst movies by rating.
         :param best: bool
-        :return: best or worst movie (str)
-        """
-        # sort the rating by desc
-        movies_desc_tuple = self.sort_movies_by_rating_desc_tuple()
-
-        if best:
-            # the highest rating (the first rating in tuple)
-            tuple_index = 0
-            word = 'Best'
-        else:
-            # the lowest rating (the last rating in tuple)
-            tuple_index = -1
-            word = 'Worst'
-
-        movies = [
-            f"{colors.get('purple')}"
-            f"{title}-{colors.get('yellow')}"
-            f"{info['rating']}-{info['year']}"
-            f"{colors.get('default')}"
-            for title, info in movies_desc_tuple
-            if info['rating'] == movies_desc_tuple[tuple_index][1]['rating']]
-
-        return f"{colors.get('green')}{word} movie(s): {', '.join(movies)}"
+        :return: best or worst movies (list[tuple[str, dict]])
+        """
+        # the highest or the lowest rating
+        pick = max if best else min
+        rating = pick(info['rating'] for info in self._movies.values())
+
+        return [(title, info) for title, info in self._movies.items()
+                if info['rating'] == rating]
+
+    def get_stats(self) -> dict:
+        """
+        Get movie statistics as data,
+        count, average, median ratings,
+        best and worst movies titles.
+        :return: movie statistics (dict)
+        """
+        if not self._movies:
+            return {'count': 0, 'average': None, 'median': None,
+                    'best': [], 'worst': []}
+
+        return {'count': len(self._movies),
+                'average': self._get_average_rating(),
+                'median': self._get_median_rating(),
+                'best': [title for title, _ in self._get_best_movies()],
+                'worst': [title for title, _ in self._get_best_movies(False)]}
 
     def get_movie_stats(self) -> str:
         """
@@ -208,27 +261,67 @@ class MovieAnalytics:
         best and worst movies.
         :return: move statistics (str)
         """
-        return f"{colors.get('green')}" \
-               f"Average rating: {colors.get('yellow')}" \
-               f"{self._get_average_rating():.2f}" \
-               f"{colors.get('default')}\n{colors.get('green')}" \
-               f"Median rating: {colors.get('yellow')}" \
-               f"{self._get_median_rating():.2f}" \
-               f"{colors.get('default')}\n" \
-               f"{self._get_best_movie()}\n" \
-               f"{self._get_best_movie(False)}"  # worst movie
+        best, worst = ([(title, info['rating'], info['year'])
+                        for title, info in self._get_best_movies(pick_best)]
+                       for pick_best in (True, False))
+        return format_movie_stats(self._get_average_rating(), self._get_median_rating(),
+                                  best, worst)
 
-    def get_random_movie(self) -> str:
+    def get_random_movie(self, picker: RandomMoviePicker = None) -> str:
         """
         Get a random movie name and rating.
+        :param picker: picker of the movies, reused between calls (RandomMoviePicker | None)
         :return: random movie (str)
         """
-        # use random.choice to return random items in the list of movies
-        title, info = random.choice(list(self._movies.items()))
+        if picker is None:
+            picker = RandomMoviePicker(self._movies)
+
+        movie = picker.pick()
+        if movie is None:
+            return f"{colors.get('red')}" \
+                   f"There are no movies in the file." \
+                   f"{colors.get('default')}"
+
+        title, info = movie
         return f"{colors.get('purple')}{title}, " \
                f"{colors.get('yellow')}{info['rating']}-{info['year']}" \
                f"{colors.get('default')}"
 
+    def _get_features(self):
+        """
+        Get the feature matrix of the movies,
+        from the features cache or built on the first recommendation.
+        :return: MovieFeatures
+        """
+        if self._features_cache is not None:
+            return self._features_cache.get()
+        if self._features is None:
+            from movie_features import MovieFeatures
+            self._features = MovieFeatures.from_movies(self._movies)
+        return self._features
+
+    def recommend(self, title: str, k: int = 5) -> list:
+        """
+        Get the k movies most similar to a movie,
+        by rating, year, countries and optionally notes.
+        :param title: str
+        :param k: number of movies (int)
+        :return: (title, distance) pairs, most similar first (list[tuple[str, float]])
+        """
+        return self._get_features().similar(title, k)
+
+    def get_recommendations(self, title: str = None) -> str:
+        """
+        Get the movies most similar to a movie.
+        :param title: movie title, asked from the user if None (str | None)
+        :return: similar movies (str)
+        """
+        from movie_features import format_similar_movies
+
+        if title is None:
+            title = input('Enter a movie title: ')
+        return format_similar_movies(self._get_features(), title)
+
     def sort_movies_by_rating_desc(self) -> str:
         """
         Sort movies by rating,
@@ -241,14 +334,18 @@ class MovieAnalytics:
              f"{colors.get('default')}"
              for title, info in self.sort_movies_by_rating_desc_tuple()])
 
-    def create_rating_histogram(self) -> str:
+    def create_rating_histogram(self, file_name: str = None) -> str:
         """
         Create a histogram bar chart
         of the movies by x-axis names and y-axis ratings.
         Save the histogram to a .png file.
+        :param file_name: .png file name, asked from the user if None (str | None)
         :return: histogram creation message (str)
         """
+        from matplotlib import pyplot as plt  # deferred, slow to import
+
         ratings = [info['rating'] for title, info in self._movies.items()]
+        plt.figure()
         plt.bar(self._movies.keys(), ratings)
 
         # add the names to the body of the bars
@@ -262,7 +359,8 @@ class MovieAnalytics:
         plt.ylabel('Ratings')
 
         # save plot to file
-        file_name = ''
+        if file_name is None:
+            file_name = ''
         while not file_name.endswith('.png'):
             file_name = input(
                 f"{colors.get('yellow')}"
@@ -270,6 +368,7 @@ class MovieAnalytics:
                 f"\n{colors.get('default')}")
 
         plt.savefig(f'_static/{file_name}')
+        plt.close()
 
         return f"\n{colors.get('red')}" \
                f"'{file_name}' file has been created." \
@@ -1,7 +1,6 @@
 """
 Generate movie website from movies file.
 """
-from country import get_country_flags
 
 
 def read_file(file_path: str) -> str:
@@ -50,6 +49,39 @@ def serialize_movie(title: str,
             """
 
 
+def serialize_grouped_stats(group_by: str, stats: dict) -> str:
+    """
+    Serialize the statistics of one grouping to a html table.
+    :param group_by: 'country', 'decade' or 'year' (str)
+    :param stats: statistics by group key (dict)
+    :return: a serialized html table (str)
+    """
+    rows = "".join(f"""
+                <tr>
+                    <td>{key}</td>
+                    <td>{group['count']}</td>
+                    <td>{group['average']:.2f}</td>
+                    <td>{group['median']:.2f}</td>
+                    <td>{group['best']}</td>
+                    <td>{group['worst']}</td>
+                </tr>"""
+                   for key, group in sorted(stats.items()))
+
+    return f"""
+            <h2>Movies by {group_by}</h2>
+            <table class="movie-stats-table">
+                <tr>
+                    <th>{group_by.capitalize()}</th>
+                    <th>Movies</th>
+                    <th>Average</th>
+                    <th>Median</th>
+                    <th>Best</th>
+                    <th>Worst</th>
+                </tr>{rows}
+            </table>
+            """
+
+
 class WebsiteGeneration:
     """
     Generate movie website from movies file.
@@ -57,17 +89,48 @@ class WebsiteGeneration:
     _TEMPLATE_FILE_PATH = '_static/index_template.html'
     _HTML_FILE_PATH = '_static/index.html'
 
-    def __init__(self, sorted_movies: list[tuple[str, dict]]):
+    def __init__(self, sorted_movies: list[tuple[str, dict]],
+                 grouped_stats: dict = None):
         self._sorted_movies = sorted_movies
+        self._grouped_stats = grouped_stats
+
+    def _get_stats(self) -> str:
+        """
+        Serialize the movies statistics by country, decade and year
+        into html format.
+        :return: serialized html statistics (str)
+        """
+        grouped_stats = self._grouped_stats
+        if grouped_stats is None:
+            from movies_aggregates import get_grouped_stats
+            grouped_stats = get_grouped_stats(dict(self._sorted_movies))
+
+        return "\n".join(serialize_grouped_stats(group_by, stats)
+                         for group_by, stats in grouped_stats.items())
 
     def _get_movies(self) -> str:
         """
         Serialize movies from movies file into html format.
         :return: serialized html movies (str)
         """
+        # deferred, loading the countries calls the API
+        from country import get_country_flags, load_flags
+
+        # one API call for the whole website, even if it fails
+        try:
+            country_flags = load_flags()
+        except ValueError:
+            country_flags = {}
+
+        # the country fields repeat across the movies
+        flags = {}
+        for _, info in self._sorted_movies:
+            if info['country'] not in flags:
+                flags[info['country']] = get_country_flags(info['country'], country_flags)
+
         return "\n".join([serialize_movie(title,
                                           info,
-                                          get_country_flags(info['country'])
+                                          flags[info['country']]
                                           )
                           for title, info in self._sorted_movies])
 
@@ -83,6 +146,7 @@ class WebsiteGeneration:
 
             template = read_file(WebsiteGeneration._HTML_FILE_PATH)
             content = template.replace('__TEMPLATE_MOVIE_GRID__', self._get_movies())
+            content = content.replace('__TEMPLATE_STATS__', self._get_stats())
             write_file(WebsiteGeneration._HTML_FILE_PATH, content)
             return 'Website was generated successfully.'
         except FileNotFoundError as err:
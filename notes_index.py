@@ -0,0 +1,411 @@
+"""
+Inverted full-text index of the movies notes, and optionally titles.
+
+Every token maps to its postings, the ids of the movies having the token
+and the token count per movie, so a query only reads the postings of its
+tokens instead of scanning all the notes. Queries support AND (default),
+OR, -excluded terms and "quoted phrases", and the matches are ranked
+with BM25, the postings being intersected and scored with numpy arrays.
+
+The postings are append-only: a changed movie gets a new id and its old id
+is marked deleted, until the deleted ids outnumber the movies and
+the index is compacted. The index follows the storage changes through
+its change feed, and is saved to a file next to the storage with
+the storage version, to be loaded instead of rebuilt while the storage
+is unchanged.
+"""
+import math
+import os
+import pickle
+import re
+import sys
+from array import array
+
+from istorage import IStorage
+
+# bump when the saved index changes format
+INDEX_FORMAT = 1
+
+# BM25 term frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# deleted ids kept before compacting, at least
+COMPACT_MIN_DELETED = 1000
+
+_TOKEN = re.compile(r'\w+')
+_QUERY_ITEM = re.compile(r'(-?)"([^"]*)"|(\S+)')
+
+
+def tokenize(text: str) -> list:
+    """
+    Split a text into lowercase word tokens.
+    :param text: str
+    :return: tokens (list[str])
+    """
+    # interned, so the tokens are shared by the movies and saved once
+    return [sys.intern(token) for token in _TOKEN.findall(text.lower())]
+
+
+def parse_query(query: str) -> list:
+    """
+    Parse a query into OR clauses of AND items.
+    A word of several tokens, e.g. "sci-fi", is a phrase.
+    :param query: str
+    :return: clauses, lists of (negated, tokens) (list[list[tuple[bool, list]]])
+    """
+    clauses = [[]]
+    for match in _QUERY_ITEM.finditer(query):
+        negated, phrase, word = match.groups()
+        if word == 'OR':
+            clauses.append([])
+            continue
+        if word == 'AND':
+            continue
+        if word is not None:
+            negated = word.startswith('-') and len(word) > 1
+            phrase = word[1:] if negated else word
+        tokens = tokenize(phrase)
+        if tokens:
+            clauses[-1].append((bool(negated), tokens))
+    return [clause for clause in clauses if clause]
+
+
+def _members(ids, size: int):
+    """
+    Get a membership mask of ids, to intersect sorted ids without sorting.
+    :param ids: numpy.ndarray
+    :param size: number of ids (int)
+    :return: flag by id (numpy.ndarray)
+    """
+    import numpy as np  # deferred, slow to import
+
+    mask = np.zeros(size, dtype=bool)
+    mask[ids] = True
+    return mask
+
+
+class NotesIndex:
+    """
+    Inverted index of the movies notes of a storage,
+    kept up to date with the storage changes.
+    """
+
+    def __init__(self, storage: IStorage, index_path: str = None,
+                 include_titles: bool = False):
+        self._storage = storage
+        self._index_path = index_path
+        self._include_titles = include_titles
+        # storage version the index matches, None until built
+        self._version = None
+        self._clear()
+        storage.change_feed.subscribe(self._on_change)
+
+    def _clear(self):
+        """
+        Empty the index.
+        """
+        # live id by title
+        self._doc_ids = {}
+        # by id: title, tokens (None once deleted), number of tokens and live flag
+        self._titles = []
+        self._doc_tokens = []
+        self._lengths = array('i')
+        self._live = bytearray()
+        # token -> (ids, token counts), in increasing id order
+        self._postings = {}
+        self._total_length = 0
+
+    def _state(self) -> tuple:
+        """
+        Get the index data, as saved.
+        :return: tuple
+        """
+        return (self._doc_ids, self._titles, self._doc_tokens,
+                self._lengths, self._live, self._postings, self._total_length)
+
+    def _text_tokens(self, title: str, info: dict) -> tuple:
+        """
+        Get the indexed tokens of a movie.
+        :param title: str
+        :param info: movie fields (dict)
+        :return: tokens (tuple)
+        """
+        tokens = tokenize(info.get('notes', ''))
+        if self._include_titles:
+            # a gap, so a phrase doesn't span the title and the notes
+            tokens = tokenize(title) + [None] + tokens
+        return tuple(tokens)
+
+    def _add(self, title: str, tokens: tuple):
+        """
+        Index the tokens of a movie with a new id.
+        :param title: str
+        :param tokens: tuple
+        """
+        self._remove(title)
+        doc_id = len(self._titles)
+        self._doc_ids[title] = doc_id
+        self._titles.append(title)
+        self._doc_tokens.append(tokens)
+
+        counts = {}
+        for token in tokens:
+            if token is not None:
+                counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = (array('i'), array('i'))
+            postings[0].append(doc_id)
+            postings[1].append(count)
+
+        length = sum(counts.values())
+        self._lengths.append(length)
+        self._live.append(1)
+        self._total_length += length
+
+    def _remove(self, title: str):
+        """
+        Mark the id of a movie deleted.
+        :param title: str
+        """
+        doc_id = self._doc_ids.pop(title, None)
+        if doc_id is None:
+            return
+        self._doc_tokens[doc_id] = None
+        self._live[doc_id] = 0
+        self._total_length -= self._lengths[doc_id]
+        self._lengths[doc_id] = 0
+
+    def _compact(self):
+        """
+        Index the live movies again, dropping the deleted ids.
+        """
+        live = [(self._titles[doc_id], self._doc_tokens[doc_id])
+                for doc_id in sorted(self._doc_ids.values())]
+        self._clear()
+        for title, tokens in live:
+            self._add(title, tokens)
+
+    def _on_change(self, event):
+        """
+        Apply a storage change to the index.
+        :param event: ChangeEvent
+        """
+        if self._version is None:
+            return
+        if event.op == 'delete':
+            self._remove(event.title)
+        else:
+            tokens = self._text_tokens(event.title, event.new)
+            doc_id = self._doc_ids.get(event.title)
+            if doc_id is None or self._doc_tokens[doc_id] != tokens:
+                self._add(event.title, tokens)
+
+        deleted = len(self._titles) - len(self._doc_ids)
+        if deleted > max(len(self._doc_ids), COMPACT_MIN_DELETED):
+            self._compact()
+        self._version = self._storage.get_version()
+
+    def build(self):
+        """
+        Index all the movies of the storage.
+        """
+        self._clear()
+        self._version = self._storage.get_version()
+        for title, info in self._storage.iter_movies():
+            self._add(title, self._text_tokens(title, info))
+
+    def _load(self, version) -> bool:
+        """
+        Load the saved index if it matches the storage version.
+        :param version: storage version
+        :return: True if loaded (bool)
+        """
+        if version is None or not self._index_path or not os.path.isfile(self._index_path):
+            return False
+        try:
+            with open(self._index_path, 'rb') as file:
+                saved = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return False
+        if not isinstance(saved, dict) or saved.get('format') != INDEX_FORMAT or \
+                saved.get('version') != version or \
+                saved.get('include_titles') != self._include_titles or \
+                len(saved.get('index', ())) != len(self._state()):
+            return False
+
+        (self._doc_ids, self._titles, self._doc_tokens,
+         self._lengths, self._live, self._postings, self._total_length) = saved['index']
+        self._version = version
+        return True
+
+    def save(self):
+        """
+        Save the index atomically, with the storage version it matches.
+        """
+        if not self._index_path or self._version is None:
+            return
+        temp_path = f'{self._index_path}.tmp'
+        with open(temp_path, 'wb') as file:
+            pickle.dump({'format': INDEX_FORMAT,
+                         'version': self._version,
+                         'include_titles': self._include_titles,
+                         'index': self._state()},
+                        file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self._index_path)
+
+    def close(self):
+        """
+        Save the index and stop following the storage changes.
+        """
+        self.save()
+        self._storage.change_feed.unsubscribe(self._on_change)
+
+    def _ensure_current(self):
+        """
+        Load or build the index again if the storage changed outside the feed.
+        """
+        version = self._storage.get_version()
+        if self._version is not None and version is not None and version == self._version:
+            return
+        if not self._load(version):
+            self.build()
+
+    def _term_postings(self, token: str, live):
+        """
+        Get the postings of a token without the deleted ids.
+        :param token: str
+        :param live: live flag by id (numpy.ndarray)
+        :return: ids and token counts (tuple[numpy.ndarray, numpy.ndarray])
+        """
+        import numpy as np  # deferred, slow to import
+
+        postings = self._postings.get(token)
+        if postings is None:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+        # copied, the arrays grow with the changes
+        ids = np.frombuffer(postings[0], dtype=np.int32).copy()
+        counts = np.frombuffer(postings[1], dtype=np.int32).copy()
+        mask = live[ids]
+        return ids[mask], counts[mask]
+
+    def _has_phrase(self, doc_id: int, tokens: list) -> bool:
+        """
+        Check a movie has the tokens in a row.
+        :param doc_id: int
+        :param tokens: list
+        :return: bool
+        """
+        doc_tokens = self._doc_tokens[doc_id]
+        size = len(tokens)
+        return any(doc_tokens[start:start + size] == tokens
+                   for start in range(len(doc_tokens) - size + 1)
+                   if doc_tokens[start] == tokens[0])
+
+    def _item_docs(self, tokens: list, live, candidates=None):
+        """
+        Get the ids of the movies having all the tokens, in a row if several.
+        :param tokens: list
+        :param live: live flag by id (numpy.ndarray)
+        :param candidates: ids to search only, all if None (numpy.ndarray | None)
+        :return: ids (numpy.ndarray)
+        """
+        import numpy as np  # deferred, slow to import
+
+        ids_per_token = [self._term_postings(token, live)[0] for token in set(tokens)]
+        if candidates is not None:
+            ids_per_token.append(candidates)
+        ids_per_token.sort(key=len)
+        ids = ids_per_token[0]
+        for token_ids in ids_per_token[1:]:
+            ids = token_ids[_members(ids, len(live))[token_ids]]
+        if len(tokens) > 1:
+            phrase = tuple(tokens)
+            ids = np.array([doc_id for doc_id in ids.tolist()
+                            if self._has_phrase(doc_id, phrase)], dtype=np.int32)
+        return ids
+
+    def _clause_docs(self, clause: list, live):
+        """
+        Get the ids of the movies matching all the items of a clause.
+        :param clause: list of (negated, tokens)
+        :param live: live flag by id (numpy.ndarray)
+        :return: ids (numpy.ndarray)
+        """
+        import numpy as np  # deferred, slow to import
+
+        included = [tokens for negated, tokens in clause if not negated]
+        if not included:
+            return np.empty(0, dtype=np.int32)
+        # the rarest item first, so the candidates stay few
+        included.sort(key=lambda tokens: min(len(self._postings.get(token, ((),))[0])
+                                             for token in tokens))
+        ids = self._item_docs(included[0], live)
+        for tokens in included[1:]:
+            if not len(ids):
+                break
+            ids = self._item_docs(tokens, live, ids)
+        for negated, tokens in clause:
+            if negated and len(ids):
+                ids = ids[~_members(self._item_docs(tokens, live, ids), len(live))[ids]]
+        return ids
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """
+        Search the movies matching a query, best BM25 score first.
+        :param query: e.g. 'space "time travel" -boring OR robots' (str)
+        :param limit: maximum number of results (int)
+        :return: (title, score) pairs (list[tuple[str, float]])
+        """
+        import numpy as np  # deferred, slow to import
+
+        if not isinstance(query, str):
+            raise TypeError('Query must be string.')
+        if not isinstance(limit, int):
+            raise TypeError('Limit must be int.')
+        if limit < 1:
+            raise ValueError('Limit must be at least 1.')
+
+        self._ensure_current()
+        live = np.frombuffer(bytes(self._live), dtype=bool)
+
+        clauses = parse_query(query)
+        if len(clauses) == 1:
+            ids = self._clause_docs(clauses[0], live)
+        else:
+            matches = np.zeros(len(live), dtype=bool)
+            for clause in clauses:
+                matches[self._clause_docs(clause, live)] = True
+            ids = np.flatnonzero(matches)
+        if not len(ids):
+            return []
+
+        doc_count = len(self._doc_ids)
+        average_length = self._total_length / doc_count
+        lengths = np.array(self._lengths, dtype=np.float64)[ids]
+        norms = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average_length)
+        scores = np.zeros(len(ids))
+        terms = {token for clause in clauses
+                 for negated, tokens in clause if not negated
+                 for token in tokens}
+        for term in terms:
+            term_ids, counts = self._term_postings(term, live)
+            if not len(term_ids):
+                continue
+            idf = math.log(1 + (doc_count - len(term_ids) + 0.5) / (len(term_ids) + 0.5))
+            positions = np.searchsorted(term_ids, ids)
+            found = positions < len(term_ids)
+            found[found] = term_ids[positions[found]] == ids[found]
+            frequencies = counts[positions[found]]
+            scores[found] += idf * frequencies * (BM25_K1 + 1) / (frequencies + norms[found])
+
+        # the best movies, then sorted by score and title
+        if len(ids) > limit:
+            best = np.argpartition(-scores, limit - 1)[:limit] if limit > 0 else []
+        else:
+            best = range(len(ids))
+        results = [(self._titles[ids[index]], round(float(scores[index]), 4))
+                   for index in best]
+        return sorted(results, key=lambda result: (-result[1], result[0]))
@@ -0,0 +1,135 @@
+"""
+Sidecar cache of the parsed movies files.
+
+After a file is parsed, the parsed value is pickled to a cache file
+keyed by the file path, size, modification time and content hash.
+The next loads of the unchanged file unpickle it instead of parsing.
+A missing, stale or corrupted cache file falls back to parsing.
+The cache files are trusted like the movies files: keep the cache
+directory private.
+"""
+import hashlib
+import os
+import pickle
+import time
+
+from instrumentation import instrumentation
+
+# bump when the cached values change format
+CACHE_FORMAT = 1
+
+_ENTRY_KEYS = {'format', 'path', 'size', 'mtime_ns', 'digest', 'written_ns', 'value'}
+
+# a file modified this close to the cache write may change again
+# within the same modification time, so its content is checked
+_RACY_NS = 2_000_000_000
+
+
+def _digest(content: bytes) -> str:
+    """
+    Hash a file content.
+    :param content: bytes
+    :return: hex digest (str)
+    """
+    return hashlib.blake2b(content, digest_size=20).hexdigest()
+
+
+class ParseCache:
+    """
+    Parsed files cache in a directory.
+    """
+
+    def __init__(self, cache_dir: str):
+        self._cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _cache_path(self, file_path: str) -> str:
+        """
+        Get the cache file path of a file.
+        :param file_path: str
+        :return: cache file path (str)
+        """
+        path_hash = hashlib.blake2b(os.path.abspath(file_path).encode(),
+                                    digest_size=8).hexdigest()
+        return os.path.join(self._cache_dir,
+                            f'{os.path.basename(file_path)}-{path_hash}.pickle')
+
+    def _read_entry(self, file_path: str) -> dict | None:
+        """
+        Read the cache entry of a file.
+        :param file_path: str
+        :return: entry (dict | None if missing or corrupted)
+        """
+        try:
+            with open(self._cache_path(file_path), 'rb') as file:
+                entry = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError,
+                AttributeError, ImportError, IndexError, ValueError, TypeError):
+            return None
+
+        if not isinstance(entry, dict) or entry.keys() != _ENTRY_KEYS or \
+                entry['format'] != CACHE_FORMAT or \
+                entry['path'] != os.path.abspath(file_path):
+            return None
+        return entry
+
+    def store(self, file_path: str, content: bytes, value):
+        """
+        Cache the parsed value of a file content.
+        :param file_path: str
+        :param content: file content the value was parsed from (bytes)
+        :param value: parsed value
+        """
+        stat = os.stat(file_path)
+        entry = {'format': CACHE_FORMAT,
+                 'path': os.path.abspath(file_path),
+                 'size': stat.st_size,
+                 'mtime_ns': stat.st_mtime_ns,
+                 'digest': _digest(content),
+                 'written_ns': time.time_ns(),
+                 'value': value}
+
+        cache_path = self._cache_path(file_path)
+        temp_path = f'{cache_path}.{os.getpid()}.tmp'
+        try:
+            with open(temp_path, 'wb') as file:
+                pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_path)
+        except OSError:
+            # a cache that can't be written is only a slower load
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def load(self, file_path: str, parse):
+        """
+        Load the parsed value of a file, from the cache when the file
+        is unchanged, else parsing the file and caching the value.
+        Every call returns a new copy of the value.
+        :param file_path: str
+        :param parse: callable parsing the file content (bytes)
+        :return: parsed value
+        """
+        stat = os.stat(file_path)
+        entry = self._read_entry(file_path)
+        same_stat = entry is not None and entry['size'] == stat.st_size and \
+            entry['mtime_ns'] == stat.st_mtime_ns
+
+        if same_stat and entry['written_ns'] - entry['mtime_ns'] > _RACY_NS:
+            return entry['value']
+
+        with instrumentation.measure('read', file_path), \
+                open(file_path, 'rb') as file:
+            content = file.read()
+
+        if entry is not None and entry['digest'] == _digest(content):
+            # same content: refresh the key if the file was touched,
+            # or if it is now old enough to be trusted by its key
+            if not same_stat or time.time_ns() - stat.st_mtime_ns > _RACY_NS:
+                self.store(file_path, content, entry['value'])
+            return entry['value']
+
+        value = parse(content)
+        self.store(file_path, content, value)
+        return value
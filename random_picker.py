@@ -0,0 +1,141 @@
+"""
+Random movie selection in O(1):
+uniform picks from a maintained array of titles,
+rating-weighted picks from an alias table,
+and filtered picks without building the filtered movies.
+"""
+import random
+
+
+class RandomMoviePicker:
+    """
+    Picks random movies from an array of titles,
+    kept in sync in O(1) by add and remove.
+    """
+
+    def __init__(self, movies: dict, seed: int = None, max_attempts: int = 32):
+        self._movies = movies
+        self._titles = list(movies)
+        self._positions = {title: index for index, title in enumerate(self._titles)}
+        self._random = random.Random(seed)
+        self._max_attempts = max_attempts
+        # (probabilities, aliases) of the rating-weighted picks
+        self._alias_table = None
+
+    @property
+    def movies(self) -> dict:
+        """
+        The movies picked from.
+        :return: movies (dict)
+        """
+        return self._movies
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def add(self, title: str, info: dict):
+        """
+        Add or replace a movie.
+        :param title: str
+        :param info: dict
+        """
+        if title not in self._positions:
+            self._positions[title] = len(self._titles)
+            self._titles.append(title)
+        self._movies[title] = info
+        self._alias_table = None
+
+    def remove(self, title: str):
+        """
+        Remove a movie, moving the last title to its place.
+        :param title: str
+        """
+        index = self._positions.pop(title)
+        last = self._titles.pop()
+        if last != title:
+            self._titles[index] = last
+            self._positions[last] = index
+        del self._movies[title]
+        self._alias_table = None
+
+    def _movie(self, title: str) -> tuple[str, dict]:
+        """
+        Get a picked movie.
+        :param title: str
+        :return: title and info (tuple[str, dict])
+        """
+        return title, self._movies[title]
+
+    def pick(self, where=None) -> tuple[str, dict] | None:
+        """
+        Pick a random movie, uniformly.
+        With a filter, a few random movies are tried first,
+        then one matching movie is sampled in one pass over the titles.
+        :param where: filter taking a movie info, e.g.
+                      lambda info: info['year'] >= 2000 and info['rating'] >= 8
+                      (callable | None)
+        :return: title and info (tuple[str, dict] | None if no movie matches)
+        """
+        if not self._titles:
+            return None
+
+        if where is None:
+            return self._movie(self._titles[self._random.randrange(len(self._titles))])
+
+        for _ in range(self._max_attempts):
+            title = self._titles[self._random.randrange(len(self._titles))]
+            if where(self._movies[title]):
+                return self._movie(title)
+
+        # reservoir sampling of the matching movies
+        picked = None
+        matches = 0
+        for title in self._titles:
+            if where(self._movies[title]):
+                matches += 1
+                if self._random.randrange(matches) == 0:
+                    picked = title
+        return self._movie(picked) if picked is not None else None
+
+    def _build_alias_table(self) -> tuple[list, list]:
+        """
+        Build the alias table of the ratings (Vose's method).
+        :return: probabilities and aliases (tuple[list, list])
+        """
+        count = len(self._titles)
+        weights = [max(self._movies[title]['rating'], 0) for title in self._titles]
+        total = sum(weights)
+        if not total:
+            return [1.0] * count, list(range(count))
+
+        scaled = [weight * count / total for weight in weights]
+        probabilities = [1.0] * count
+        aliases = list(range(count))
+        small = [index for index, weight in enumerate(scaled) if weight < 1]
+        large = [index for index, weight in enumerate(scaled) if weight >= 1]
+
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probabilities[less] = scaled[less]
+            aliases[less] = more
+            scaled[more] -= 1 - scaled[less]
+            (small if scaled[more] < 1 else large).append(more)
+
+        return probabilities, aliases
+
+    def pick_weighted(self) -> tuple[str, dict] | None:
+        """
+        Pick a random movie, with a probability proportional to its rating.
+        The alias table is built again only after a change.
+        :return: title and info (tuple[str, dict] | None without movies)
+        """
+        if not self._titles:
+            return None
+        if self._alias_table is None:
+            self._alias_table = self._build_alias_table()
+
+        probabilities, aliases = self._alias_table
+        index = self._random.randrange(len(self._titles))
+        if self._random.random() >= probabilities[index]:
+            index = aliases[index]
+        return self._movie(self._titles[index])
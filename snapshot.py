@@ -0,0 +1,195 @@
+"""
+Immutable, versioned snapshots of the movies of a IStorage object,
+shared between threads.
+
+Readers of the same file version share one parse,
+writers are serialized and publish a new snapshot copy-on-write.
+"""
+import threading
+from types import MappingProxyType
+
+from istorage import IStorage
+
+
+class CatalogSnapshot:
+    """
+    Read-only view of the movies at one version.
+    """
+
+    def __init__(self, sequence: int, storage_version, movies: dict):
+        self.sequence = sequence
+        self.storage_version = storage_version
+        self._movies = movies
+        self.movies = MappingProxyType(movies)
+
+    @classmethod
+    def from_movies(cls, sequence: int, storage_version, movies: dict):
+        """
+        Create a snapshot from parsed movies.
+        :param sequence: snapshot sequence number (int)
+        :param storage_version: IStorage version
+        :param movies: dict
+        :return: snapshot (CatalogSnapshot)
+        """
+        return cls(sequence, storage_version,
+                   {title: MappingProxyType(info) for title, info in movies.items()})
+
+    def replace(self, sequence: int, storage_version,
+                title: str, info: dict = None):
+        """
+        Create the next snapshot with one movie added, changed or removed,
+        sharing the unchanged movies with this snapshot.
+        :param sequence: snapshot sequence number (int)
+        :param storage_version: IStorage version
+        :param title: str
+        :param info: movie info, None to remove the movie (dict | None)
+        :return: snapshot (CatalogSnapshot)
+        """
+        movies = dict(self._movies)
+        if info is None:
+            movies.pop(title, None)
+        else:
+            movies[title] = MappingProxyType(info)
+        return CatalogSnapshot(sequence, storage_version, movies)
+
+    def to_dict(self) -> dict:
+        """
+        Get a mutable copy of the movies, as list_movies() returns.
+        :return: movies (dict)
+        """
+        return {title: dict(info) for title, info in self._movies.items()}
+
+    def __len__(self) -> int:
+        return len(self._movies)
+
+
+class SnapshotManager:
+    """
+    Hands out the current CatalogSnapshot of a IStorage object.
+    The file is parsed again only when its version changes,
+    by one thread while the others wait for that parse.
+    """
+
+    def __init__(self, storage: IStorage):
+        self._storage = storage
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._sequence = 0
+
+    def _is_current(self, snapshot: CatalogSnapshot) -> bool:
+        """
+        Check if a snapshot matches the stored movies version.
+        :param snapshot: CatalogSnapshot | None
+        :return: bool
+        """
+        if snapshot is None:
+            return False
+        version = self._storage.get_version()
+        return version is not None and version == snapshot.storage_version
+
+    def _load(self) -> CatalogSnapshot:
+        """
+        Get the current snapshot, parsing the file if it changed.
+        Called with the lock held.
+        :return: snapshot (CatalogSnapshot)
+        """
+        if self._is_current(self._snapshot):
+            return self._snapshot
+
+        version = self._storage.get_version()
+        self._sequence += 1
+        self._snapshot = CatalogSnapshot.from_movies(
+            self._sequence, version, self._storage.list_movies())
+        return self._snapshot
+
+    def get_snapshot(self) -> CatalogSnapshot:
+        """
+        Get the current snapshot.
+        :return: snapshot (CatalogSnapshot)
+        """
+        snapshot = self._snapshot
+        if self._is_current(snapshot):
+            return snapshot
+
+        with self._lock:
+            return self._load()
+
+    def _write(self, func, args: tuple, title: str, info_after) -> str:
+        """
+        Run a storage command and publish the next snapshot
+        if the command changed the stored movies.
+        :param func: storage method
+        :param args: storage method arguments (tuple)
+        :param title: changed movie title (str)
+        :param info_after: callable giving the movie info after the command
+                           from the info before, None to remove the movie
+        :return: command message (str)
+        """
+        with self._lock:
+            snapshot = self._load()
+            message = func(*args)
+
+            version = self._storage.get_version()
+            if version != snapshot.storage_version:
+                self._sequence += 1
+                before = snapshot.movies.get(title)
+                self._snapshot = snapshot.replace(
+                    self._sequence, version, title, info_after(before))
+            return message
+
+    def add_movie(self,
+                  title: str,
+                  rating: float,
+                  year: int,
+                  poster: str,
+                  website: str,
+                  country: str) -> str:
+        """
+        Adds a movie to the storage and publishes the next snapshot.
+        :param title: str
+        :param rating: float
+        :param year: int
+        :param poster: str
+        :param website: str
+        :param country: str
+        :returns: add message (str)
+        """
+        info = {'rating': rating,
+                'year': year,
+                'notes': '',
+                'poster': poster,
+                'website': website,
+                'country': country}
+        return self._write(self._storage.add_movie,
+                           (title, rating, year, poster, website, country),
+                           title, lambda before: info)
+
+    def delete_movie(self, title: str) -> str:
+        """
+        Deletes a movie from the storage and publishes the next snapshot.
+        :param title: str
+        :return: delete message (str)
+        """
+        return self._write(self._storage.delete_movie, (title,),
+                           title, lambda before: None)
+
+    def update_movie(self, title: str, notes: str) -> str:
+        """
+        Updates a movie's notes in the storage and publishes the next snapshot.
+        :param title: str
+        :param notes: str
+        :return: update message (str)
+        """
+        return self._write(self._storage.update_movie, (title, notes),
+                           title, lambda before: before and {**before, 'notes': notes})
+
+    def update_fields(self, title: str, **fields) -> str:
+        """
+        Updates any subset of a movie's fields in the storage
+        and publishes the next snapshot.
+        :param title: str
+        :param fields: new field values
+        :return: update message (str)
+        """
+        return self._write(lambda: self._storage.update_fields(title, **fields), (),
+                           title, lambda before: before and {**before, **fields})
@@ -2,46 +2,58 @@
 StorageCsv class reading and writing to a CSV file.
 """
 import csv
+import io
+
+from csv_codec import CsvCodec
+from file_codecs import decompress, is_compressed, open_file
+from instrumentation import instrumentation
 from istorage import IStorage
-from utils import colors, check_file_path
+from parse_cache import ParseCache
+from utils import colors, check_file_path, file_version, \
+    validate_movie_fields, validate_new_movie
 
 
 class StorageCsv(IStorage):
     """
     StorageCsv class inherited IStorage Interface
     that exposes all the 4 CRUD commands.
-    It reads and writes to a CSV file.
+    It reads and writes to a CSV file,
+    optionally compressed, e.g. movies.csv.gz.
     """
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, cache_dir: str = None):
         self._file_path = file_path
+        # parsed file cache, if a cache directory is given
+        self._parse_cache = ParseCache(cache_dir) if cache_dir else None
 
-    def _read_file(self) -> str:
+    def get_version(self) -> tuple | None:
+        """
+        Returns the CSV file version.
+        :return: version (tuple | None)
         """
-        Reading from a CSV file.
-        :return: file content (str)
+        return file_version(self._file_path)
+
+    def _read_codec(self) -> CsvCodec:
+        """
+        Get the codec of the CSV file columns, reading only the header.
+        :return: codec (CsvCodec)
         """
         check_file_path(self._file_path, '.csv')
 
-        with open(self._file_path, 'r', encoding='utf8') as file:
-            return file.read()
+        with open_file(self._file_path, 'r', encoding='utf8', newline='') as file:
+            return CsvCodec(next(csv.reader(file), None))
 
-    def _write_line(self, *args):
+    def _write_line(self, title: str, info: dict):
         """
         Append a movie to movies CSV file.
-        :param args: Any
+        :param title: str
+        :param info: movie fields (dict)
         """
-        check_file_path(self._file_path, '.csv')
-
-        with open(self._file_path, 'a', encoding='utf8') as file:
-            data = ''
-            for i, arg in enumerate(args):
-                if i == len(args) - 1:
-                    data += arg + '\n'
-                else:
-                    data += arg + ','
+        codec = self._read_codec()
 
-            file.writelines(data)
+        with instrumentation.measure('write', self._file_path, append=True), \
+                open_file(self._file_path, 'a', encoding='utf8', newline='') as file:
+            file.write(codec.encode_line(title, info))
 
     def _read_lines(self) -> list:
         """
@@ -51,7 +63,8 @@ class StorageCsv(IStorage):
         check_file_path(self._file_path, '.csv')
 
         lines = []
-        with open(self._file_path, 'r', encoding='utf8') as file:
+        with instrumentation.measure('read', self._file_path), \
+                open_file(self._file_path, 'r', encoding='utf8', newline='') as file:
             reader = csv.reader(file)
             for row in reader:
                 lines.append(row)
@@ -64,7 +77,8 @@ class StorageCsv(IStorage):
         """
         check_file_path(self._file_path, '.csv')
 
-        with open(self._file_path, 'w', newline='', encoding='utf8') as file:
+        with instrumentation.measure('write', self._file_path), \
+                open_file(self._file_path, 'w', encoding='utf8', newline='') as file:
             writer = csv.writer(file)
             writer.writerows(lines)
 
@@ -76,18 +90,41 @@ class StorageCsv(IStorage):
         file and returns the data.
         :return: movies (dict)
         """
-        # try:
-        csv_contents = self._read_lines()
-        movies = {}
-        for content in csv_contents[1:]:
-            movies[content[0]] = {'rating': float(content[1]),
-                                  'year': int(content[2]),
-                                  'notes': content[3],
-                                  'poster': content[4],
-                                  'website': content[5],
-                                  'country': ",".join(content[6:len(content)])
-                                  }
-        return movies
+        if self._parse_cache is not None:
+            check_file_path(self._file_path, '.csv')
+            return self._parse_cache.load(
+                self._file_path,
+                lambda content: _parse_movies(decompress(self._file_path, content)))
+
+        lines = self._read_lines()
+        return CsvCodec(lines[0] if lines else None) \
+            .decode_movies([line for line in lines[1:] if line])
+
+    def iter_movies(self):
+        """
+        Iterate over the movies row by row,
+        without reading the whole CSV file.
+        :return: movies (generator of tuple[str, dict])
+        """
+        check_file_path(self._file_path, '.csv')
+
+        with open_file(self._file_path, 'r', encoding='utf8', newline='') as file:
+            reader = csv.reader(file)
+            codec = CsvCodec(next(reader, None))
+            for row in reader:
+                if row:
+                    yield codec.decode_row(row)
+
+    def read_columns(self, names) -> dict:
+        """
+        Returns some columns of the movies, one value per row,
+        decoded in bulk without building the movies.
+        :param names: column names, title or movie fields
+        :return: values by column name (dict[str, list])
+        """
+        lines = self._read_lines()
+        return CsvCodec(lines[0] if lines else None) \
+            .decode_columns([line for line in lines[1:] if line], names)
 
     def add_movie(self,
                   title: str,
@@ -127,25 +164,56 @@ class StorageCsv(IStorage):
         if not rating:
             raise ValueError('Rating must not be empty.')
 
-        movies = self._read_file()
-
-        if title in movies:
+        if title in set(self.read_columns(['title'])['title']):
             return colors.get('red') + \
                 f"Movie '{title}' won't be added as it is already exist." + \
                 colors.get('default')
 
-        self._write_line(title,
-                         str(rating),
-                         str(year),
-                         '',  # notes
-                         poster,
-                         website,
-                         country)
+        info = {'rating': rating,
+                'year': year,
+                'notes': '',
+                'poster': poster,
+                'website': website,
+                'country': country}
+        self._write_line(title, info)
+        self._emit_change('add', title, new=info)
 
         return colors.get('red') + \
             f"Movie '{title}' was successfully added." + \
             colors.get('default')
 
+    def add_movies(self, movies) -> int:
+        """
+        Adds several movies, skipping the titles already in the database,
+        appending all their rows in one write.
+        :param movies: iterable of (title, info) with all the movie fields
+        :return: number of added movies (int)
+        """
+        added = {}
+        for title, info in movies:
+            validate_new_movie(title, info)
+            added.setdefault(title, dict(info))
+
+        # stream the stored titles, keeping only the new movies in memory
+        check_file_path(self._file_path, '.csv')
+        with instrumentation.measure('read', self._file_path), \
+                open_file(self._file_path, 'r', encoding='utf8', newline='') as file:
+            reader = csv.reader(file)
+            codec = CsvCodec(next(reader, None))
+            for row in reader:
+                if row:
+                    added.pop(codec.title(row), None)
+
+        if added:
+            with instrumentation.measure('write', self._file_path, append=True), \
+                    open_file(self._file_path, 'a', encoding='utf8', newline='') as file:
+                file.write(''.join(codec.encode_line(title, info)
+                                   for title, info in added.items()))
+            for title, info in added.items():
+                self._emit_change('add', title, new=info)
+
+        return len(added)
+
     def delete_movie(self, title: str) -> str:
         """
         Deletes a movie from the movies database.
@@ -161,17 +229,17 @@ class StorageCsv(IStorage):
         if not title:
             raise ValueError('Title must not be empty.')
 
-        movies = self._read_file()
-
-        if title in movies:
-            lines = self._read_lines()
+        lines = self._read_lines()
+        codec = CsvCodec(lines[0] if lines else None)
+        deleted = [line for line in lines[1:] if line and codec.title(line) == title]
 
-            for i, line in enumerate(lines):
-                if title == line[0]:
-                    # delete a line of content
-                    lines.pop(i)
+        if deleted:
+            # delete the lines of content
+            lines = [line for line in lines if line not in deleted]
 
             self._write_all_content(lines)
+            for line in deleted:
+                self._emit_change('delete', title, old=codec.decode_row(line)[1])
 
             return f"{colors.get('red')}" \
                    f"Movie '{title}' successfully deleted." \
@@ -181,6 +249,47 @@ class StorageCsv(IStorage):
                f"Movie '{title}' not found." \
                f"{colors.get('default')}"
 
+    def delete_many(self, titles, changes: dict = None) -> int:
+        """
+        Deletes several movies, and updates the fields of others.
+        Loads the lines from file, drops and updates the movies' rows,
+        and saves all the content once.
+        :param titles: iterable of titles to delete
+        :param changes: new field values by title (dict | None)
+        :return: number of deleted movies (int)
+        """
+        titles = set(titles)
+        changes = {title: fields for title, fields in (changes or {}).items()
+                   if title not in titles}
+        for fields in changes.values():
+            validate_movie_fields(fields)
+
+        lines = self._read_lines()
+        codec = CsvCodec(lines[0] if lines else None)
+        kept = lines[:1]
+        deleted = []
+        updated = []
+        for line in lines[1:]:
+            title = codec.title(line) if line else None
+            if title in titles:
+                deleted.append(codec.decode_row(line))
+            elif title in changes:
+                title, old = codec.decode_row(line)
+                new = {**old, **changes[title]}
+                kept.append(codec.encode_row(title, new, line))
+                updated.append((title, old, new))
+            else:
+                kept.append(line)
+
+        if deleted or updated:
+            self._write_all_content(kept)
+            for title, old in deleted:
+                self._emit_change('delete', title, old=old)
+            for title, old, new in updated:
+                self._emit_change('update', title, old, new)
+
+        return len(deleted)
+
     def update_movie(self, title: str, notes: str) -> str:
         """
         Updates a movie from the movies database.
@@ -199,23 +308,136 @@ class StorageCsv(IStorage):
         if not title:
             raise ValueError('Title must not be empty.')
 
-        movies = self._read_file()
+        return self.update_fields(title, notes=notes)
+
+    def _locate_row(self, title: str) -> tuple | None:
+        """
+        Find the row of a title and its byte offsets in the CSV file.
+        :param title: str
+        :return: row, start and end offsets, file content and codec (tuple | None)
+        """
+        with instrumentation.measure('read', self._file_path), \
+                open(self._file_path, 'rb') as file:
+            content = file.read()
+
+        consumed = [0]
+
+        def lines():
+            for line in content.splitlines(keepends=True):
+                consumed[0] += len(line)
+                yield line.decode('utf8')
+
+        reader = csv.reader(lines())
+        codec = CsvCodec(next(reader, None))
+        start = consumed[0]
+        for row in reader:
+            if row and codec.title(row) == title:
+                return row, start, consumed[0], content, codec
+            start = consumed[0]
+        return None
+
+    def _update_compressed(self, title: str, fields: dict) -> str:
+        """
+        Updates a movie of a compressed file, rewriting the file.
+        :param title: str
+        :param fields: new field values (dict)
+        :return: update message (str)
+        """
+        if self.update_many({title: fields}):
+            return f"{colors.get('red')}" \
+                   f"Movie '{title}' successfully updated." \
+                   f"{colors.get('default')}"
+
+        return f"{colors.get('red')}" \
+               f"Movie '{title}' not found." \
+               f"{colors.get('default')}"
 
-        if title in movies:
-            lines = self._read_lines()
+    def update_fields(self, title: str, **fields) -> str:
+        """
+        Updates any subset of a movie's fields
+        (rating, year, notes, poster, website, country).
+        Only the movie's row and the rows after it are rewritten,
+        the row alone when its length does not change.
+        A compressed file is rewritten.
+        :param title: str
+        :param fields: new field values
+        :return: update message (str)
+        """
+        if not isinstance(title, str):
+            raise TypeError('Title must be string.')
+        if not title:
+            raise ValueError('Title must not be empty.')
+        validate_movie_fields(fields)
 
-            for line in lines[1:]:
-                if title == line[0]:
-                    print(title, line[0])
-                    # update a line of content
-                    line[3] = notes
+        check_file_path(self._file_path, '.csv')
 
-            self._write_all_content(lines)
+        # a compressed row can't be rewritten in place
+        if is_compressed(self._file_path):
+            return self._update_compressed(title, fields)
 
+        located = self._locate_row(title)
+        if located is None:
             return f"{colors.get('red')}" \
-                   f"Movie '{title}' successfully updated." \
+                   f"Movie '{title}' not found." \
                    f"{colors.get('default')}"
 
+        row, start, end, content, codec = located
+        old = codec.decode_row(row)[1]
+        new = {**old, **fields}
+
+        line_end = '\r\n' if content[start:end].endswith(b'\r\n') else '\n'
+        new_line = codec.encode_line(title, new, row, line_end).encode('utf8')
+
+        with instrumentation.measure('write', self._file_path), \
+                open(self._file_path, 'r+b') as file:
+            file.seek(start)
+            if len(new_line) == end - start:
+                file.write(new_line)
+            else:
+                file.write(new_line + content[end:])
+                file.truncate()
+
+        self._emit_change('update', title, old, new)
+
         return f"{colors.get('red')}" \
-               f"Movie '{title}' not found." \
+               f"Movie '{title}' successfully updated." \
                f"{colors.get('default')}"
+
+    def update_many(self, changes: dict) -> int:
+        """
+        Updates the fields of several movies.
+        Loads the lines from file, updates the movies' rows,
+        and saves all the content once.
+        :param changes: new field values by title (dict)
+        :return: number of updated movies (int)
+        """
+        for fields in changes.values():
+            validate_movie_fields(fields)
+
+        lines = self._read_lines()
+        codec = CsvCodec(lines[0] if lines else None)
+        updated = []
+        for i, line in enumerate(lines[1:], start=1):
+            if line and codec.title(line) in changes:
+                title, old = codec.decode_row(line)
+                new = {**old, **changes[title]}
+                lines[i] = codec.encode_row(title, new, line)
+                updated.append((title, old, new))
+
+        if updated:
+            self._write_all_content(lines)
+            for title, old, new in updated:
+                self._emit_change('update', title, old, new)
+
+        return len(updated)
+
+
+def _parse_movies(content: bytes) -> dict:
+    """
+    Parse the movies of a CSV file content.
+    :param content: bytes
+    :return: movies (dict)
+    """
+    lines = list(csv.reader(io.StringIO(content.decode('utf8'), newline='')))
+    return CsvCodec(lines[0] if lines else None) \
+        .decode_movies([line for line in lines[1:] if line])
@@ -3,18 +3,32 @@ StorageCsv class reading and writing to a JSON file.
 """
 import json
 
+from file_codecs import decompress, open_file
+from instrumentation import instrumentation
 from istorage import IStorage
-from utils import colors, check_file_path
+from parse_cache import ParseCache
+from utils import colors, check_file_path, file_version, \
+    validate_movie_fields, validate_new_movie
 
 
 class StorageJson(IStorage):
     """
     StorageJson class inherited IStorage Interface
     that exposes all the 4 CRUD commands.
-    It reads and writes to a JSON file.
+    It reads and writes to a JSON file,
+    optionally compressed, e.g. movies.json.gz.
     """
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, cache_dir: str = None):
         self._file_path = file_path
+        # parsed file cache, if a cache directory is given
+        self._parse_cache = ParseCache(cache_dir) if cache_dir else None
+
+    def get_version(self) -> tuple | None:
+        """
+        Returns the JSON file version.
+        :return: version (tuple | None)
+        """
+        return file_version(self._file_path)
 
     def _read_file(self):
         """
@@ -22,7 +36,13 @@ class StorageJson(IStorage):
         """
         check_file_path(self._file_path, '.json')
 
-        with open(self._file_path, 'r', encoding='utf8') as handle:
+        if self._parse_cache is not None:
+            return self._parse_cache.load(
+                self._file_path,
+                lambda content: json.loads(decompress(self._file_path, content)))
+
+        with instrumentation.measure('read', self._file_path), \
+                open_file(self._file_path, 'r', encoding='utf8') as handle:
             return json.load(handle)
 
     def _write_file(self, movies: dict):
@@ -31,7 +51,8 @@ class StorageJson(IStorage):
         """
         check_file_path(self._file_path, '.json')
 
-        with open(self._file_path, 'w', encoding='utf8') as file:
+        with instrumentation.measure('write', self._file_path), \
+                open_file(self._file_path, 'w', encoding='utf8') as file:
             json.dump(movies, file)
 
     def list_movies(self) -> dict:
@@ -97,11 +118,35 @@ class StorageJson(IStorage):
                          }
 
         self._write_file(movies)
+        self._emit_change('add', title, new=movies[title])
 
         return colors.get('red') + \
             f"Movie '{title}' was successfully added." + \
             colors.get('default')
 
+    def add_movies(self, movies) -> int:
+        """
+        Adds several movies, skipping the titles already in the database.
+        Loads the information from the JSON file, adds the movies,
+        and saves it once.
+        :param movies: iterable of (title, info) with all the movie fields
+        :return: number of added movies (int)
+        """
+        stored = self.list_movies()
+        added = {}
+        for title, info in movies:
+            validate_new_movie(title, info)
+            if title not in stored and title not in added:
+                added[title] = dict(info)
+
+        if added:
+            stored.update(added)
+            self._write_file(stored)
+            for title, info in added.items():
+                self._emit_change('add', title, new=info)
+
+        return len(added)
+
     def delete_movie(self, title: str) -> str:
         """
         Deletes a movie from the movies database.
@@ -119,9 +164,10 @@ class StorageJson(IStorage):
         movies = self.list_movies()
 
         if title in movies:
-            del movies[title]
+            old = movies.pop(title)
 
             self._write_file(movies)
+            self._emit_change('delete', title, old=old)
 
             return f"{colors.get('red')}" \
                    f"Movie '{title}' successfully deleted." \
@@ -131,6 +177,38 @@ class StorageJson(IStorage):
                f"Movie '{title}' not found." \
                f"{colors.get('default')}"
 
+    def delete_many(self, titles, changes: dict = None) -> int:
+        """
+        Deletes several movies, and updates the fields of others.
+        Loads the information from the JSON file, changes the movies,
+        and saves it once.
+        :param titles: iterable of titles to delete
+        :param changes: new field values by title (dict | None)
+        :return: number of deleted movies (int)
+        """
+        titles = set(titles)
+        changes = {title: fields for title, fields in (changes or {}).items()
+                   if title not in titles}
+        for fields in changes.values():
+            validate_movie_fields(fields)
+
+        movies = self.list_movies()
+        deleted = {title: movies.pop(title) for title in titles if title in movies}
+        updated = {}
+        for title, fields in changes.items():
+            if title in movies:
+                updated[title] = dict(movies[title])
+                movies[title].update(fields)
+
+        if deleted or updated:
+            self._write_file(movies)
+            for title, old in deleted.items():
+                self._emit_change('delete', title, old=old)
+            for title, old in updated.items():
+                self._emit_change('update', title, old, movies[title])
+
+        return len(deleted)
+
     def update_movie(self, title: str, notes: str) -> str:
         """
         Updates a movie from the movies database.
@@ -148,12 +226,32 @@ class StorageJson(IStorage):
         if not title:
             raise ValueError('Title must not be empty.')
 
+        return self.update_fields(title, notes=notes)
+
+    def update_fields(self, title: str, **fields) -> str:
+        """
+        Updates any subset of a movie's fields
+        (rating, year, notes, poster, website, country).
+        Loads the information from the JSON file, updates the movie,
+        and saves it once.
+        :param title: str
+        :param fields: new field values
+        :return: update message (str)
+        """
+        if not isinstance(title, str):
+            raise TypeError('Title must be string.')
+        if not title:
+            raise ValueError('Title must not be empty.')
+        validate_movie_fields(fields)
+
         movies = self.list_movies()
 
         if title in movies:
-            movies[title]['notes'] = notes
+            old = dict(movies[title])
+            movies[title].update(fields)
 
             self._write_file(movies)
+            self._emit_change('update', title, old, movies[title])
 
             return colors.get('red') + \
                 f"Movie '{title}' successfully updated." + \
@@ -162,3 +260,28 @@ class StorageJson(IStorage):
         return colors.get('red') + \
             f"Movie '{title}' not found." + \
             colors.get('default')
+
+    def update_many(self, changes: dict) -> int:
+        """
+        Updates the fields of several movies.
+        Loads the information from the JSON file, updates the movies,
+        and saves it once.
+        :param changes: new field values by title (dict)
+        :return: number of updated movies (int)
+        """
+        for fields in changes.values():
+            validate_movie_fields(fields)
+
+        movies = self.list_movies()
+        updated = {}
+        for title, fields in changes.items():
+            if title in movies:
+                updated[title] = dict(movies[title])
+                movies[title].update(fields)
+
+        if updated:
+            self._write_file(movies)
+            for title, old in updated.items():
+                self._emit_change('update', title, old, movies[title])
+
+        return len(updated)
@@ -0,0 +1,434 @@
+"""
+StorageNdjson class reading and writing to a newline-delimited JSON file,
+one movie per line.
+
+Adds and updates append the movie line, deletes append a tombstone line,
+and the last line of a title wins. The file is compacted, rewriting only
+the live movies, once the stale lines outnumber the live movies.
+The file may be compressed, e.g. movies.ndjson.gz.
+"""
+import json
+import os
+
+from file_codecs import compression_suffix, decompress, is_compressed, \
+    open_file, strip_compression
+from instrumentation import instrumentation
+from istorage import IStorage
+from parse_cache import ParseCache
+from utils import colors, check_file_path, file_version, \
+    validate_movie_fields, validate_new_movie
+
+# files smaller than this are parsed in one process
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+
+
+def _parse_lines(lines):
+    """
+    Parse movie lines, one at a time.
+    :param lines: iterable of bytes or str lines
+    :return: records (iterator of dict)
+    """
+    return (json.loads(line) for line in lines if line.strip())
+
+
+def _parse_chunk(file_path: str, start: int, end: int) -> list:
+    """
+    Parse the lines of a byte range of a file, run in a worker process.
+    :param file_path: str
+    :param start: offset of the first line (int)
+    :param end: offset after the last line (int)
+    :return: records (list[dict])
+    """
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        return list(_parse_lines(file.read(end - start).splitlines()))
+
+
+def _apply_records(records) -> tuple[dict, int]:
+    """
+    Apply the records in order, the last record of a title wins.
+    :param records: iterable of dict
+    :return: movies and number of lines (tuple[dict, int])
+    """
+    movies = {}
+    lines = 0
+    for record in records:
+        lines += 1
+        title = record.pop('title')
+        if record.get('deleted'):
+            movies.pop(title, None)
+        else:
+            movies[title] = record
+    return movies, lines
+
+
+def _movie_line(title: str, info: dict) -> str:
+    """
+    Serialize a movie to a line.
+    :param title: str
+    :param info: dict
+    :return: line (str)
+    """
+    return json.dumps({'title': title, **info}) + '\n'
+
+
+def _tombstone_line(title: str) -> str:
+    """
+    Serialize a deleted movie to a line.
+    :param title: str
+    :return: line (str)
+    """
+    return json.dumps({'title': title, 'deleted': True}) + '\n'
+
+
+class StorageNdjson(IStorage):
+    """
+    StorageNdjson class inherited IStorage Interface
+    that exposes all the 4 CRUD commands.
+    It reads and appends to a newline-delimited JSON file.
+    """
+
+    def __init__(self, file_path: str, max_workers: int = None,
+                 cache_dir: str = None):
+        self._file_path = file_path
+        self._extension = '.jsonl' if strip_compression(file_path).endswith('.jsonl') \
+            else '.ndjson'
+        self._max_workers = max_workers
+        self._executor = None
+        # parsed file cache, if a cache directory is given
+        self._parse_cache = ParseCache(cache_dir) if cache_dir else None
+        # (version, movies, number of lines) of the last read or write
+        self._state = None
+
+    def get_version(self) -> tuple | None:
+        """
+        Returns the NDJSON file version.
+        :return: version (tuple | None)
+        """
+        return file_version(self._file_path)
+
+    def _chunks(self, size: int, count: int) -> list[tuple[int, int]]:
+        """
+        Split the file into byte ranges of whole lines.
+        :param size: file size (int)
+        :param count: number of ranges (int)
+        :return: (start, end) offsets (list[tuple[int, int]])
+        """
+        bounds = [0]
+        with open(self._file_path, 'rb') as file:
+            for index in range(1, count):
+                file.seek(max(size * index // count, bounds[-1]))
+                file.readline()  # move to the next line start
+                bounds.append(min(file.tell(), size))
+        bounds.append(size)
+        return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+    def _read_records(self):
+        """
+        Read the movie lines, in parallel chunks for large files,
+        yielding the records to be applied without listing them all.
+        :return: records (iterator of dict)
+        """
+        if self._parse_cache is not None:
+            yield from self._parse_cache.load(
+                self._file_path,
+                lambda content: list(
+                    _parse_lines(decompress(self._file_path, content).splitlines())))
+            return
+
+        workers = self._max_workers or os.cpu_count() or 1
+        size = os.path.getsize(self._file_path)
+
+        with instrumentation.measure('read', self._file_path):
+            # a compressed file can't be split in byte ranges
+            if workers <= 1 or size < PARALLEL_MIN_BYTES or \
+                    is_compressed(self._file_path):
+                with open_file(self._file_path, 'rb') as file:
+                    yield from _parse_lines(file)
+                return
+
+            if self._executor is None:
+                # deferred, only large files are parsed in parallel
+                from concurrent.futures import ProcessPoolExecutor
+                self._executor = ProcessPoolExecutor(max_workers=workers)
+            chunks = self._chunks(size, workers * 4)
+            for chunk in self._executor.map(_parse_chunk,
+                                            [self._file_path] * len(chunks),
+                                            *zip(*chunks)):
+                yield from chunk
+
+    def _load(self) -> dict:
+        """
+        Get the current movies, read again only if the file changed.
+        :return: movies, not to be modified (dict)
+        """
+        check_file_path(self._file_path, self._extension)
+
+        version = self.get_version()
+        if self._state is None or version is None or self._state[0] != version:
+            movies, lines = _apply_records(self._read_records())
+            self._state = (version, movies, lines)
+        return self._state[1]
+
+    def _append(self, lines: list, changes: dict):
+        """
+        Append lines to the file and apply the changes to the movies.
+        :param lines: list of str
+        :param changes: movie info, None if deleted, by title (dict)
+        """
+        with instrumentation.measure('write', self._file_path, append=True), \
+                open_file(self._file_path, 'a', encoding='utf8') as file:
+            file.write(''.join(lines))
+
+        _, movies, count = self._state
+        for title, info in changes.items():
+            if info is None:
+                movies.pop(title, None)
+            else:
+                movies[title] = info
+        self._state = (self.get_version(), movies, count + len(lines))
+
+        # compact once the stale lines outnumber the live movies
+        if self._state[2] - len(movies) > max(len(movies), 100):
+            self.compact()
+
+    def compact(self):
+        """
+        Rewrite the file with only the live movies, one line each.
+        """
+        movies = self._load()
+        temp_path = f'{self._file_path}.tmp{compression_suffix(self._file_path)}'
+
+        with instrumentation.measure('write', self._file_path), \
+                open_file(temp_path, 'w', encoding='utf8') as file:
+            file.writelines(_movie_line(title, info) for title, info in movies.items())
+        os.replace(temp_path, self._file_path)
+
+        self._state = (self.get_version(), movies, len(movies))
+
+    def list_movies(self) -> dict:
+        """
+        Returns a dictionary of dictionaries that
+        contains the movies information in the database.
+        The function loads the information from the NDJSON
+        file and returns the data.
+        :return: movies (dict)
+        """
+        return {title: dict(info) for title, info in self._load().items()}
+
+    def add_movie(self,
+                  title: str,
+                  rating: float,
+                  year: int,
+                  poster: str,
+                  website: str,
+                  country: str) -> str:
+        """
+        Adds a movie to the movies database,
+        appending one line to the NDJSON file.
+        :param title: str
+        :param rating: float
+        :param year: int
+        :param poster: str
+        :param website: str
+        :param country: str
+        :returns: add message (str)
+        """
+        if not isinstance(title, str):
+            raise TypeError('Title must be string.')
+        if not isinstance(rating, float):
+            raise TypeError('Rating must be float.')
+        if not isinstance(year, int):
+            raise TypeError('Year must be int.')
+        if not isinstance(poster, str):
+            raise TypeError('Poster must be string.')
+        if not isinstance(website, str):
+            raise TypeError('Website must be string.')
+        if not isinstance(country, str):
+            raise TypeError('Country must be string.')
+
+        if not title:
+            raise ValueError('Title must not be empty.')
+        if not rating:
+            raise ValueError('Rating must not be empty.')
+
+        if title in self._load():
+            return colors.get('red') + \
+                f"Movie '{title}' won't be added as it is already exist." + \
+                colors.get('default')
+
+        info = {'rating': rating,
+                'year': year,
+                'notes': '',
+                'poster': poster,
+                'website': website,
+                'country': country
+                }
+        self._append([_movie_line(title, info)], {title: info})
+        self._emit_change('add', title, new=info)
+
+        return colors.get('red') + \
+            f"Movie '{title}' was successfully added." + \
+            colors.get('default')
+
+    def add_movies(self, movies) -> int:
+        """
+        Adds several movies, skipping the titles already in the database,
+        appending all their lines in one write.
+        :param movies: iterable of (title, info) with all the movie fields
+        :return: number of added movies (int)
+        """
+        stored = self._load()
+        added = {}
+        for title, info in movies:
+            validate_new_movie(title, info)
+            if title not in stored and title not in added:
+                added[title] = dict(info)
+
+        if added:
+            self._append([_movie_line(title, info) for title, info in added.items()],
+                         added)
+            for title, info in added.items():
+                self._emit_change('add', title, new=info)
+
+        return len(added)
+
+    def delete_movie(self, title: str) -> str:
+        """
+        Deletes a movie from the movies database,
+        appending a tombstone line to the NDJSON file.
+        :param title: str
+        :return: delete message (str)
+        """
+        if not isinstance(title, str):
+            raise TypeError('Title must be string.')
+
+        if not title:
+            raise ValueError('Title must not be empty.')
+
+        movies = self._load()
+
+        if title in movies:
+            old = movies[title]
+            self._append([_tombstone_line(title)], {title: None})
+            self._emit_change('delete', title, old=old)
+
+            return f"{colors.get('red')}" \
+                   f"Movie '{title}' successfully deleted." \
+                   f"{colors.get('default')}"
+
+        return f"{colors.get('red')}" \
+               f"Movie '{title}' not found." \
+               f"{colors.get('default')}"
+
+    def delete_many(self, titles, changes: dict = None) -> int:
+        """
+        Deletes several movies, and updates the fields of others,
+        appending the tombstones and updated movies lines in one write.
+        :param titles: iterable of titles to delete
+        :param changes: new field values by title (dict | None)
+        :return: number of deleted movies (int)
+        """
+        titles = set(titles)
+        changes = {title: fields for title, fields in (changes or {}).items()
+                   if title not in titles}
+        for fields in changes.values():
+            validate_movie_fields(fields)
+
+        movies = self._load()
+        deleted = {title: movies[title] for title in titles if title in movies}
+        updated = {title: {**movies[title], **fields}
+                   for title, fields in changes.items() if title in movies}
+        if not deleted and not updated:
+            return 0
+
+        old = {title: movies[title] for title in updated}
+        self._append([_tombstone_line(title) for title in deleted] +
+                     [_movie_line(title, info) for title, info in updated.items()],
+                     {**dict.fromkeys(deleted), **updated})
+        for title, info in deleted.items():
+            self._emit_change('delete', title, old=info)
+        for title, info in updated.items():
+            self._emit_change('update', title, old[title], info)
+
+        return len(deleted)
+
+    def update_movie(self, title: str, notes: str) -> str:
+        """
+        Updates a movie from the movies database.
+        :param title: str
+        :param notes: str
+        :return: update message (str)
+        """
+        if not isinstance(title, str):
+            raise TypeError('Title must be string.')
+        if not isinstance(notes, str):
+            raise TypeError('Notes must be string.')
+
+        if not title:
+            raise ValueError('Title must not be empty.')
+
+        return self.update_fields(title, notes=notes)
+
+    def update_fields(self, title: str, **fields) -> str:
+        """
+        Updates any subset of a movie's fields
+        (rating, year, notes, poster, website, country),
+        appending the updated movie line to the NDJSON file.
+        :param title: str
+        :param fields: new field values
+        :return: update message (str)
+        """
+        if not isinstance(title, str):
+            raise TypeError('Title must be string.')
+        if not title:
+            raise ValueError('Title must not be empty.')
+        validate_movie_fields(fields)
+
+        movies = self._load()
+
+        if title in movies:
+            old = movies[title]
+            new = {**old, **fields}
+            self._append([_movie_line(title, new)], {title: new})
+            self._emit_change('update', title, old, new)
+
+            return colors.get('red') + \
+                f"Movie '{title}' successfully updated." + \
+                colors.get('default')
+
+        return colors.get('red') + \
+            f"Movie '{title}' not found." + \
+            colors.get('default')
+
+    def update_many(self, changes: dict) -> int:
+        """
+        Updates the fields of several movies,
+        appending the updated movies lines in one write.
+        :param changes: new field values by title (dict)
+        :return: number of updated movies (int)
+        """
+        for fields in changes.values():
+            validate_movie_fields(fields)
+
+        movies = self._load()
+        updated = {title: {**movies[title], **fields}
+                   for title, fields in changes.items() if title in movies}
+        if not updated:
+            return 0
+
+        old = {title: movies[title] for title in updated}
+        self._append([_movie_line(title, info) for title, info in updated.items()],
+                     updated)
+        for title, info in updated.items():
+            self._emit_change('update', title, old[title], info)
+
+        return len(updated)
+
+    def close(self):
+        """
+        Shut down the process pool.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
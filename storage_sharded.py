@@ -0,0 +1,255 @@
+"""
+StorageSharded class reading and writing to a directory of JSON shards.
+"""
+import json
+import os
+import zlib
+
+from change_feed import ChangeFeed
+from istorage import IStorage
+from storage_json import StorageJson
+
+MANIFEST_FILE_NAME = 'shards.json'
+
+
+def _load_shard(file_path: str, cache_dir: str = None) -> dict:
+    """
+    Load the movies of one shard, run in a worker process.
+    :param file_path: str
+    :param cache_dir: parsed files cache directory (str | None)
+    :return: movies (dict)
+    """
+    return StorageJson(file_path, cache_dir).list_movies()
+
+
+class StorageSharded(IStorage):
+    """
+    StorageSharded class inherited IStorage Interface
+    that exposes all the 4 CRUD commands.
+    The movies are partitioned across N JSON files by hash of title.
+    The shards are loaded in parallel in a process pool,
+    and a command changing a movie only rewrites its shard.
+    """
+
+    def __init__(self, directory: str, max_workers: int = None,
+                 cache_dir: str = None):
+        self._directory = directory
+        self._cache_dir = cache_dir
+        self._max_workers = max_workers
+        self._executor = None
+
+        manifest_path = os.path.join(directory, MANIFEST_FILE_NAME)
+        if not os.path.isfile(manifest_path):
+            raise FileNotFoundError(f'The {directory} shard directory does not exist.')
+
+        with open(manifest_path, 'r', encoding='utf8') as file:
+            self._num_shards = json.load(file)['num_shards']
+
+        self._shard_paths = [os.path.join(directory, f'shard-{i:04d}.json')
+                             for i in range(self._num_shards)]
+        self._shards = [StorageJson(path, cache_dir) for path in self._shard_paths]
+
+    @classmethod
+    def create(cls, directory: str, num_shards: int, movies: dict = None):
+        """
+        Create a shard directory, partitioning the given movies.
+        :param directory: str
+        :param num_shards: int
+        :param movies: dict | None
+        :return: storage (StorageSharded)
+        """
+        if num_shards < 1:
+            raise ValueError('Number of shards must be at least 1.')
+
+        os.makedirs(directory, exist_ok=True)
+        shards = [{} for _ in range(num_shards)]
+        for title, info in (movies or {}).items():
+            shards[shard_index(title, num_shards)][title] = info
+
+        for i, shard in enumerate(shards):
+            with open(os.path.join(directory, f'shard-{i:04d}.json'),
+                      'w', encoding='utf8') as file:
+                json.dump(shard, file)
+
+        with open(os.path.join(directory, MANIFEST_FILE_NAME),
+                  'w', encoding='utf8') as file:
+            json.dump({'num_shards': num_shards}, file)
+
+        return cls(directory)
+
+    def _shard(self, title: str) -> StorageJson:
+        """
+        Get the shard storing a title.
+        :param title: str
+        :return: shard (StorageJson)
+        """
+        if not isinstance(title, str):
+            raise TypeError('Title must be string.')
+        return self._shards[shard_index(title, self._num_shards)]
+
+    def set_change_feed(self, change_feed: ChangeFeed):
+        """
+        Use a feed to publish the changes of all the shards.
+        :param change_feed: ChangeFeed
+        """
+        super().set_change_feed(change_feed)
+        for shard in self._shards:
+            shard.set_change_feed(change_feed)
+
+    def get_version(self) -> tuple | None:
+        """
+        Returns the versions of all the shards.
+        :return: version (tuple | None)
+        """
+        versions = tuple(shard.get_version() for shard in self._shards)
+        return None if None in versions else versions
+
+    def list_movies(self) -> dict:
+        """
+        Returns a dictionary of dictionaries that
+        contains the movies information in the database.
+        The function loads the shards in parallel
+        and merges them.
+        :return: movies (dict)
+        """
+        workers = self._max_workers or min(self._num_shards, os.cpu_count() or 1)
+
+        if workers <= 1 or self._num_shards == 1:
+            shards = [shard.list_movies() for shard in self._shards]
+        else:
+            if self._executor is None:
+                # deferred, only loading several shards needs it
+                from concurrent.futures import ProcessPoolExecutor
+                self._executor = ProcessPoolExecutor(max_workers=workers)
+            shards = self._executor.map(_load_shard, self._shard_paths,
+                                        [self._cache_dir] * self._num_shards)
+
+        movies = {}
+        for shard in shards:
+            movies.update(shard)
+        return movies
+
+    def iter_movies(self):
+        """
+        Iterate over the movies one shard at a time,
+        so only one shard is in memory.
+        :return: movies (generator of tuple[str, dict])
+        """
+        for shard in self._shards:
+            yield from shard.list_movies().items()
+
+    def add_movie(self,
+                  title: str,
+                  rating: float,
+                  year: int,
+                  poster: str,
+                  website: str,
+                  country: str) -> str:
+        """
+        Adds a movie to the movies database.
+        Loads the information from the title's shard, add the movie,
+        and saves the shard.
+        :param title: str
+        :param rating: float
+        :param year: int
+        :param poster: str
+        :param website: str
+        :param country: str
+        :returns: add message (str)
+        """
+        return self._shard(title).add_movie(title, rating, year,
+                                            poster, website, country)
+
+    def add_movies(self, movies) -> int:
+        """
+        Adds several movies, writing each changed shard once.
+        :param movies: iterable of (title, info) with all the movie fields
+        :return: number of added movies (int)
+        """
+        by_shard = {}
+        for title, info in movies:
+            by_shard.setdefault(self._shard(title), []).append((title, info))
+
+        return sum(shard.add_movies(shard_movies)
+                   for shard, shard_movies in by_shard.items())
+
+    def delete_movie(self, title: str) -> str:
+        """
+        Deletes a movie from the movies database.
+        Loads the information from the title's shard, deletes the movie,
+        and saves the shard.
+        :param title: str
+        :return: delete message (str)
+        """
+        return self._shard(title).delete_movie(title)
+
+    def delete_many(self, titles, changes: dict = None) -> int:
+        """
+        Deletes several movies, and updates the fields of others,
+        writing each changed shard once.
+        :param titles: iterable of titles to delete
+        :param changes: new field values by title (dict | None)
+        :return: number of deleted movies (int)
+        """
+        by_shard = {}
+        for title in titles:
+            by_shard.setdefault(shard_index(title, self._num_shards), ([], {}))[0].append(title)
+        for title, fields in (changes or {}).items():
+            by_shard.setdefault(shard_index(title, self._num_shards), ([], {}))[1][title] = fields
+
+        return sum(self._shards[index].delete_many(*shard_changes)
+                   for index, shard_changes in by_shard.items())
+
+    def update_movie(self, title: str, notes: str) -> str:
+        """
+        Updates a movie from the movies database.
+        Loads the information from the title's shard, updates the movie,
+        and saves the shard.
+        :param title: str
+        :param notes: str
+        :return: update message (str)
+        """
+        return self._shard(title).update_movie(title, notes)
+
+    def update_fields(self, title: str, **fields) -> str:
+        """
+        Updates any subset of a movie's fields
+        in the title's shard.
+        :param title: str
+        :param fields: new field values
+        :return: update message (str)
+        """
+        return self._shard(title).update_fields(title, **fields)
+
+    def update_many(self, changes: dict) -> int:
+        """
+        Updates the fields of several movies,
+        writing each changed shard once.
+        :param changes: new field values by title (dict)
+        :return: number of updated movies (int)
+        """
+        by_shard = {}
+        for title, fields in changes.items():
+            by_shard.setdefault(shard_index(title, self._num_shards), {})[title] = fields
+
+        return sum(self._shards[index].update_many(shard_changes)
+                   for index, shard_changes in by_shard.items())
+
+    def close(self):
+        """
+        Shut down the process pool.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def shard_index(title: str, num_shards: int) -> int:
+    """
+    Get the shard index of a title,
+    stable across processes unlike hash().
+    :param title: str
+    :param num_shards: int
+    :return: shard index (int)
+    """
+    return zlib.crc32(title.encode('utf8')) % num_shards
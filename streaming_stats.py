@@ -0,0 +1,254 @@
+"""
+Streaming movies statistics in one pass over the movies,
+with bounded memory, for catalogs that don't fit in memory.
+
+Count and average are exact, the quantiles are approximated
+by a KLL sketch, the best and worst movies are kept in heaps.
+Statistics computed separately, e.g. per shard or per process,
+are merged with StreamingStats.merge.
+"""
+import heapq
+import random
+
+from utils import colors
+
+
+class KllSketch:
+    """
+    KLL quantiles sketch.
+    Keeps O(k) items in levels of compactors: an item at level h
+    stands for 2**h items of the stream.
+    Exact until k items, then the rank error is about 1.7 / k.
+    """
+
+    def __init__(self, k: int = 200, seed: int = None):
+        if k < 8:
+            raise ValueError('k must be at least 8.')
+        self._k = k
+        self._random = random.Random(seed)
+        self._compactors = [[]]
+        self._size = 0
+        self.count = 0
+
+    def _capacity(self, level: int) -> int:
+        """
+        Number of items a level holds before being compacted,
+        smaller for the lower levels.
+        :param level: int
+        :return: capacity (int)
+        """
+        depth = len(self._compactors) - level - 1
+        return max(2, int(self._k * (2 / 3) ** depth))
+
+    def _max_size(self) -> int:
+        """
+        Number of items the sketch holds before being compressed.
+        :return: int
+        """
+        return sum(self._capacity(level) for level in range(len(self._compactors)))
+
+    def _compress(self):
+        """
+        Compact the full levels, each into half of its items
+        promoted to the next level, until the sketch fits.
+        """
+        for level, compactor in enumerate(self._compactors):
+            if len(compactor) < self._capacity(level):
+                continue
+            if level + 1 == len(self._compactors):
+                self._compactors.append([])
+
+            compactor.sort()
+            # an odd item out stays at its level
+            kept = [compactor.pop()] if len(compactor) % 2 else []
+            offset = self._random.randint(0, 1)
+            self._compactors[level + 1].extend(compactor[offset::2])
+            self._compactors[level] = kept
+
+            self._size = sum(len(items) for items in self._compactors)
+            if self._size < self._max_size():
+                break
+
+    def update(self, value: float):
+        """
+        Add a value of the stream.
+        :param value: float
+        """
+        self._compactors[0].append(value)
+        self._size += 1
+        self.count += 1
+        if self._size >= self._max_size():
+            self._compress()
+
+    def merge(self, other: 'KllSketch'):
+        """
+        Add the values of another sketch.
+        :param other: KllSketch
+        """
+        while len(self._compactors) < len(other._compactors):
+            self._compactors.append([])
+        for level, items in enumerate(other._compactors):
+            self._compactors[level].extend(items)
+        self._size = sum(len(items) for items in self._compactors)
+        self.count += other.count
+        while self._size >= self._max_size():
+            self._compress()
+
+    def quantile(self, fraction: float) -> float | None:
+        """
+        Get the approximate value at a rank fraction.
+        :param fraction: 0 for the minimum, 1 for the maximum (float)
+        :return: value (float | None without values)
+        """
+        if not 0 <= fraction <= 1:
+            raise ValueError('Fraction must be between 0 and 1.')
+        if not self.count:
+            return None
+
+        weighted = sorted((value, 2 ** level)
+                          for level, items in enumerate(self._compactors)
+                          for value in items)
+        total = sum(weight for _, weight in weighted)
+        rank = fraction * total
+
+        cumulative = 0
+        for value, weight in weighted:
+            cumulative += weight
+            if cumulative >= rank:
+                return value
+        return weighted[-1][0]
+
+
+class StreamingStats:
+    """
+    Movies statistics computed in one pass:
+    count, average, approximate quantiles,
+    top-k best and worst movies and a rating histogram.
+    """
+    QUANTILES = (0.25, 0.5, 0.75, 0.9)
+
+    def __init__(self, k: int = 200, top_k: int = 5, bins: int = 10,
+                 seed: int = None):
+        self._top_k = top_k
+        self._sketch = KllSketch(k, seed)
+        self._total = 0.0
+        # min-heap of the best (rating, title, year), of the worst (-rating, title, year)
+        self._best = []
+        self._worst = []
+        self._histogram = [0] * bins
+
+    @property
+    def count(self) -> int:
+        """
+        Number of movies.
+        :return: int
+        """
+        return self._sketch.count
+
+    def _push(self, heap: list, item: tuple):
+        """
+        Keep the top-k items of a heap.
+        :param heap: list
+        :param item: tuple
+        """
+        if len(heap) < self._top_k:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    def add(self, title: str, info: dict):
+        """
+        Add a movie.
+        :param title: str
+        :param info: dict
+        """
+        rating = info['rating']
+        self._sketch.update(rating)
+        self._total += rating
+        self._push(self._best, (rating, title, info.get('year')))
+        self._push(self._worst, (-rating, title, info.get('year')))
+
+        bins = len(self._histogram)
+        self._histogram[min(max(int(rating * bins / 10), 0), bins - 1)] += 1
+
+    def update(self, movies) -> 'StreamingStats':
+        """
+        Add the movies of an iterable.
+        :param movies: iterable of (title, info)
+        :return: self (StreamingStats)
+        """
+        for title, info in movies:
+            self.add(title, info)
+        return self
+
+    def merge(self, other: 'StreamingStats') -> 'StreamingStats':
+        """
+        Add the movies of other statistics.
+        :param other: StreamingStats
+        :return: self (StreamingStats)
+        """
+        if len(other._histogram) != len(self._histogram):
+            raise ValueError('Histograms must have the same number of bins.')
+
+        self._sketch.merge(other._sketch)
+        self._total += other._total
+        for item in other._best:
+            self._push(self._best, item)
+        for item in other._worst:
+            self._push(self._worst, item)
+        self._histogram = [count + other_count for count, other_count
+                           in zip(self._histogram, other._histogram)]
+        return self
+
+    def get_stats(self) -> dict:
+        """
+        Get movie statistics as data, like MovieAnalytics.get_stats,
+        with the quantiles and the rating histogram.
+        :return: movie statistics (dict)
+        """
+        bins = len(self._histogram)
+        histogram = [{'from': index * 10 / bins,
+                      'to': (index + 1) * 10 / bins,
+                      'count': count}
+                     for index, count in enumerate(self._histogram)]
+
+        if not self.count:
+            return {'count': 0, 'average': None, 'median': None,
+                    'quantiles': {}, 'best': [], 'worst': [],
+                    'histogram': histogram}
+
+        return {'count': self.count,
+                'average': self._total / self.count,
+                'median': self._sketch.quantile(0.5),
+                'quantiles': {str(fraction): self._sketch.quantile(fraction)
+                              for fraction in StreamingStats.QUANTILES},
+                'best': [title for _, title, _ in sorted(self._best, reverse=True)],
+                'worst': [title for _, title, _ in sorted(self._worst, reverse=True)],
+                'histogram': histogram}
+
+    def _best_movies(self, best: bool = True) -> list:
+        """
+        Get the kept movies of the best or the worst rating,
+        at most top-k of them.
+        :param best: bool
+        :return: (title, rating, year) of the movies (list[tuple])
+        """
+        heap = self._best if best else self._worst
+        top = max(heap)[0]
+        return sorted((title, top if best else -top, year)
+                      for rating, title, year in heap if rating == top)
+
+    def get_movie_stats(self) -> str:
+        """
+        Get movie statistics like MovieAnalytics.get_movie_stats,
+        the median approximated by the sketch.
+        :return: movie statistics (str)
+        """
+        from movies_analytics import format_movie_stats
+
+        if not self.count:
+            return f"{colors.get('red')}" \
+                   f"There are no movies in the file." \
+                   f"{colors.get('default')}"
+        return format_movie_stats(self._total / self.count, self._sketch.quantile(0.5),
+                                  self._best_movies(), self._best_movies(False))
@@ -0,0 +1,91 @@
+"""
+Test functions in AsyncStorageAdapter class
+"""
+import asyncio
+import threading
+
+import pytest
+
+from async_storage import AsyncStorageAdapter
+from conftest import CountingStorageJson
+
+
+@pytest.fixture(name='storage')
+def fixture_storage(json_storage):
+    """
+    JSON storage with TestTitanic, counting its parses
+    """
+    return json_storage(storage_class=CountingStorageJson)
+
+
+def test_concurrent_reads_share_one_parse(storage):
+    """
+    Test concurrent reads of an unchanged file parse it once
+    """
+    async def read_all():
+        async with AsyncStorageAdapter(storage) as adapter:
+            return await asyncio.gather(*[adapter.list_movies() for _ in range(10)])
+
+    results = asyncio.run(read_all())
+
+    assert storage.parses == 1
+    assert all(movies == results[0] for movies in results)
+    # every caller gets its own copy
+    results[0]['TestTitanic']['notes'] = 'changed'
+    assert results[1]['TestTitanic']['notes'] == ''
+
+
+def test_reads_run_concurrently(storage, monkeypatch):
+    """
+    Test two reads run at the same time in the thread pool
+    """
+    # unversioned, so the reads don't share a parse
+    monkeypatch.setattr(storage, 'get_version', lambda: None)
+    barrier = threading.Barrier(2, timeout=5)
+    list_movies = storage.list_movies
+
+    def wait_for_other_read():
+        barrier.wait()
+        return list_movies()
+
+    monkeypatch.setattr(storage, 'list_movies', wait_for_other_read)
+
+    async def read_twice():
+        async with AsyncStorageAdapter(storage) as adapter:
+            return await asyncio.gather(adapter.list_movies(), adapter.list_movies())
+
+    first, second = asyncio.run(read_twice())
+    assert first == second
+    assert storage.parses == 2
+
+
+def test_write_invalidates_read(storage):
+    """
+    Test the movies are parsed again after a write
+    """
+    async def add_and_read():
+        async with AsyncStorageAdapter(storage) as adapter:
+            await adapter.list_movies()
+            await adapter.add_movie('testMovie', 5.5, 2023, 'poster',
+                                    'https://www.testwebsite.com', 'Canada')
+            return await adapter.list_movies()
+
+    movies = asyncio.run(add_and_read())
+
+    assert 'testMovie' in movies
+    assert storage.parses >= 2
+
+
+def test_add_movie_with_invalid_rating(storage):
+    """
+    Test raising TypeError
+    with invalid rating
+    when adding a new movie
+    """
+    async def add():
+        async with AsyncStorageAdapter(storage) as adapter:
+            await adapter.add_movie('testMovie', 5, 2023, 'poster',
+                                    'https://www.testwebsite.com', 'Canada')
+
+    with pytest.raises(TypeError):
+        asyncio.run(add())
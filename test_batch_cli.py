@@ -0,0 +1,61 @@
+"""
+Test the non-interactive batch commands
+"""
+import io
+import json
+
+import pytest
+
+from batch_cli import BatchRunner
+from conftest import movie
+
+
+@pytest.fixture(name='storage')
+def fixture_storage(json_storage):
+    """
+    JSON storage with TestTitanic and TestRoom
+    """
+    return json_storage({'TestTitanic': movie(), 'TestRoom': movie(3.6, 2003)})
+
+
+def test_run_batch(storage):
+    """
+    Test every command line gets one JSON result,
+    the changes being seen by the next commands
+    """
+    output = io.StringIO()
+    BatchRunner(storage).run_batch(
+        ['# comment', '', 'add TestAlien --rating 8.5 --year 1979 --force',
+         'update TestRoom "So bad"', 'delete TestTitanic', 'sort --limit 1', 'list'],
+        output)
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [result['command'] for result in results] == \
+           ['add', 'update', 'delete', 'sort', 'list']
+    assert results[3]['movies'][0]['title'] == 'TestAlien'
+    assert results[4]['count'] == 2
+    assert results[4]['movies']['TestRoom']['notes'] == 'So bad'
+
+
+def test_histogram_without_png_suffix(storage):
+    """
+    Test a histogram file name without .png is an error result,
+    not a prompt, and the next commands still run
+    """
+    output = io.StringIO()
+    BatchRunner(storage).run_batch(['histogram out.txt', 'stats'], output)
+
+    histogram, stats = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert histogram == {'command': 'histogram',
+                         'error': "File name must end with '.png'."}
+    assert stats['command'] == 'stats'
+
+
+def test_invalid_commands(storage):
+    """
+    Test unknown commands and storage errors are error results
+    """
+    runner = BatchRunner(storage)
+
+    assert runner.run_line('rewind') == {'line': 'rewind', 'error': 'Invalid command.'}
+    assert runner.run_line('delete ""')['error'] == 'Title must not be empty.'
@@ -0,0 +1,74 @@
+"""
+Test the change events published by the storages
+"""
+import pytest
+
+from change_feed import ChangeFeed, read_changelog
+from storage_csv import StorageCsv
+
+
+@pytest.fixture(name='storage', params=['json', 'csv'])
+def fixture_storage(request, tmp_path, json_storage):
+    """
+    A test data file in JSON and in CSV format.
+    """
+    if request.param == 'json':
+        return json_storage()
+
+    file_path = tmp_path / 'movies.csv'
+    file_path.write_text('title,rating,year,notes,poster,website,country\n'
+                         'TestTitanic,7.9,1997,,poster,website,United States\n',
+                         encoding='utf8')
+    return StorageCsv(str(file_path))
+
+
+def test_commands_publish_events(storage):
+    """
+    Test add, update and delete publish numbered events
+    """
+    events = []
+    storage.change_feed.subscribe(events.append)
+
+    storage.add_movie('testMovie', 5.5, 2023, 'poster',
+                      'https://www.testwebsite.com', 'Canada')
+    storage.update_movie('TestTitanic', 'test notes')
+    storage.delete_movie('testMovie')
+
+    assert [(event.sequence, event.op, event.title) for event in events] == \
+           [(1, 'add', 'testMovie'),
+            (2, 'update', 'TestTitanic'),
+            (3, 'delete', 'testMovie')]
+    assert events[0].old is None and events[0].new['rating'] == 5.5
+    assert events[1].old['notes'] == '' and events[1].new['notes'] == 'test notes'
+    assert events[2].old['country'] == 'Canada' and events[2].new is None
+
+
+def test_failed_commands_publish_nothing(storage):
+    """
+    Test commands on a non exists movie publish no event
+    """
+    events = []
+    storage.change_feed.subscribe(events.append)
+
+    storage.update_movie('Unknown', 'test notes')
+    storage.delete_movie('Unknown')
+
+    assert not events
+
+
+def test_changelog_resumes_from_sequence(storage, tmp_path):
+    """
+    Test the changelog is appended and a new feed
+    continues the sequence numbers
+    """
+    changelog_path = str(tmp_path / 'changelog.jsonl')
+    storage.set_change_feed(ChangeFeed(changelog_path))
+    storage.add_movie('testMovie', 5.5, 2023, 'poster',
+                      'https://www.testwebsite.com', 'Canada')
+    storage.update_movie('testMovie', 'test notes')
+
+    storage.set_change_feed(ChangeFeed(changelog_path))
+    storage.delete_movie('testMovie')
+
+    assert [event.sequence for event in read_changelog(changelog_path)] == [1, 2, 3]
+    assert [event.op for event in read_changelog(changelog_path, 2)] == ['delete']
@@ -0,0 +1,160 @@
+"""
+Test the streaming conversion between storages
+"""
+import json
+
+import pytest
+
+from convert import convert, create_empty_file
+from storage_csv import StorageCsv
+from storage_json import StorageJson
+from storage_ndjson import StorageNdjson
+from storage_sharded import StorageSharded
+
+MOVIES = {f'TestMovie {i}': {'rating': 5.0 + i / 10,
+                             'year': 1990 + i,
+                             'notes': 'notes, "quoted"' if i % 2 else '',
+                             'poster': 'poster',
+                             'website': 'website',
+                             'country': 'United States'}
+          for i in range(25)}
+
+
+@pytest.fixture(name='source')
+def fixture_source(tmp_path):
+    """
+    JSON source storage with the test movies
+    """
+    file_path = tmp_path / 'movies.json'
+    file_path.write_text(json.dumps(MOVIES), encoding='utf8')
+    return StorageJson(str(file_path))
+
+
+@pytest.mark.parametrize('target_name, storage_class',
+                         [('movies.csv', StorageCsv),
+                          ('movies.ndjson', StorageNdjson),
+                          ('movies.json.gz', StorageJson),
+                          ('movies.shards', StorageSharded)])
+def test_convert(tmp_path, source, target_name, storage_class):
+    """
+    Test converting to each backend in batches
+    """
+    target_path = str(tmp_path / target_name)
+    create_empty_file(target_path)
+
+    summary = convert(source, storage_class(target_path), batch_size=10)
+
+    assert summary['converted'] == summary['added'] == summary['target_count'] == 25
+    assert summary['verified']
+    assert storage_class(target_path).list_movies() == MOVIES
+
+
+def test_convert_resumes_from_checkpoint(tmp_path, source):
+    """
+    Test resuming an interrupted conversion
+    """
+    target_path = str(tmp_path / 'movies.csv')
+    checkpoint_path = tmp_path / 'convert.ckpt'
+    create_empty_file(target_path)
+    target = StorageCsv(target_path)
+
+    class Interrupted(Exception):
+        """
+        Interruption of the conversion after its first batch
+        """
+
+    calls = []
+    add_movies = target.add_movies
+
+    def interrupted_add_movies(movies):
+        if len(calls) == 1:
+            raise Interrupted()
+        calls.append(len(movies))
+        return add_movies(movies)
+
+    target.add_movies = interrupted_add_movies
+    with pytest.raises(Interrupted):
+        convert(source, target, batch_size=10, checkpoint_path=str(checkpoint_path),
+                target_path=target_path)
+    assert json.loads(checkpoint_path.read_text(encoding='utf8'))['done'] == 10
+
+    target.add_movies = add_movies
+    summary = convert(source, target, batch_size=10, checkpoint_path=str(checkpoint_path),
+                      target_path=target_path)
+
+    assert summary['resumed_from'] == 10
+    assert summary['added'] == 15
+    assert summary['verified']
+    assert not checkpoint_path.exists()
+    assert target.list_movies() == MOVIES
+
+
+def test_convert_refuses_stale_checkpoint(tmp_path, source):
+    """
+    Test a checkpoint is refused once the source changed
+    or for another target
+    """
+    target_path = str(tmp_path / 'movies.csv')
+    checkpoint_path = tmp_path / 'convert.ckpt'
+    create_empty_file(target_path)
+    checkpoint_path.write_text(json.dumps({'done': 10, 'checksum': 0,
+                                           'source_version': source.get_version(),
+                                           'target_path': target_path}), encoding='utf8')
+
+    with pytest.raises(ValueError):
+        convert(source, StorageCsv(target_path), checkpoint_path=str(checkpoint_path),
+                target_path=str(tmp_path / 'other.csv'))
+
+    source.add_movie('TestRoom', 3.6, 2003, 'poster', 'website', 'United States')
+    with pytest.raises(ValueError):
+        convert(source, StorageCsv(target_path), checkpoint_path=str(checkpoint_path),
+                target_path=target_path)
+    assert StorageCsv(target_path).list_movies() == {}
+
+
+def test_convert_coerces_fields(tmp_path):
+    """
+    Test converting a JSON file with integer ratings
+    """
+    source_path = tmp_path / 'movies.json'
+    source_path.write_text(json.dumps({'TestTitanic': {**MOVIES['TestMovie 0'],
+                                                       'rating': 8}}),
+                           encoding='utf8')
+    target_path = str(tmp_path / 'movies.csv')
+    create_empty_file(target_path)
+
+    summary = convert(StorageJson(str(source_path)), StorageCsv(target_path))
+
+    assert summary['verified']
+    assert StorageCsv(target_path).list_movies()['TestTitanic']['rating'] == 8.0
+
+
+def test_convert_detects_mismatch(tmp_path, source):
+    """
+    Test the verification fails on a target that wasn't empty
+    """
+    target_path = tmp_path / 'movies.ndjson'
+    target_path.write_text('{"title": "TestTitanic", "rating": 7.9, "year": 1997, '
+                           '"notes": "", "poster": "poster", "website": "website", '
+                           '"country": "United States"}\n', encoding='utf8')
+
+    summary = convert(source, StorageNdjson(str(target_path)))
+
+    assert summary['target_count'] == 26
+    assert not summary['verified']
+
+
+def test_add_movies_skips_existing(source):
+    """
+    Test add_movies adds only the new titles
+    and validates the movies
+    """
+    movie = {'rating': 7.9, 'year': 1997, 'notes': '', 'poster': 'poster',
+             'website': 'website', 'country': 'United States'}
+
+    assert source.add_movies([('TestMovie 0', movie), ('TestTitanic', movie)]) == 1
+    assert source.list_movies()['TestTitanic'] == movie
+    with pytest.raises(ValueError):
+        source.add_movies([('TestRoom', {'rating': 3.6})])
+    with pytest.raises(TypeError):
+        source.add_movies([('TestRoom', {**movie, 'year': '2003'})])
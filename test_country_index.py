@@ -0,0 +1,74 @@
+"""
+Test the dictionary-encoded country column and its bitmaps
+"""
+import pytest
+
+import country
+from country_index import CountryIndex, split_countries
+
+TITLES = ['TestTitanic', 'TestAmelie', 'TestDasBoot', 'TestBabel', 'TestRoom']
+COUNTRIES = ['United States', 'France, Germany', 'Germany',
+             'United States, Mexico, France', 'United States']
+
+
+@pytest.fixture(name='index')
+def fixture_index():
+    """
+    Country index of the test movies
+    """
+    return CountryIndex(TITLES, COUNTRIES)
+
+
+def test_dictionary_encoding(index):
+    """
+    Test every distinct country field and name is stored once
+    """
+    assert index.names == ['United States', 'France', 'Germany', 'Mexico']
+    assert index.country(4) == 'United States'
+    assert index.country(4) is index.country(0)
+    assert index.countries(3) == ['United States', 'Mexico', 'France']
+    assert len(index) == 5
+
+
+def test_select(index):
+    """
+    Test the AND and OR queries
+    """
+    assert index.titles(index.select(all_of=['France', 'Germany'])) == ['TestAmelie']
+    assert index.titles(index.select(any_of=['Germany', 'Mexico'])) == \
+           ['TestAmelie', 'TestDasBoot', 'TestBabel']
+    assert index.titles(index.select(all_of=['United States'], any_of=['France', 'Japan'])) == \
+           ['TestBabel']
+    assert index.select(all_of=['Japan']) == 0
+    assert index.titles(0) == []
+    with pytest.raises(ValueError):
+        index.select()
+    with pytest.raises(TypeError):
+        index.bitmap(42)
+
+
+def test_counts(index):
+    """
+    Test the number of movies per country
+    """
+    assert index.counts() == {'United States': 3, 'France': 2, 'Germany': 2, 'Mexico': 1}
+    assert CountryIndex([], []).counts() == {}
+
+
+def test_country_flags(monkeypatch):
+    """
+    Test the flags are looked up by country name
+    """
+    responses = ['Request error.',
+                 [{'name': {'common': 'France'}, 'flags': {'png': 'fr.png'}},
+                  {'name': {'common': 'Germany'}, 'flags': {'png': 'de.png'}}]]
+    monkeypatch.setattr(country, 'get_countries', lambda: responses.pop(0))
+    country.load_flags.cache_clear()
+
+    # the API error isn't cached
+    assert country.get_country_flags('France') == ['']
+    assert country.get_country_flags('France, Germany,Japan') == ['fr.png', 'de.png', '']
+    assert country.get_country_flags('Germany') == ['de.png']
+    country.load_flags.cache_clear()
+
+    assert split_countries(' France ,, Germany') == ['France', 'Germany']
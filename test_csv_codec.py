@@ -0,0 +1,88 @@
+"""
+Test the schema-driven CSV codec of StorageCsv
+"""
+import pytest
+
+from csv_codec import CsvCodec
+from storage_csv import StorageCsv
+
+
+def test_values_with_commas_round_trip(tmp_path):
+    """
+    Test titles and countries with commas are quoted
+    """
+    file_path = tmp_path / 'movies.csv'
+    file_path.write_text('title,rating,year,notes,poster,website,country\n',
+                         encoding='utf8')
+    storage = StorageCsv(str(file_path))
+
+    storage.add_movie('Crouching Tiger, Hidden Dragon', 7.9, 2000, 'poster',
+                      'website', 'Taiwan, China')
+    storage.update_movie('Crouching Tiger, Hidden Dragon', 'notes, "quoted"')
+
+    movies = storage.list_movies()
+    assert movies['Crouching Tiger, Hidden Dragon']['country'] == 'Taiwan, China'
+    assert movies['Crouching Tiger, Hidden Dragon']['notes'] == 'notes, "quoted"'
+    assert '"Crouching Tiger, Hidden Dragon"' in file_path.read_text(encoding='utf8')
+
+
+def test_header_mapped_columns(tmp_path):
+    """
+    Test the columns are read and written in the header order
+    """
+    file_path = tmp_path / 'movies.csv'
+    file_path.write_text('year,title,rating,country,notes,poster,website\n'
+                         '1997,TestTitanic,7.9,United States,,poster,website\n',
+                         encoding='utf8')
+    storage = StorageCsv(str(file_path))
+
+    storage.add_movie('testMovie', 5.5, 2023, 'poster', 'website', 'Canada')
+    storage.update_fields('TestTitanic', rating=8.0)
+
+    assert storage.list_movies()['TestTitanic'] == {'rating': 8.0,
+                                                    'year': 1997,
+                                                    'notes': '',
+                                                    'poster': 'poster',
+                                                    'website': 'website',
+                                                    'country': 'United States'}
+    assert file_path.read_text(encoding='utf8').splitlines()[1:] == \
+           ['1997,TestTitanic,8.0,United States,,poster,website',
+            '2023,testMovie,5.5,Canada,,poster,website']
+
+
+def test_legacy_unquoted_country(tmp_path):
+    """
+    Test reading a country split over the last columns
+    """
+    file_path = tmp_path / 'movies.csv'
+    file_path.write_text('title,rating,year,notes,poster,website,country\n'
+                         'TestTitanic,7.9,1997,,poster,website,United States, Mexico\n',
+                         encoding='utf8')
+
+    movies = StorageCsv(str(file_path)).list_movies()
+    assert movies['TestTitanic']['country'] == 'United States, Mexico'
+
+
+def test_read_columns(tmp_path):
+    """
+    Test reading only some typed columns
+    """
+    file_path = tmp_path / 'movies.csv'
+    file_path.write_text('title,rating,year,notes,poster,website,country\n'
+                         'TestTitanic,7.9,1997,,poster,website,United States\n'
+                         'TestRoom,3.6,2003,,poster,website,United States\n',
+                         encoding='utf8')
+
+    assert StorageCsv(str(file_path)).read_columns(['title', 'rating']) == \
+           {'title': ['TestTitanic', 'TestRoom'], 'rating': [7.9, 3.6]}
+    with pytest.raises(ValueError):
+        StorageCsv(str(file_path)).read_columns(['budget'])
+
+
+def test_header_without_title():
+    """
+    Test raising ValueError
+    with a header without title column
+    """
+    with pytest.raises(ValueError):
+        CsvCodec(['rating', 'year'])
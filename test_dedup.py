@@ -0,0 +1,178 @@
+"""
+Test the near-duplicate titles detection and merge
+"""
+import pytest
+
+from conftest import movie
+from convert import create_empty_file
+from dedup import DuplicateIndex, find_duplicates, merge_duplicates, normalize_title, \
+    title_numbers
+from movie_app import MovieApp
+from storage_csv import StorageCsv
+from storage_json import StorageJson
+from storage_ndjson import StorageNdjson
+from storage_sharded import StorageSharded
+
+MOVIES = {'The Godfather': movie(8.0, 1972, 'classic'),
+          'Godfather, The': movie(8.0, 1972, 'mafia', poster=''),
+          'The Godfather (1972)': movie(8.0, 1972),
+          'The Shawshank Redemption': movie(8.0, 1994),
+          'The Shawshank Redemtion': movie(8.0, 1994),
+          'Rocky II': movie(8.0, 1979),
+          'Rocky III': movie(8.0, 1982),
+          'Dune': movie(8.0, 1984),
+          'Dune (2021)': movie(8.0, 2021),
+          'Amélie': movie(8.0, 2001),
+          'Amelie': movie(8.0, 2001)}
+
+
+@pytest.fixture(name='storage')
+def fixture_storage(json_storage):
+    """
+    JSON storage with the test movies
+    """
+    return json_storage(MOVIES)
+
+
+def test_normalize_title():
+    """
+    Test the spellings of a title normalize to the same text
+    """
+    assert normalize_title('The Godfather') == normalize_title('Godfather, The') == \
+           normalize_title('The Godfather (1972)') == 'godfather'
+    assert normalize_title('Amélie') == 'amelie'
+    assert normalize_title('Star Wars: Episode IV - A New Hope') == \
+           'star wars episode iv a new hope'
+    assert title_numbers('rocky iv 2') == (4, 2)
+
+
+def test_clusters(storage):
+    """
+    Test the clusters of duplicates, not merging sequels or remakes
+    """
+    assert find_duplicates(storage) == [['The Godfather', 'Godfather, The',
+                                         'The Godfather (1972)'],
+                                        ['The Shawshank Redemption',
+                                         'The Shawshank Redemtion'],
+                                        ['Amélie', 'Amelie']]
+    assert find_duplicates(storage, threshold=0.9, max_year_gap=None) == \
+           [['The Godfather', 'Godfather, The', 'The Godfather (1972)'],
+            ['Dune', 'Dune (2021)'],
+            ['Amélie', 'Amelie']]
+
+
+def test_likely_duplicates(storage):
+    """
+    Test the add path check follows the storage changes
+    """
+    index = DuplicateIndex(storage)
+
+    assert index.likely_duplicates('Shawshank Redemption', 1994) == \
+           [('The Shawshank Redemption', 1.0), ('The Shawshank Redemtion', 0.7619)]
+    assert index.likely_duplicates('Rocky IV', 1985) == []
+    assert index.likely_duplicates('Dune', 2021) == [('Dune (2021)', 1.0)]
+
+    storage.add_movie('Rocky IV, The', 6.8, 1985, 'poster', 'website', 'United States')
+    storage.delete_movie('Dune (2021)')
+    assert index.likely_duplicates('Rocky IV', 1985) == [('Rocky IV, The', 1.0)]
+    assert index.likely_duplicates('Dune', 2021) == []
+    with pytest.raises(TypeError):
+        index.likely_duplicates(42)
+    with pytest.raises(ValueError):
+        DuplicateIndex(storage, threshold=1.5)
+
+
+def test_saved_index(tmp_path, storage, monkeypatch):
+    """
+    Test the saved index is loaded while the storage is unchanged,
+    and follows the changes made after loading it
+    """
+    index_path = str(tmp_path / 'movies.json.dup-index')
+    index = DuplicateIndex(storage, index_path=index_path)
+    index.likely_duplicates('Dune', 2021)
+    index.close()
+
+    def rebuild(_self):
+        raise AssertionError('The saved index was not loaded.')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(DuplicateIndex, 'build', rebuild)
+        loaded = DuplicateIndex(storage, index_path=index_path)
+        assert loaded.likely_duplicates('Dune', 2021) == [('Dune (2021)', 1.0)]
+        storage.add_movie('Rocky IV, The', 6.8, 1985, 'poster', 'website', 'United States')
+        assert loaded.likely_duplicates('Rocky IV', 1985) == [('Rocky IV, The', 1.0)]
+        loaded.close()
+
+    # other hash functions can't use the saved band keys
+    build = DuplicateIndex.build
+    built = []
+
+    def record_build(self):
+        built.append(True)
+        build(self)
+
+    monkeypatch.setattr(DuplicateIndex, 'build', record_build)
+    assert DuplicateIndex(storage, seed=2, index_path=index_path) \
+        .likely_duplicates('Dune', 2021) == [('Dune (2021)', 1.0)]
+    assert built == [True]
+
+
+def test_app_saves_index(tmp_path, storage):
+    """
+    Test the app saves the index of its add checks when closed,
+    closing it again doing nothing
+    """
+    index_path = tmp_path / 'movies.json.dup-index'
+    app = MovieApp(storage, duplicates_index_path=str(index_path))
+    assert app.likely_duplicates('Dune', 2021) == [('Dune (2021)', 1.0)]
+    assert not index_path.exists()
+
+    app.close()
+    app.close()
+    assert index_path.exists()
+
+
+def test_merge_duplicates(storage):
+    """
+    Test merging every cluster into its first movie without a suffix
+    """
+    summary = merge_duplicates(storage, find_duplicates(storage))
+
+    assert summary == {'deleted': 4,
+                       'merged': {'Godfather, The': 'The Godfather',
+                                  'The Godfather (1972)': 'The Godfather',
+                                  'The Shawshank Redemtion': 'The Shawshank Redemption',
+                                  'Amelie': 'Amélie'}}
+    movies = storage.list_movies()
+    assert movies['The Godfather']['notes'] == 'classic; mafia'
+    assert len(movies) == len(MOVIES) - 4
+    assert find_duplicates(storage) == []
+
+
+@pytest.mark.parametrize('file_name', ['movies.json', 'movies.csv', 'movies.ndjson',
+                                       'movies.shards'])
+def test_delete_many(tmp_path, file_name):
+    """
+    Test deleting and updating movies in one batch on every backend
+    """
+    file_path = str(tmp_path / file_name)
+    if file_name.endswith('.shards'):
+        storage = StorageSharded.create(file_path, 3)
+    else:
+        create_empty_file(file_path)
+        storage = {'json': StorageJson, 'csv': StorageCsv,
+                   'ndjson': StorageNdjson}[file_name.split('.')[-1]](file_path)
+    storage.add_movies(MOVIES.items())
+    events = []
+    storage.change_feed.subscribe(events.append)
+
+    deleted = storage.delete_many(['Godfather, The', 'Rocky III', 'TestTitanic'],
+                                  {'The Godfather': {'notes': 'merged'}})
+
+    movies = storage.list_movies()
+    assert deleted == 2
+    assert 'Godfather, The' not in movies and 'Rocky III' not in movies
+    assert movies['The Godfather']['notes'] == 'merged'
+    assert sorted((event.op, event.title) for event in events) == \
+           [('delete', 'Godfather, The'), ('delete', 'Rocky III'),
+            ('update', 'The Godfather')]
@@ -0,0 +1,64 @@
+"""
+Test the storages on compressed files
+"""
+import bz2
+import gzip
+import lzma
+
+import pytest
+
+from file_codecs import open_file, strip_compression
+from storage_csv import StorageCsv
+from storage_json import StorageJson
+from storage_ndjson import StorageNdjson
+from utils import check_file_path
+
+DECOMPRESS = {'.gz': gzip.decompress, '.bz2': bz2.decompress, '.xz': lzma.decompress}
+
+INITIAL_CONTENT = {
+    'json': '{"TestTitanic": {"rating": 7.9, "year": 1997, "notes": "", '
+            '"poster": "poster", "website": "website", "country": "United States"}}',
+    'csv': 'title,rating,year,notes,poster,website,country\n'
+           'TestTitanic,7.9,1997,,poster,website,United States\n',
+    'ndjson': '{"title": "TestTitanic", "rating": 7.9, "year": 1997, "notes": "", '
+              '"poster": "poster", "website": "website", "country": "United States"}\n'}
+
+STORAGE_CLASSES = {'json': StorageJson, 'csv': StorageCsv, 'ndjson': StorageNdjson}
+
+
+@pytest.mark.parametrize('suffix', list(DECOMPRESS))
+@pytest.mark.parametrize('backend', list(STORAGE_CLASSES))
+def test_commands_on_compressed_file(tmp_path, backend, suffix):
+    """
+    Test add, update and delete on a compressed file,
+    which stays compressed
+    """
+    file_path = str(tmp_path / f'movies.{backend}{suffix}')
+    with open_file(file_path, 'w', encoding='utf8', newline='') as file:
+        file.write(INITIAL_CONTENT[backend])
+    storage = STORAGE_CLASSES[backend](file_path)
+
+    storage.add_movie('testMovie', 5.5, 2023, 'poster',
+                      'https://www.testwebsite.com', 'Canada')
+    storage.update_movie('TestTitanic', 'test notes')
+    storage.delete_movie('testMovie')
+
+    movies = STORAGE_CLASSES[backend](file_path).list_movies()
+    assert list(movies) == ['TestTitanic']
+    assert movies['TestTitanic']['notes'] == 'test notes'
+    with open(file_path, 'rb') as file:
+        assert b'TestTitanic' in DECOMPRESS[suffix](file.read())
+
+
+def test_check_file_path_with_compression(tmp_path):
+    """
+    Test the file format ignores the compression extension
+    """
+    file_path = tmp_path / 'movies.json.gz'
+    file_path.write_bytes(gzip.compress(b'{}'))
+
+    check_file_path(str(file_path), '.json')
+    with pytest.raises(ValueError):
+        check_file_path(str(file_path), '.csv')
+    assert strip_compression('movies.csv.bz2') == 'movies.csv'
+    assert strip_compression('movies.csv') == 'movies.csv'
@@ -0,0 +1,52 @@
+"""
+Test the fuzzy title scoring
+"""
+from fuzzywuzzy import fuzz
+
+from fuzzy_scoring import FuzzyScorer
+from movies_analytics import MovieAnalytics
+
+TITLES = ['The Godfather', 'The Godfather: Part II', 'Titanic',
+          'The Dark Knight', 'Inception', '12 Angry Men']
+
+
+def test_scores_match_fuzz_ratio():
+    """
+    Test the scores are the case-insensitive fuzz.ratio
+    """
+    scores = FuzzyScorer(TITLES, max_workers=1).score('godfther')
+
+    assert scores == {title: fuzz.ratio('godfther', title.lower()) for title in TITLES}
+
+
+def test_parallel_scores_match_sequential_scores():
+    """
+    Test scoring in worker processes, in chunks
+    """
+    queries = ['godfther', 'TITANIC', 'titanic', 'dark night']
+    expected = FuzzyScorer(TITLES, max_workers=1).score_many(queries)
+
+    with FuzzyScorer(TITLES, max_workers=2, min_parallel=0) as scorer:
+        assert scorer.score_many(queries) == expected
+
+
+def test_best_matches():
+    """
+    Test finding the catalog titles of an imported list
+    """
+    matches = FuzzyScorer(TITLES, max_workers=1).best_matches(
+        ['titanic', 'The Dark Knigt', 'Amelie'])
+
+    assert matches == {'titanic': ('Titanic', 100),
+                       'The Dark Knigt': ('The Dark Knight', 97),
+                       'Amelie': None}
+
+
+def test_search_with_scorer():
+    """
+    Test the search gives the same results with a scorer
+    """
+    movies = {title: {'rating': 8.0, 'year': 2000} for title in TITLES}
+
+    assert MovieAnalytics(movies, FuzzyScorer(movies, max_workers=1)).search('godfther') == \
+           MovieAnalytics(movies).search('godfther')
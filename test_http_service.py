@@ -0,0 +1,96 @@
+"""
+Test the movies HTTP service
+"""
+import http.client
+import json
+import threading
+
+import pytest
+
+from http_service import create_server
+from storage_json import StorageJson
+
+
+@pytest.fixture(name='connection')
+def fixture_connection(tmp_path):
+    """
+    Serve a test movies file and
+    open a keep-alive connection to it.
+    """
+    file_path = tmp_path / 'movies.json'
+    file_path.write_text(json.dumps({'TestTitanic': {'rating': 7.9,
+                                                     'year': 1997,
+                                                     'poster': 'poster',
+                                                     'notes': '',
+                                                     'website': 'website',
+                                                     'country': 'United States'}}),
+                         encoding='utf8')
+    server = create_server(StorageJson(str(file_path)), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+    yield connection
+
+    connection.close()
+    server.shutdown()
+    server.server_close()
+
+
+def request(connection, method: str, path: str, body: dict = None) -> tuple:
+    """
+    Send a request on the kept alive connection.
+    :return: status and JSON body (tuple)
+    """
+    connection.request(method, path,
+                       body=json.dumps(body) if body is not None else None)
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def test_get_movie(connection):
+    """
+    Test getting an existing and a non exists movie
+    """
+    assert request(connection, 'GET', '/movies/TestTitanic')[0] == 200
+    assert request(connection, 'GET', '/movies/Unknown')[0] == 404
+
+
+def test_add_update_delete_movie(connection):
+    """
+    Test the CRUD endpoints on one connection
+    """
+    status, _ = request(connection, 'POST', '/movies',
+                        {'title': 'testMovie', 'rating': 5.5, 'year': 2023})
+    assert status == 201
+    assert request(connection, 'POST', '/movies',
+                   {'title': 'testMovie', 'rating': 5.5, 'year': 2023})[0] == 409
+
+    assert request(connection, 'PATCH', '/movies/testMovie',
+                   {'notes': 'test notes'})[0] == 200
+    assert request(connection, 'GET', '/movies/testMovie')[1]['testMovie']['notes'] \
+           == 'test notes'
+
+    assert request(connection, 'DELETE', '/movies/testMovie')[0] == 200
+    assert request(connection, 'DELETE', '/movies/testMovie')[0] == 404
+
+
+def test_add_movie_with_invalid_rating(connection):
+    """
+    Test responding 400 with invalid rating
+    when adding a new movie
+    """
+    assert request(connection, 'POST', '/movies',
+                   {'title': 'testMovie', 'rating': '5', 'year': 2023})[0] == 400
+
+
+def test_stats_and_top(connection):
+    """
+    Test the statistics and top k endpoints
+    """
+    status, stats = request(connection, 'GET', '/stats')
+    assert status == 200
+    assert stats['best'] == ['TestTitanic']
+
+    status, top = request(connection, 'GET', '/top?k=1')
+    assert status == 200
+    assert top[0]['title'] == 'TestTitanic'
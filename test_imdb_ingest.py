@@ -0,0 +1,134 @@
+"""
+Test the ingest of IMDb dataset dumps
+"""
+import gzip
+
+import pytest
+
+from batch_cli import BatchRunner
+from imdb_ingest import ingest
+from storage_ndjson import StorageNdjson
+
+BASICS = ('tconst\ttitleType\tprimaryTitle\toriginalTitle\tisAdult\t'
+          'startYear\tendYear\truntimeMinutes\tgenres\n'
+          'tt0000001\tshort\tCarmencita\tCarmencita\t0\t1894\t\\N\t1\tDocumentary\n'
+          'tt0000009\tmovie\tMiss Jerry\tMiss Jerry\t0\t1894\t\\N\t45\tRomance\n'
+          'tt0111161\tmovie\tThe Shawshank Redemption\tThe Shawshank Redemption\t0\t'
+          '1994\t\\N\t142\tDrama\n'
+          'tt0120338\tmovie\tTitanic\tTitanic\t0\t1997\t\\N\t194\tDrama\n'
+          'tt0368226\tmovie\tThe Room\tThe Room\t0\t2003\t\\N\t99\tDrama\n'
+          'tt1000000\tmovie\tNo Year\tNo Year\t0\t\\N\t\\N\t99\tDrama\n'
+          'tt1500000\tmovie\tNo Rating\tNo Rating\t0\t2010\t\\N\t99\tDrama\n'
+          'tt2000000\tmovie\tTitanic\tTitanic\t0\t2012\t\\N\t99\tDrama\n')
+
+RATINGS = ('tconst\taverageRating\tnumVotes\n'
+           'tt0000001\t5.7\t2000\n'
+           'tt0000009\t5.4\t200\n'
+           'tt0111161\t9.3\t2800000\n'
+           'tt0120338\t7.9\t1200000\n'
+           'tt0368226\t3.6\t100000\n'
+           'tt1000000\t6.0\t100\n'
+           'tt2000000\t5.0\t50\n')
+
+
+@pytest.fixture(name='dumps')
+def fixture_dumps(tmp_path):
+    """
+    Gzip compressed title.basics and title.ratings dumps
+    """
+    basics_path = tmp_path / 'title.basics.tsv.gz'
+    ratings_path = tmp_path / 'title.ratings.tsv.gz'
+    basics_path.write_bytes(gzip.compress(BASICS.encode('utf8')))
+    ratings_path.write_bytes(gzip.compress(RATINGS.encode('utf8')))
+    return str(basics_path), str(ratings_path)
+
+
+@pytest.fixture(name='storage')
+def fixture_storage(tmp_path):
+    """
+    Empty NDJSON storage
+    """
+    file_path = tmp_path / 'movies.ndjson'
+    file_path.write_text('', encoding='utf8')
+    return StorageNdjson(str(file_path))
+
+
+def test_ingest(dumps, storage):
+    """
+    Test joining the dumps, skipping the movies without year or rating
+    and the repeated titles
+    """
+    summary = ingest(storage, *dumps, batch_size=2)
+
+    movies = storage.list_movies()
+    assert list(movies) == ['Miss Jerry', 'The Shawshank Redemption', 'Titanic', 'The Room']
+    assert movies['Titanic'] == {'rating': 7.9,
+                                 'year': 1997,
+                                 'notes': '',
+                                 'poster': '',
+                                 'website': 'https://www.imdb.com/title/tt0120338',
+                                 'country': ''}
+    assert summary['rows'] == 8
+    assert summary['matched'] == 5
+    assert summary['added'] == 4
+    assert summary['skipped'] == 1
+
+
+def test_ingest_filters(dumps, storage):
+    """
+    Test the type, year and votes filters
+    """
+    ingest(storage, *dumps, title_types=None, min_year=1990, max_year=2005,
+           min_votes=500000)
+
+    assert list(storage.list_movies()) == ['The Shawshank Redemption', 'Titanic']
+
+
+def test_ingest_command(dumps, storage):
+    """
+    Test the batch ingest command keeps the movies,
+    or every title type with --all-types
+    """
+    runner = BatchRunner(storage)
+    assert runner.run_line(f'ingest {dumps[0]} {dumps[1]}')['added'] == 4
+    assert 'Carmencita' not in storage.list_movies()
+    assert 'error' in runner.run_line(f'ingest {dumps[0]} {dumps[1]} --types short --all-types')
+
+    storage.delete_many(list(storage.list_movies()))
+    assert runner.run_line(f'ingest {dumps[0]} {dumps[1]} --all-types')['added'] == 5
+    assert 'Carmencita' in storage.list_movies()
+
+
+def test_ingest_parallel(dumps, storage):
+    """
+    Test parsing small blocks in a process pool
+    gives the same movies
+    """
+    summary = ingest(storage, *dumps, max_workers=2, block_size=64)
+
+    assert summary['added'] == 4
+    assert list(storage.list_movies()) == \
+           ['Miss Jerry', 'The Shawshank Redemption', 'Titanic', 'The Room']
+
+
+def test_ingest_unsorted(tmp_path, dumps, storage):
+    """
+    Test raising ValueError on a dump not sorted by title id
+    """
+    basics_path = tmp_path / 'title.basics.tsv'
+    lines = BASICS.splitlines(keepends=True)
+    basics_path.write_text(lines[0] + ''.join(reversed(lines[1:])), encoding='utf8')
+
+    with pytest.raises(ValueError):
+        ingest(storage, str(basics_path), dumps[1])
+
+
+def test_ingest_missing_column(tmp_path, dumps, storage):
+    """
+    Test raising ValueError on a dump without a needed column
+    """
+    ratings_path = tmp_path / 'title.ratings.tsv'
+    ratings_path.write_text('tconst\taverageRating\n', encoding='utf8')
+
+    with pytest.raises(ValueError):
+        ingest(storage, dumps[0], str(ratings_path))
@@ -0,0 +1,95 @@
+"""
+Test the per command instrumentation
+"""
+import json
+import time
+
+import pytest
+
+from instrumentation import Instrumentation
+
+
+@pytest.fixture(name='enabled')
+def fixture_enabled(tmp_path):
+    """
+    Instrumentation enabled with a trace file and a cProfile directory
+    """
+    instrumentation = Instrumentation()
+    instrumentation.enable(str(tmp_path / 'trace.jsonl'), str(tmp_path / 'profiles'))
+    yield instrumentation
+    instrumentation.disable()
+
+
+def test_disabled():
+    """
+    Test nothing is recorded while disabled
+    """
+    instrumentation = Instrumentation()
+    with instrumentation.command('List movies') as record:
+        with instrumentation.measure('network'):
+            pass
+
+    assert record is None
+    assert instrumentation.records == []
+
+
+def test_command_durations(tmp_path, enabled):
+    """
+    Test the wall, read, write and network times
+    and the bytes of a command
+    """
+    file_path = tmp_path / 'movies.json'
+    file_path.write_text('{}', encoding='utf8')
+
+    with enabled.command('Add movie') as record:
+        with enabled.measure('read', str(file_path)):
+            time.sleep(0.01)
+        with enabled.measure('network'):
+            time.sleep(0.02)
+        with enabled.measure('write', str(file_path), append=True):
+            with open(file_path, 'a', encoding='utf8') as file:
+                file.write('12345')
+    # outside a command
+    with enabled.measure('network'):
+        time.sleep(0.01)
+
+    assert enabled.records == [record]
+    assert record.sequence == 1
+    assert record.read_time >= 0.01 and record.network_time >= 0.02
+    assert record.wall_time >= record.read_time + record.network_time + record.write_time
+    assert record.bytes_read == 2 and record.bytes_written == 5
+    assert record.peak_memory > 0
+
+
+def test_summary(enabled):
+    """
+    Test the summary has a row per command name
+    """
+    for name in ('List movies', 'Movie stats', 'List movies'):
+        with enabled.command(name):
+            pass
+
+    rows = enabled.summary().splitlines()
+    assert rows[0].split() == ['command', 'calls', 'wall', 's', 'read', 's', 'write', 's',
+                               'net', 's', 'read', 'B', 'written', 'B', 'peak', 'B']
+    assert len(rows) == 4
+    assert rows[2].startswith('List movies') and rows[2].split()[2] == '2'
+    assert rows[3].startswith('Movie stats') and rows[3].split()[2] == '1'
+
+
+def test_trace_and_profiles(tmp_path, enabled):
+    """
+    Test a trace record and a cProfile file are written per command
+    """
+    with enabled.command('Search movie'):
+        pass
+    with enabled.command('Movie stats'):
+        pass
+
+    lines = (tmp_path / 'trace.jsonl').read_text(encoding='utf8').splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [(record['sequence'], record['command']) for record in records] == \
+           [(1, 'Search movie'), (2, 'Movie stats')]
+    assert records[0] == enabled.records[0].to_dict()
+    assert sorted(path.name for path in (tmp_path / 'profiles').iterdir()) == \
+           ['0001-search_movie.prof', '0002-movie_stats.prof']
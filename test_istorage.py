@@ -0,0 +1,53 @@
+"""
+Test the IStorage default implementations
+on a storage implementing only the abstract methods
+"""
+import pytest
+
+from istorage import IStorage
+
+
+class DictStorage(IStorage):
+    """
+    Movies kept in a dict, without update_fields
+    """
+
+    def __init__(self):
+        self.movies = {}
+
+    def list_movies(self) -> dict:
+        return {title: dict(info) for title, info in self.movies.items()}
+
+    def add_movie(self, title, rating, year, poster, website, country) -> str:
+        self.movies[title] = {'rating': rating, 'year': year, 'notes': '',
+                              'poster': poster, 'website': website, 'country': country}
+        return 'added'
+
+    def delete_movie(self, title: str) -> str:
+        del self.movies[title]
+        return 'deleted'
+
+    def update_movie(self, title: str, notes: str) -> str:
+        self.movies[title]['notes'] = notes
+        return 'updated'
+
+
+def test_update_fields():
+    """
+    Test updating the fields of a movie without a backend update_fields
+    """
+    storage = DictStorage()
+    storage.add_movie('TestTitanic', 7.9, 1997, 'poster', 'website', 'United States')
+    storage.update_fields('TestTitanic', notes='iceberg')
+
+    assert 'updated' in storage.update_fields('TestTitanic', rating=8.1, country='Mexico')
+    assert storage.list_movies() == {'TestTitanic': {'rating': 8.1, 'year': 1997,
+                                                     'notes': 'iceberg',
+                                                     'poster': 'poster',
+                                                     'website': 'website',
+                                                     'country': 'Mexico'}}
+    assert 'not found' in storage.update_fields('TestRoom', rating=3.6)
+    assert storage.update_many({'TestTitanic': {'year': 1998}, 'TestRoom': {'year': 2003}}) == 1
+    assert storage.list_movies()['TestTitanic']['year'] == 1998
+    with pytest.raises(TypeError):
+        storage.update_fields('TestTitanic', year='1997')
@@ -0,0 +1,141 @@
+"""
+Test the OMDb metadata refresh job
+against a local OMDb server
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from conftest import movie
+from metadata_refresh import MetadataRefreshJob
+
+OMDB_MOVIES = {
+    'tt0120338': {'Title': 'TestTitanic', 'imdbRating': '7.9',
+                  'Poster': 'new poster', 'Country': 'United States'},
+    'TestMatrix': {'Title': 'TestMatrix', 'imdbRating': 'N/A',
+                   'Poster': 'poster', 'Country': 'United States, Australia'},
+}
+
+
+class OmdbHandler(BaseHTTPRequestHandler):
+    """
+    Answers OMDb requests by id or title, with an ETag.
+    """
+    requests = []
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Send the OMDb movie, or 304 if the ETag matches.
+        """
+        query = parse_qs(urlparse(self.path).query)
+        key = query.get('i', query.get('t'))[0]
+        etag = f'"{key}"'
+        OmdbHandler.requests.append((key, self.headers.get('If-None-Match')))
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = json.dumps(OMDB_MOVIES.get(key, {'Response': 'False'})).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """
+        Keep the test output quiet.
+        """
+
+
+@pytest.fixture(name='omdb_url')
+def fixture_omdb_url():
+    """
+    A local OMDb server url.
+    """
+    OmdbHandler.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), OmdbHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/?apikey=test'
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(name='storage')
+def fixture_storage(json_storage):
+    """
+    JSON storage with an IMDb id in the TestTitanic website
+    """
+    return json_storage({
+        'TestTitanic': movie(7.5, website='https://www.imdb.com/title/tt0120338/'),
+        'TestMatrix': movie(8.7, 1999, website='')})
+
+
+def test_refresh_updates_changed_fields(storage, omdb_url, tmp_path):
+    """
+    Test only the changed fields are saved,
+    skipping the N/A values
+    """
+    checkpoint_path = tmp_path / 'refresh.json'
+    summary = MetadataRefreshJob(storage, omdb_url, max_workers=2,
+                                 checkpoint_path=str(checkpoint_path)).run()
+
+    assert summary['checked'] == 2 and summary['updated'] == 2
+    assert summary['changes'] == {
+        'TestTitanic': {'rating': 7.9, 'poster': 'new poster'},
+        'TestMatrix': {'country': 'United States, Australia'}}
+    movies = storage.list_movies()
+    assert movies['TestTitanic']['rating'] == 7.9
+    assert movies['TestMatrix']['rating'] == 8.7
+    assert not checkpoint_path.exists()
+    assert sorted(key for key, _ in OmdbHandler.requests) == ['TestMatrix', 'tt0120338']
+
+
+def test_refresh_sends_conditional_requests(storage, omdb_url, tmp_path):
+    """
+    Test a second refresh revalidates the cached responses
+    """
+    cache_path = str(tmp_path / 'cache.json')
+    MetadataRefreshJob(storage, omdb_url, cache_path=cache_path).run()
+    summary = MetadataRefreshJob(storage, omdb_url, cache_path=cache_path).run()
+
+    assert summary['not_modified'] == 2 and summary['updated'] == 0
+    assert all(etag for _, etag in OmdbHandler.requests[2:])
+
+
+def test_refresh_resumes_from_checkpoint(storage, omdb_url, tmp_path):
+    """
+    Test the titles done by an interrupted run are skipped,
+    and their changes are still saved
+    """
+    checkpoint_path = tmp_path / 'refresh.json'
+    checkpoint_path.write_text(json.dumps({'done': ['TestMatrix'],
+                                           'changes': {'TestMatrix': {'year': 2000}}}))
+
+    summary = MetadataRefreshJob(storage, omdb_url,
+                                 checkpoint_path=str(checkpoint_path)).run()
+
+    assert summary['checked'] == 1 and summary['updated'] == 2
+    assert [key for key, _ in OmdbHandler.requests] == ['tt0120338']
+    assert storage.list_movies()['TestMatrix']['year'] == 2000
+
+
+def test_refresh_records_invalid_responses(storage, omdb_url, monkeypatch):
+    """
+    Test a rating that isn't a number fails only its movie
+    """
+    monkeypatch.setitem(OMDB_MOVIES, 'TestMatrix', {**OMDB_MOVIES['TestMatrix'],
+                                                    'imdbRating': 'abc'})
+
+    summary = MetadataRefreshJob(storage, omdb_url).run()
+
+    assert list(summary['errors']) == ['TestMatrix']
+    assert summary['updated'] == 1
+    assert storage.list_movies()['TestTitanic']['rating'] == 7.9
@@ -0,0 +1,100 @@
+"""
+Test the similar movies recommendations
+"""
+import pytest
+
+from conftest import movie
+from movie_features import MovieFeatures, MovieFeaturesCache, format_similar_movies
+from movies_analytics import MovieAnalytics
+
+
+MOVIES = {'TestGodfather': movie(9.2, 1972, 'mafia family'),
+          'TestGoodfellas': movie(8.7, 1990, 'mafia crime'),
+          'TestAmelie': movie(8.3, 2001, 'paris romance', country='France, Germany'),
+          'TestDasBoot': movie(8.4, 1981, 'war submarine', country='Germany'),
+          'TestRoom': movie(3.6, 2003, 'so bad')}
+
+
+def test_similar_movies():
+    """
+    Test the nearest movies come first
+    """
+    features = MovieFeatures.from_movies(MOVIES)
+
+    similar = features.similar('TestGodfather', 4)
+    assert [title for title, _ in similar] == \
+           ['TestGoodfellas', 'TestDasBoot', 'TestAmelie', 'TestRoom']
+    assert [distance for _, distance in similar] == \
+           sorted(distance for _, distance in similar)
+    assert len(features.similar('TestRoom', 10)) == 4
+
+
+def test_similar_movies_by_notes():
+    """
+    Test the note tokens weigh in the similarity
+    """
+    features = MovieFeatures.from_movies(
+        MOVIES, use_notes=True, weights={'rating': 0.0, 'year': 0.0, 'country': 0.0})
+
+    assert features.similar('TestGodfather', 1) == [('TestGoodfellas', pytest.approx(1.0))]
+
+
+def test_similar_movies_errors():
+    """
+    Test raising errors on an unknown title or wrong types
+    """
+    features = MovieFeatures.from_movies(MOVIES)
+
+    with pytest.raises(ValueError):
+        features.similar('TestTitanic')
+    with pytest.raises(TypeError):
+        features.similar('TestRoom', '3')
+    assert MovieFeatures.from_movies({'TestRoom': MOVIES['TestRoom']}).similar('TestRoom') == []
+
+
+def test_recommendations(json_storage, monkeypatch):
+    """
+    Test the recommendations of MovieAnalytics
+    with the features built once or cached by storage version
+    """
+    builds = []
+    from_movies = MovieFeatures.from_movies
+
+    def counting_from_movies(movies, **options):
+        builds.append(len(movies))
+        return from_movies(movies, **options)
+
+    monkeypatch.setattr(MovieFeatures, 'from_movies', counting_from_movies)
+    analytics = MovieAnalytics(MOVIES)
+    assert analytics.recommend('TestGodfather', 1)[0][0] == 'TestGoodfellas'
+    assert 'does not exist' in analytics.get_recommendations('TestTitanic')
+    assert builds == [5]
+
+    storage = json_storage(MOVIES)
+    cache = MovieFeaturesCache(storage)
+    analytics = MovieAnalytics(storage.list_movies(), features_cache=cache)
+    assert analytics.recommend('TestGodfather', 1) == \
+           MovieAnalytics(MOVIES).recommend('TestGodfather', 1)
+    features = cache.get()
+    assert 'TestGoodfellas' in analytics.get_recommendations('TestGodfather')
+    assert cache.get() is features
+
+    storage.add_movie('TestCasino', 8.2, 1995, 'poster', 'website', 'United States')
+    assert cache.get() is not features
+
+
+def test_format_similar_movies(json_storage, monkeypatch):
+    """
+    Test the similar movies are shown from the cached features,
+    without loading the catalog again
+    """
+    storage = json_storage(MOVIES)
+    cache = MovieFeaturesCache(storage)
+    cache.get()
+
+    def list_movies():
+        raise AssertionError('The catalog was loaded again.')
+
+    monkeypatch.setattr(storage, 'list_movies', list_movies)
+    assert '8.7-1990' in format_similar_movies(cache.get(), 'TestGodfather', 1)
+    assert 'does not exist' in format_similar_movies(cache.get(), 'TestTitanic')
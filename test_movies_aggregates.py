@@ -0,0 +1,66 @@
+"""
+Test the movies statistics by country, decade and year
+"""
+import json
+
+from movies_aggregates import AggregatesCache, get_grouped_stats
+from storage_json import StorageJson
+
+TEST_MOVIES = {
+    'TestTitanic': {'rating': 7.9, 'year': 1997, 'notes': '', 'poster': '',
+                    'website': '', 'country': 'United States, Mexico'},
+    'TestMatrix': {'rating': 8.7, 'year': 1999, 'notes': '', 'poster': '',
+                   'website': '', 'country': 'United States'},
+    'TestInception': {'rating': 8.8, 'year': 2010, 'notes': '', 'poster': '',
+                      'website': '', 'country': 'United Kingdom'},
+    'TestRoom': {'rating': 3.6, 'year': 2003, 'notes': '', 'poster': '',
+                 'website': '', 'country': 'United States'},
+}
+
+
+def test_grouped_stats():
+    """
+    Test count, average, median, best and worst of each group,
+    with a movie of several countries counted in each of them
+    """
+    stats = get_grouped_stats(TEST_MOVIES)
+
+    assert stats['country']['United States'] == {'count': 3,
+                                                 'average': (7.9 + 8.7 + 3.6) / 3,
+                                                 'median': 7.9,
+                                                 'best': 'TestMatrix',
+                                                 'worst': 'TestRoom'}
+    assert stats['country']['Mexico']['best'] == 'TestTitanic'
+    assert stats['decade'][1990]['median'] == (7.9 + 8.7) / 2
+    assert sorted(stats['decade']) == [1990, 2000, 2010]
+    assert stats['year'][2010]['count'] == 1
+
+
+def test_grouped_stats_without_movies():
+    """
+    Test no groups without movies
+    """
+    assert get_grouped_stats({}) == {'country': {}, 'decade': {}, 'year': {}}
+
+
+def test_cache_recomputes_on_new_version(tmp_path, monkeypatch):
+    """
+    Test the statistics are computed once per storage version
+    """
+    file_path = tmp_path / 'movies.json'
+    file_path.write_text(json.dumps(TEST_MOVIES), encoding='utf8')
+    storage = StorageJson(str(file_path))
+    cache = AggregatesCache(storage)
+
+    calls = []
+    list_movies = storage.list_movies
+    monkeypatch.setattr(storage, 'list_movies',
+                        lambda: calls.append(1) or list_movies())
+
+    assert cache.get() is cache.get()
+    assert len(calls) == 1
+
+    storage.delete_movie('TestRoom')
+    calls.clear()
+    assert cache.get()['country']['United States']['worst'] == 'TestTitanic'
+    assert len(calls) == 1
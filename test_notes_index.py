@@ -0,0 +1,114 @@
+"""
+Test the inverted index of the movies notes
+"""
+import pytest
+
+from conftest import movie
+from notes_index import NotesIndex, parse_query
+
+MOVIES = {'TestInterstellar': movie(notes='Space and time travel, a great soundtrack'),
+          'TestPrimer': movie(notes='Time travel on a tiny budget, travel travel'),
+          'TestAlien': movie(notes='Space horror, a great creature'),
+          'TestRoom': movie(notes='So bad it is great'),
+          'TestTitanic': movie()}
+
+
+@pytest.fixture(name='storage')
+def fixture_storage(json_storage):
+    """
+    JSON storage with the test movies
+    """
+    return json_storage(MOVIES)
+
+
+def titles(results: list) -> list:
+    """
+    Titles of search results
+    """
+    return [title for title, _ in results]
+
+
+def test_boolean_queries(storage):
+    """
+    Test AND, OR and excluded words
+    """
+    index = NotesIndex(storage)
+
+    assert sorted(titles(index.search('space great'))) == ['TestAlien', 'TestInterstellar']
+    assert titles(index.search('space -horror')) == ['TestInterstellar']
+    assert sorted(titles(index.search('horror OR budget'))) == ['TestAlien', 'TestPrimer']
+    assert index.search('western') == []
+
+
+def test_phrase_queries(storage):
+    """
+    Test quoted phrases match the words in order
+    """
+    index = NotesIndex(storage)
+
+    assert sorted(titles(index.search('"time travel"'))) == ['TestInterstellar', 'TestPrimer']
+    assert titles(index.search('"travel time"')) == []
+    assert titles(index.search('"great creature"')) == ['TestAlien']
+
+
+def test_bm25_ranking(storage):
+    """
+    Test the movie repeating a word ranks first
+    """
+    assert titles(NotesIndex(storage).search('travel')) == ['TestPrimer', 'TestInterstellar']
+    assert len(NotesIndex(storage).search('great', limit=2)) == 2
+
+
+def test_incremental_updates(storage):
+    """
+    Test the index follows update, delete and add
+    """
+    index = NotesIndex(storage)
+    index.search('space')
+
+    storage.update_movie('TestTitanic', 'An iceberg in space')
+    storage.delete_movie('TestAlien')
+    storage.add_movies([('TestGravity', movie(notes='Lost in space'))])
+
+    assert sorted(titles(index.search('space'))) == \
+           ['TestGravity', 'TestInterstellar', 'TestTitanic']
+    assert index.search('horror') == []
+
+
+def test_saved_index(tmp_path, storage, monkeypatch):
+    """
+    Test the saved index is loaded while the storage is unchanged
+    """
+    index_path = str(tmp_path / 'movies.json.notes-index')
+    index = NotesIndex(storage, index_path)
+    index.search('space')
+    index.close()
+
+    def rebuild(_self):
+        raise AssertionError('The saved index was not loaded.')
+
+    monkeypatch.setattr(NotesIndex, 'build', rebuild)
+    loaded = NotesIndex(storage, index_path)
+    assert sorted(titles(loaded.search('space'))) == ['TestAlien', 'TestInterstellar']
+
+
+def test_index_titles(storage):
+    """
+    Test searching the titles too
+    """
+    assert titles(NotesIndex(storage, include_titles=True).search('testroom')) == ['TestRoom']
+    assert NotesIndex(storage).search('testroom') == []
+
+
+def test_parse_query(storage):
+    """
+    Test parsing the query clauses,
+    raising TypeError if the query isn't a string
+    and ValueError if the limit is below 1
+    """
+    assert parse_query('sci-fi -"bad acting" OR Robots') == \
+           [[(False, ['sci', 'fi']), (True, ['bad', 'acting'])], [(False, ['robots'])]]
+    with pytest.raises(TypeError):
+        NotesIndex(storage).search(42)
+    with pytest.raises(ValueError):
+        NotesIndex(storage).search('space', limit=0)
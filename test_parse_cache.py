@@ -0,0 +1,99 @@
+"""
+Test the parsed files cache
+"""
+import json
+import os
+
+import pytest
+
+from parse_cache import ParseCache
+from storage_csv import StorageCsv
+from storage_json import StorageJson
+
+
+@pytest.fixture(name='counting_parse')
+def fixture_counting_parse():
+    """
+    json.loads counting its calls.
+    """
+    def parse(content: bytes):
+        parse.calls += 1
+        return json.loads(content)
+
+    parse.calls = 0
+    return parse
+
+
+def test_load_unchanged_file_from_cache(tmp_path, counting_parse):
+    """
+    Test an unchanged file is parsed once,
+    and every load returns a new copy
+    """
+    file_path = tmp_path / 'movies.json'
+    file_path.write_text('{"TestTitanic": {"rating": 7.9}}', encoding='utf8')
+    cache = ParseCache(str(tmp_path / 'cache'))
+
+    first = cache.load(str(file_path), counting_parse)
+    first['TestTitanic']['rating'] = 1.0
+    # an old file is trusted by its size and modification time
+    os.utime(file_path, ns=(0, 0))
+    second = cache.load(str(file_path), counting_parse)
+    third = cache.load(str(file_path), counting_parse)
+
+    assert second == third == {'TestTitanic': {'rating': 7.9}}
+    assert counting_parse.calls == 1
+
+
+def test_load_changed_file_with_same_size_and_time(tmp_path, counting_parse):
+    """
+    Test a file changed within the same modification time
+    is detected by its content hash
+    """
+    file_path = tmp_path / 'movies.json'
+    file_path.write_text('{"TestTitanic": {"rating": 7.9}}', encoding='utf8')
+    stat = os.stat(file_path)
+    cache = ParseCache(str(tmp_path / 'cache'))
+    cache.load(str(file_path), counting_parse)
+
+    file_path.write_text('{"TestTitanic": {"rating": 8.9}}', encoding='utf8')
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert cache.load(str(file_path), counting_parse) == {'TestTitanic': {'rating': 8.9}}
+    assert counting_parse.calls == 2
+
+
+def test_load_with_corrupted_cache(tmp_path, counting_parse):
+    """
+    Test a corrupted cache file falls back to parsing
+    """
+    file_path = tmp_path / 'movies.json'
+    file_path.write_text('{"TestTitanic": {"rating": 7.9}}', encoding='utf8')
+    cache_dir = tmp_path / 'cache'
+    cache = ParseCache(str(cache_dir))
+    cache.load(str(file_path), counting_parse)
+
+    for cache_file in cache_dir.iterdir():
+        cache_file.write_bytes(b'not a pickle')
+
+    assert cache.load(str(file_path), counting_parse) == {'TestTitanic': {'rating': 7.9}}
+    assert counting_parse.calls == 2
+
+
+def test_storages_with_cache_dir(tmp_path):
+    """
+    Test the storages see their own changes through the cache
+    """
+    json_path = tmp_path / 'movies.json'
+    json_path.write_text('{}', encoding='utf8')
+    csv_path = tmp_path / 'movies.csv'
+    csv_path.write_text('title,rating,year,notes,poster,website,country\n',
+                        encoding='utf8')
+
+    for storage in (StorageJson(str(json_path), cache_dir=str(tmp_path / 'cache')),
+                    StorageCsv(str(csv_path), cache_dir=str(tmp_path / 'cache'))):
+        assert storage.list_movies() == {}
+        storage.add_movie('testMovie', 5.5, 2023, 'poster',
+                          'https://www.testwebsite.com', 'Canada')
+        storage.update_movie('testMovie', 'test notes')
+        assert storage.list_movies()['testMovie']['notes'] == 'test notes'
+        assert storage.list_movies()['testMovie']['rating'] == 5.5
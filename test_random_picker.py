@@ -0,0 +1,60 @@
+"""
+Test the random movie picker
+"""
+from collections import Counter
+
+from random_picker import RandomMoviePicker
+
+TEST_MOVIES = {'TestTitanic': {'rating': 7.9, 'year': 1997},
+               'TestMatrix': {'rating': 8.7, 'year': 1999},
+               'TestInception': {'rating': 8.8, 'year': 2010},
+               'TestRoom': {'rating': 3.6, 'year': 2003}}
+
+
+def test_pick_is_reproducible_with_seed():
+    """
+    Test the same seed picks the same movies
+    """
+    first = RandomMoviePicker(dict(TEST_MOVIES), seed=1)
+    second = RandomMoviePicker(dict(TEST_MOVIES), seed=1)
+
+    assert [first.pick() for _ in range(10)] == [second.pick() for _ in range(10)]
+
+
+def test_pick_after_add_and_remove():
+    """
+    Test the picks follow the added and removed movies
+    """
+    picker = RandomMoviePicker(dict(TEST_MOVIES), seed=1)
+    picker.remove('TestTitanic')
+    picker.remove('TestRoom')
+    picker.add('testMovie', {'rating': 5.5, 'year': 2023})
+
+    picked = {picker.pick()[0] for _ in range(200)}
+    assert picked == {'TestMatrix', 'TestInception', 'testMovie'}
+    assert len(picker) == 3
+
+
+def test_pick_weighted_by_rating():
+    """
+    Test the rating-weighted picks frequencies
+    """
+    picker = RandomMoviePicker({'low': {'rating': 1.0}, 'high': {'rating': 9.0}}, seed=1)
+
+    counts = Counter(picker.pick_weighted()[0] for _ in range(10000))
+    assert 0.87 < counts['high'] / 10000 < 0.93
+
+
+def test_pick_filtered():
+    """
+    Test the filtered picks, with the rejection sampling
+    and the reservoir sampling fallback
+    """
+    picker = RandomMoviePicker(dict(TEST_MOVIES), seed=1, max_attempts=1)
+
+    def recent_and_good(info):
+        return info['year'] >= 2000 and info['rating'] >= 8
+
+    assert {picker.pick(recent_and_good)[0] for _ in range(20)} == {'TestInception'}
+    assert picker.pick(lambda info: info['rating'] > 9) is None
+    assert RandomMoviePicker({}).pick() is None
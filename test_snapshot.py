@@ -0,0 +1,78 @@
+"""
+Test functions in SnapshotManager class
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import CountingStorageJson
+from snapshot import SnapshotManager
+from storage_csv import StorageCsv
+
+
+@pytest.fixture(name='storage')
+def fixture_storage(json_storage):
+    """
+    JSON storage with TestTitanic, counting its parses
+    """
+    return json_storage(storage_class=CountingStorageJson)
+
+
+def test_concurrent_readers_share_one_parse(storage):
+    """
+    Test concurrent readers of an unchanged file share one snapshot
+    """
+    manager = SnapshotManager(storage)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        snapshots = list(executor.map(lambda _: manager.get_snapshot(), range(32)))
+
+    assert storage.parses == 1
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+
+
+def test_snapshot_is_read_only(storage):
+    """
+    Test raising TypeError
+    when changing a snapshot
+    """
+    snapshot = SnapshotManager(storage).get_snapshot()
+    with pytest.raises(TypeError):
+        snapshot.movies['TestTitanic']['notes'] = 'changed'
+
+
+def test_writes_publish_new_snapshots(storage):
+    """
+    Test the writes publish new snapshots copy-on-write,
+    leaving the older snapshots unchanged
+    """
+    manager = SnapshotManager(storage)
+    first = manager.get_snapshot()
+
+    manager.add_movie('testMovie', 5.5, 2023, 'poster',
+                      'https://www.testwebsite.com', 'Canada')
+    manager.update_movie('TestTitanic', 'test notes')
+    parses = storage.parses
+    second = manager.get_snapshot()
+
+    assert 'testMovie' not in first.movies
+    assert first.movies['TestTitanic']['notes'] == ''
+    assert second.movies['TestTitanic']['notes'] == 'test notes'
+    assert second.sequence > first.sequence
+    # the published snapshot matches the file without parsing it again
+    assert storage.parses == parses
+    assert second.to_dict() == storage.list_movies()
+
+    manager.delete_movie('testMovie')
+    assert 'testMovie' not in manager.get_snapshot().movies
+
+
+def test_snapshot_of_csv_file(tmp_path):
+    """
+    Test a snapshot of a CSV file
+    """
+    file_path = tmp_path / 'movies.csv'
+    file_path.write_text('title,rating,year,notes,poster,website,country\n'
+                         'testMovie,5.5,2023,,poster,https://www.testwebsite.com,Canada\n',
+                         encoding='utf8')
+    snapshot = SnapshotManager(StorageCsv(str(file_path))).get_snapshot()
+    assert snapshot.movies['testMovie']['rating'] == 5.5
@@ -184,3 +184,43 @@ def test_update_movie_with_invalid_notes():
 
     if os.path.exists(TEST_FILE_PATH):
         os.remove(TEST_FILE_PATH)
+
+
+def test_update_fields_rewrites_only_the_row(tmp_path):
+    """
+    Test updating several fields of a movie,
+    in place and with a row length change
+    """
+    file_path = tmp_path / 'movies.csv'
+    file_path.write_text('title,rating,year,notes,poster,website,country\n'
+                         'testMovie,5.5,2023,,poster,https://www.testwebsite.com,Canada\n'
+                         'otherMovie,7.0,2001,,poster,https://www.other.com,France\n',
+                         encoding='utf8')
+    storage = StorageCsv(str(file_path))
+
+    storage.update_fields('testMovie', rating=6.5)
+    storage.update_fields('testMovie', notes='test notes', country='Canada, UK')
+
+    movies = storage.list_movies()
+    assert movies['testMovie'] == {'rating': 6.5,
+                                   'year': 2023,
+                                   'notes': 'test notes',
+                                   'poster': 'poster',
+                                   'website': 'https://www.testwebsite.com',
+                                   'country': 'Canada, UK'}
+    assert movies['otherMovie']['country'] == 'France'
+
+
+def test_update_fields_with_invalid_field(tmp_path):
+    """
+    Test raising TypeError and ValueError
+    with invalid fields
+    when updating a movie
+    """
+    file_path = tmp_path / 'movies.csv'
+    file_path.write_text('title,rating,year,notes,poster,website,country\n',
+                         encoding='utf8')
+    with pytest.raises(TypeError):
+        StorageCsv(str(file_path)).update_fields('testMovie', year='2023')
+    with pytest.raises(ValueError):
+        StorageCsv(str(file_path)).update_fields('testMovie', director='test')
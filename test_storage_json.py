@@ -192,3 +192,35 @@ def test_update_movie_with_invalid_notes():
 
     if os.path.exists(TEST_FILE_PATH):
         os.remove(TEST_FILE_PATH)
+
+
+def test_update_fields_with_valid_fields(tmp_path):
+    """
+    Test updating several fields of a movie at once
+    """
+    file_path = tmp_path / 'movies.json'
+    file_path.write_text(json.dumps({'testMovie': {'rating': 5.5,
+                                                   'year': 2023,
+                                                   'notes': '',
+                                                   'poster': 'poster',
+                                                   'website': 'website',
+                                                   'country': 'Canada'}}),
+                         encoding='utf8')
+    storage = StorageJson(str(file_path))
+
+    storage.update_fields('testMovie', rating=6.5, poster='new poster')
+
+    movie = storage.list_movies()['testMovie']
+    assert movie['rating'] == 6.5
+    assert movie['poster'] == 'new poster'
+    assert movie['year'] == 2023
+
+
+def test_update_fields_with_invalid_rating():
+    """
+    Test raising TypeError
+    with invalid rating
+    when updating a movie
+    """
+    with pytest.raises(TypeError):
+        StorageJson('_static/movies.json').update_fields('testMovie', rating='5.5')
@@ -0,0 +1,103 @@
+"""
+Test functions in StorageNdjson class
+"""
+import json
+
+import pytest
+
+import storage_ndjson
+from storage_ndjson import StorageNdjson
+
+
+@pytest.fixture(name='file_path')
+def fixture_file_path(tmp_path):
+    """
+    A test data file with one movie.
+    """
+    file_path = tmp_path / 'movies.ndjson'
+    file_path.write_text(json.dumps({'title': 'TestTitanic', 'rating': 7.9, 'year': 1997,
+                                     'notes': '', 'poster': 'poster',
+                                     'website': 'website',
+                                     'country': 'United States'}) + '\n',
+                         encoding='utf8')
+    return file_path
+
+
+def test_add_movie_appends_a_line(file_path):
+    """
+    Test adding a movie only appends its line
+    """
+    before = file_path.read_text(encoding='utf8')
+    storage = StorageNdjson(str(file_path))
+
+    storage.add_movie('testMovie', 5.5, 2023, 'poster',
+                      'https://www.testwebsite.com', 'Canada')
+
+    content = file_path.read_text(encoding='utf8')
+    assert content.startswith(before)
+    assert json.loads(content[len(before):])['title'] == 'testMovie'
+    assert sorted(StorageNdjson(str(file_path)).list_movies()) == ['TestTitanic', 'testMovie']
+
+
+def test_update_and_delete_movie(file_path):
+    """
+    Test the last line of a title wins,
+    for a new storage reading the file
+    """
+    storage = StorageNdjson(str(file_path))
+    storage.update_fields('TestTitanic', rating=8.0, notes='test notes')
+    storage.add_movie('testMovie', 5.5, 2023, 'poster',
+                      'https://www.testwebsite.com', 'Canada')
+    storage.delete_movie('testMovie')
+
+    movies = StorageNdjson(str(file_path)).list_movies()
+    assert list(movies) == ['TestTitanic']
+    assert movies['TestTitanic']['rating'] == 8.0
+    assert movies['TestTitanic']['notes'] == 'test notes'
+    assert len(file_path.read_text(encoding='utf8').splitlines()) == 4
+
+
+def test_compaction(file_path):
+    """
+    Test the file is compacted once the stale lines
+    outnumber the live movies
+    """
+    storage = StorageNdjson(str(file_path))
+    for index in range(150):
+        storage.update_movie('TestTitanic', f'notes {index}')
+
+    assert len(file_path.read_text(encoding='utf8').splitlines()) < 110
+    assert StorageNdjson(str(file_path)).list_movies()['TestTitanic']['notes'] == 'notes 149'
+
+    storage.compact()
+    assert len(file_path.read_text(encoding='utf8').splitlines()) == 1
+
+
+def test_parallel_parse(file_path, monkeypatch):
+    """
+    Test parsing in chunks in worker processes
+    """
+    storage = StorageNdjson(str(file_path))
+    for index in range(30):
+        storage.add_movie(f'testMovie{index}', 5.5, 2023, 'poster',
+                          'https://www.testwebsite.com', 'Canada')
+    storage.delete_movie('testMovie3')
+    expected = StorageNdjson(str(file_path)).list_movies()
+
+    monkeypatch.setattr(storage_ndjson, 'PARALLEL_MIN_BYTES', 0)
+    parallel = StorageNdjson(str(file_path), max_workers=2)
+    try:
+        assert parallel.list_movies() == expected
+    finally:
+        parallel.close()
+
+
+def test_list_movies_with_invalid_file_format(tmp_path):
+    """
+    Test raising ValueError
+    with invalid file format
+    """
+    file_path = tmp_path / 'movies.txt'
+    file_path.write_text('', encoding='utf8')
+    with pytest.raises(ValueError):
+        StorageNdjson(str(file_path)).list_movies()
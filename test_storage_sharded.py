@@ -0,0 +1,84 @@
+"""
+Test functions in StorageSharded class
+"""
+import os
+
+import pytest
+
+from storage_sharded import StorageSharded, shard_index
+
+TEST_MOVIES = {f'testMovie{i}': {'rating': 5.5,
+                                 'year': 2023,
+                                 'notes': '',
+                                 'poster': 'poster',
+                                 'website': 'https://www.testwebsite.com',
+                                 'country': 'Canada'}
+               for i in range(20)}
+
+
+def test_list_movies_merges_shards(tmp_path):
+    """
+    Test listing the movies of all the shards,
+    sequentially and in a process pool
+    """
+    StorageSharded.create(str(tmp_path), 4, TEST_MOVIES)
+
+    assert StorageSharded(str(tmp_path), max_workers=1).list_movies() == TEST_MOVIES
+
+    storage = StorageSharded(str(tmp_path), max_workers=2)
+    try:
+        assert storage.list_movies() == TEST_MOVIES
+    finally:
+        storage.close()
+
+
+def test_list_movies_with_non_exists_directory(tmp_path):
+    """
+    Test raising FileNotFoundError
+    with non exists shard directory
+    """
+    with pytest.raises(FileNotFoundError):
+        StorageSharded(str(tmp_path / 'missing'))
+
+
+def test_add_movie_writes_only_its_shard(tmp_path):
+    """
+    Test adding a movie only rewrites the title's shard
+    """
+    storage = StorageSharded.create(str(tmp_path), 4)
+    shard_files = sorted(name for name in os.listdir(tmp_path)
+                         if name.startswith('shard-'))
+    before = {name: os.stat(tmp_path / name).st_mtime_ns for name in shard_files}
+
+    storage.add_movie('testMovie', 5.5, 2023, 'poster',
+                      'https://www.testwebsite.com', 'Canada')
+
+    changed = [name for name in shard_files
+               if os.stat(tmp_path / name).st_mtime_ns != before[name]]
+    assert changed == [f'shard-{shard_index("testMovie", 4):04d}.json']
+    assert 'testMovie' in storage.list_movies()
+
+
+def test_update_and_delete_movie(tmp_path):
+    """
+    Test updating and deleting a movie
+    """
+    storage = StorageSharded.create(str(tmp_path), 3, TEST_MOVIES)
+
+    storage.update_movie('testMovie7', 'test notes')
+    assert storage.list_movies()['testMovie7']['notes'] == 'test notes'
+
+    storage.delete_movie('testMovie7')
+    assert 'testMovie7' not in storage.list_movies()
+
+
+def test_add_movie_with_invalid_title(tmp_path):
+    """
+    Test raising TypeError
+    with invalid title
+    when adding a new movie
+    """
+    storage = StorageSharded.create(str(tmp_path), 2)
+    with pytest.raises(TypeError):
+        storage.add_movie(123, 5.5, 2023, 'poster',
+                          'https://www.testwebsite.com', 'Canada')
@@ -0,0 +1,95 @@
+"""
+Test the streaming movies statistics
+"""
+import random
+
+from batch_cli import BatchRunner
+from movies_analytics import MovieAnalytics
+from storage_csv import StorageCsv
+from streaming_stats import KllSketch, StreamingStats
+
+TEST_MOVIES = {f'testMovie{i}': {'rating': rating, 'year': 2000 + i, 'notes': '',
+                                 'poster': '', 'website': '', 'country': 'Canada'}
+               for i, rating in enumerate([7.9, 8.7, 3.6, 9.0, 6.1, 8.7, 5.5])}
+
+
+def test_stats_match_exact_stats():
+    """
+    Test the stats of a small catalog are exact
+    """
+    stats = StreamingStats(top_k=2).update(TEST_MOVIES.items()).get_stats()
+    exact = MovieAnalytics(TEST_MOVIES).get_stats()
+
+    assert stats['count'] == exact['count']
+    assert stats['average'] == exact['average']
+    assert stats['median'] == exact['median']
+    assert stats['best'] == ['testMovie3', 'testMovie5']
+    assert stats['worst'] == ['testMovie2', 'testMovie6']
+    assert [group['count'] for group in stats['histogram']] == \
+           [0, 0, 0, 1, 0, 1, 1, 1, 2, 1]
+
+
+def test_stats_without_movies():
+    """
+    Test the stats of no movies
+    """
+    stats = StreamingStats().get_stats()
+    assert stats['count'] == 0 and stats['median'] is None
+
+
+def test_movie_stats_match_exact_stats():
+    """
+    Test the menu statistics of a small catalog are exact
+    """
+    assert StreamingStats().update(TEST_MOVIES.items()).get_movie_stats() == \
+           MovieAnalytics(TEST_MOVIES).get_movie_stats()
+    assert 'no movies' in StreamingStats().get_movie_stats()
+
+
+def test_merged_stats_equal_single_pass():
+    """
+    Test merging the stats of two halves
+    """
+    movies = list(TEST_MOVIES.items())
+    merged = StreamingStats(top_k=2).update(movies[:3]) \
+        .merge(StreamingStats(top_k=2).update(movies[3:])).get_stats()
+
+    assert merged == StreamingStats(top_k=2).update(movies).get_stats()
+
+
+def test_sketch_rank_error_is_bounded():
+    """
+    Test the approximate quantiles of a large merged stream
+    """
+    generator = random.Random(1)
+    values = [generator.random() for _ in range(50000)]
+    sketch = KllSketch(seed=1)
+    other = KllSketch(seed=2)
+    for value in values[:25000]:
+        sketch.update(value)
+    for value in values[25000:]:
+        other.update(value)
+    sketch.merge(other)
+
+    values.sort()
+    for fraction in (0.1, 0.5, 0.9):
+        rank = values.index(sketch.quantile(fraction)) / len(values)
+        assert abs(rank - fraction) < 0.02
+    assert sum(len(items) for items in sketch._compactors) < 1000
+
+
+def test_streaming_stats_command(tmp_path):
+    """
+    Test the batch stats command streaming a CSV file
+    """
+    file_path = tmp_path / 'movies.csv'
+    file_path.write_text('title,rating,year,notes,poster,website,country\n'
+                         'TestTitanic,7.9,1997,,poster,website,United States,Mexico\n'
+                         'TestRoom,3.6,2003,,poster,website,United States\n',
+                         encoding='utf8')
+    storage = StorageCsv(str(file_path))
+
+    assert list(storage.iter_movies()) == list(storage.list_movies().items())
+
+    result = BatchRunner(storage).run_line('stats --streaming')
+    assert result['count'] == 2 and result['best'][0] == 'TestTitanic'
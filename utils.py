@@ -2,6 +2,9 @@
 A utility file for global access constants.
 """
 import os
+import re
+
+from file_codecs import strip_compression
 
 colors = {'default': '\033[0m',
           'red': '\033[31m',
@@ -21,7 +24,21 @@ choices = {'0': "Exit movie app",
            '7': "Searching movies",
            '8': "Sorting Movies",
            '9': "Movies Ratings Histogram",
-           '10': "Generate Movies Website"}
+           '10': "Generate Movies Website",
+           '11': "Movies Statistics by Country",
+           '12': "Movies Statistics by Decade",
+           '13': "Movies Statistics by Year",
+           '14': "Searching movies notes",
+           '15': "Similar movies"}
+
+
+# movie fields and their types, in the storage files columns order
+movie_fields = {'rating': float,
+                'year': int,
+                'notes': str,
+                'poster': str,
+                'website': str,
+                'country': str}
 
 
 def menu() -> str:
@@ -42,6 +59,11 @@ def menu() -> str:
             8. Movies sorted by rating
             9. Create Rating Histogram
             10.Generate website
+            11.Stats by country
+            12.Stats by decade
+            13.Stats by year
+            14.Search notes
+            15.Similar movies
             {colors.get('default')}
             """
 
@@ -51,7 +73,7 @@ def user_input_choice() -> str:
     Get menu choice from user.
     """
     return input(f"{colors.get('blue')}"
-                 f"Enter choice (0-10): "
+                 f"Enter choice (0-15): "
                  f"{colors.get('default')}")
 
 
@@ -64,14 +86,75 @@ def exit_app() -> str:
 
 def check_file_path(file_path: str, file_extension: str):
     """
-    Check if the file format is correct.
+    Check if the file format is correct,
+    ignoring a compression extension, e.g. movies.json.gz.
     Check if the file exists.
     :param file_path: str
     :param file_extension: str
     """
-    if not file_path.endswith(file_extension):
+    if not strip_compression(file_path).endswith(file_extension):
         raise ValueError(f'Invalid file format. '
                          f'File must be in {file_extension} format.')
 
     if not os.path.isfile(file_path):
         raise FileNotFoundError(f'The {file_path} file does not exist.')
+
+
+def strip_colors(text: str) -> str:
+    """
+    Remove the terminal color codes from a text.
+    :param text: str
+    :return: plain text (str)
+    """
+    return re.sub(r'\033\[[0-9;]*m', '', text)
+
+
+def file_version(file_path: str) -> tuple | None:
+    """
+    Get a token identifying the current version of a file,
+    from its modification time, size and inode.
+    :param file_path: str
+    :return: version (tuple | None if the file does not exist)
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def validate_movie_fields(fields: dict):
+    """
+    Check the types of movie fields to update.
+    :param fields: dict
+    """
+    if not fields:
+        raise ValueError('Fields must not be empty.')
+
+    for name, value in fields.items():
+        if name not in movie_fields:
+            raise ValueError(f"Unknown field '{name}'.")
+        field_type = movie_fields[name]
+        if not isinstance(value, field_type) or \
+                (field_type is int and isinstance(value, bool)):
+            raise TypeError(f'{name.capitalize()} must be '
+                            f'{"string" if field_type is str else field_type.__name__}.')
+    if 'rating' in fields and not fields['rating']:
+        raise ValueError('Rating must not be empty.')
+
+
+def validate_new_movie(title: str, info: dict):
+    """
+    Check the title and the fields of a movie to add.
+    :param title: str
+    :param info: all the movie fields (dict)
+    """
+    if not isinstance(title, str):
+        raise TypeError('Title must be string.')
+    if not title:
+        raise ValueError('Title must not be empty.')
+
+    missing = [name for name in movie_fields if name not in info]
+    if missing:
+        raise ValueError(f"Missing field '{missing[0]}'.")
+    validate_movie_fields(info)